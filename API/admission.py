@@ -0,0 +1,116 @@
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Tuple
+from fastapi import HTTPException
+import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-process budgets. With several workers on a node, divide the node's capacity between them.
+CPU_SLOTS = int(os.getenv("ZENITH_CPU_SLOTS", str(os.cpu_count() or 2)))
+LLM_SLOTS = int(os.getenv("ZENITH_LLM_SLOTS", "8"))
+# How many callers may queue for a slot, and for how long, before new work is shed with 503
+ADMISSION_MAX_WAITING = int(os.getenv("ZENITH_ADMISSION_MAX_WAITING", "32"))
+ADMISSION_TIMEOUT = float(os.getenv("ZENITH_ADMISSION_TIMEOUT", "5"))
+
+
+class AdmissionController:
+    """
+    Cost-weighted concurrency limit for one class of work ("cpu" for Prophet fits, "llm" for Gemini
+    and local generation). Work runs immediately while in-flight cost fits the capacity, otherwise it
+    waits in FIFO order; when the queue is full or the wait exceeds the timeout the caller gets a 503
+    with a Retry-After estimated from recent hold times, instead of piling onto a saturated node.
+    """
+
+    def __init__(self, name: str, capacity: int, max_waiting: int = ADMISSION_MAX_WAITING,
+                 timeout: float = ADMISSION_TIMEOUT):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.in_flight = 0
+        self.hold_seconds = 1.0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.hold_seconds * (len(self._waiters) + 1) / self.capacity))
+
+    def _shed(self, reason: str):
+        metrics.inc("zenith_admission_shed_total", resource=self.name, reason=reason)
+        logger.warning("Shedding %s work (%s): %d in flight, %d waiting", self.name, reason,
+                       self.in_flight, len(self._waiters))
+        raise HTTPException(status_code=503, detail=f"Server busy ({self.name}), retry later",
+                            headers={"Retry-After": str(self.retry_after())})
+
+    def _wake(self):
+        while self._waiters and self.in_flight + self._waiters[0][0] <= self.capacity:
+            cost, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += cost
+            future.set_result(True)
+
+    def release(self, cost: int):
+        self.in_flight -= cost
+        self._wake()
+
+    async def acquire(self, cost: int = 1, timeout: float = None):
+        cost = min(max(1, cost), self.capacity)
+        if not self._waiters and self.in_flight + cost <= self.capacity:
+            self.in_flight += cost
+            return cost
+        if len(self._waiters) >= self.max_waiting:
+            self._shed("queue_full")
+        future = asyncio.get_running_loop().create_future()
+        entry = (cost, future)
+        self._waiters.append(entry)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait({future}, timeout=self.timeout if timeout is None else timeout)
+        except BaseException:
+            self._abandon(entry)
+            raise
+        metrics.observe("zenith_admission_wait_seconds", time.perf_counter() - started, resource=self.name)
+        if not future.done():
+            self._abandon(entry)
+            self._shed("timeout")
+        return cost
+
+    def _abandon(self, entry: Tuple[int, asyncio.Future]):
+        cost, future = entry
+        if future.done() and not future.cancelled():
+            # Granted just as the caller gave up: hand the slot on
+            self.release(cost)
+        else:
+            future.cancel()
+            try:
+                self._waiters.remove(entry)
+            except ValueError:
+                pass
+
+    @asynccontextmanager
+    async def admit(self, cost: int = 1, timeout: float = None):
+        """
+        async with cpu_admission.admit(cost=2):
+            model.fit(df)
+        """
+        cost = await self.acquire(cost, timeout)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.hold_seconds = 0.8 * self.hold_seconds + 0.2 * (time.perf_counter() - started)
+            self.release(cost)
+
+
+cpu_admission = AdmissionController("cpu", CPU_SLOTS)
+llm_admission = AdmissionController("llm", LLM_SLOTS)
+
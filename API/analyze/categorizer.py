@@ -0,0 +1,306 @@
+"""
+Categories for transactions from their descriptions: merchant keywords first, then a naive Bayes
+classifier over character trigrams. Train the classifier on labelled data with:
+    python -m analyze.categorizer --train labelled.csv
+"""
+import os
+import re
+import json
+import threading
+import argparse
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+import metrics
+from metrics import timed
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+DEFAULT_CATEGORY = "Other"
+
+DEFAULT_MERCHANT_CATEGORIES = {
+    'restaurant': 'Food', 'cafe': 'Food', 'coffee': 'Food', 'swiggy': 'Food', 'zomato': 'Food',
+    'dominos': 'Food', 'mcdonald': 'Food', 'starbucks': 'Food', 'pizza': 'Food', 'bakery': 'Food',
+    'grocery': 'Groceries', 'supermarket': 'Groceries', 'bigbasket': 'Groceries', 'dmart': 'Groceries',
+    'blinkit': 'Groceries', 'walmart': 'Groceries',
+    'uber': 'Transport', 'ola': 'Transport', 'metro': 'Transport', 'irctc': 'Transport', 'fuel': 'Transport',
+    'petrol': 'Transport', 'parking': 'Transport', 'airline': 'Travel', 'indigo': 'Travel', 'hotel': 'Travel',
+    'makemytrip': 'Travel', 'airbnb': 'Travel',
+    'rent': 'Rent', 'landlord': 'Rent', 'electricity': 'Utilities', 'water bill': 'Utilities',
+    'broadband': 'Utilities', 'airtel': 'Utilities', 'jio': 'Utilities', 'recharge': 'Utilities', 'gas': 'Utilities',
+    'amazon': 'Shopping', 'flipkart': 'Shopping', 'myntra': 'Shopping', 'mall': 'Shopping',
+    'netflix': 'Entertainment', 'spotify': 'Entertainment', 'prime video': 'Entertainment', 'cinema': 'Entertainment',
+    'pvr': 'Entertainment', 'bookmyshow': 'Entertainment',
+    'pharmacy': 'Health', 'hospital': 'Health', 'clinic': 'Health', 'apollo': 'Health', 'insurance': 'Insurance',
+    'emi': 'Loan', 'loan': 'Loan', 'sip': 'Investment', 'mutual fund': 'Investment', 'zerodha': 'Investment',
+    'school': 'Education', 'tuition': 'Education', 'udemy': 'Education', 'atm': 'Cash', 'cash withdrawal': 'Cash'
+}
+
+MERCHANT_CATEGORIES_PATH = os.getenv("ZENITH_MERCHANT_CATEGORIES")
+CATEGORY_MODEL_PATH = os.getenv("ZENITH_CATEGORY_MODEL", "data/category_model.npz")
+# A model label is only used when it is this probable and enough of the description's trigrams were
+# seen in training; otherwise the description stays DEFAULT_CATEGORY
+CATEGORY_MIN_CONFIDENCE = float(os.getenv("ZENITH_CATEGORY_MIN_CONFIDENCE", "0.6"))
+CATEGORY_MIN_COVERAGE = 0.5
+CATEGORY_CACHE_SIZE = int(os.getenv("ZENITH_CATEGORY_CACHE", "200000"))
+# Trigrams are hashed into 2**HASH_BITS buckets; descriptions are scored on their first FEATURE_BYTES bytes
+HASH_BITS = 16
+FEATURE_BYTES = 48
+BATCH_SIZE = 8192
+
+
+def load_merchant_categories(path: Optional[str] = MERCHANT_CATEGORIES_PATH) -> Dict[str, str]:
+    """
+    Default keyword -> category dictionary, extended or overridden by a JSON file when configured.
+    """
+    categories = dict(DEFAULT_MERCHANT_CATEGORIES)
+    if path:
+        try:
+            with open(path, encoding="utf-8") as handle:
+                categories.update({str(k).lower(): str(v) for k, v in json.load(handle).items()})
+        except Exception as e:
+            logger.error("Failed to load merchant categories from %s: %s", path, str(e))
+    return categories
+
+
+class KeywordCategorizer:
+    """
+    Multi-keyword matcher over lower-cased descriptions; a keyword must start and end at a word
+    boundary, so "emi" matches "hdfc emi" but not "emirates". Uses an Aho–Corasick automaton when
+    pyahocorasick is installed and a compiled alternation regex otherwise, with the same result.
+    """
+
+    def __init__(self, keywords: Dict[str, str]):
+        self.keywords = {k.lower(): v for k, v in keywords.items() if k}
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword, category in self.keywords.items():
+                self._automaton.add_word(keyword, (len(keyword), category))
+            self._automaton.make_automaton()
+            self._pattern = None
+        else:
+            self._automaton = None
+            alternation = "|".join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+            # A zero-width match at every word start, capturing the longest keyword beginning there
+            self._pattern = re.compile(f"(?<![a-z])(?=({alternation})(?![a-z0-9]))")
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        Category of the longest keyword in `text` (the leftmost among equally long ones), or None.
+        """
+        if self._automaton is not None:
+            found = []
+            for end, (length, category) in self._automaton.iter(text):
+                start = end - length + 1
+                if start > 0 and text[start - 1].isalpha():
+                    continue
+                if end + 1 < len(text) and text[end + 1].isalnum():
+                    continue
+                found.append((length, -start, category))
+        else:
+            found = [(len(m.group(1)), -m.start(), self.keywords[m.group(1)]) for m in self._pattern.finditer(text)]
+        return max(found)[2] if found else None
+
+
+def normalize_descriptions(descriptions: pd.Series) -> pd.Series:
+    """
+    Lower-case and reduce to letters and single spaces, so "UPI/SWIGGY/88213" and "Swiggy 1142"
+    share one cache entry.
+    """
+    return (descriptions.fillna("").astype(str).str.lower()
+            .str.replace(r"[\W\d_]+", " ", regex=True)
+            .str.strip())
+
+
+def trigram_features(texts: List[str]) -> np.ndarray:
+    """
+    Hashed character trigrams of " " + text as an (n, FEATURE_BYTES - 2) array of bucket indices;
+    positions past the end of a text hold 2**HASH_BITS, the index of an all-zero weight row.
+    """
+    encoded = np.array([(" " + text).encode()[:FEATURE_BYTES] for text in texts], dtype=f"S{FEATURE_BYTES}")
+    raw = np.frombuffer(encoded.tobytes(), dtype=np.uint8).reshape(len(texts), FEATURE_BYTES).astype(np.uint32)
+    trigrams = (raw[:, :-2] << 16) | (raw[:, 1:-1] << 8) | raw[:, 2:]
+    buckets = ((trigrams * np.uint32(2654435761)) >> np.uint32(32 - HASH_BITS)).astype(np.int64)
+    return np.where(raw[:, 2:] > 0, buckets, 1 << HASH_BITS)
+
+
+class CategoryModel:
+    """
+    Multinomial naive Bayes over hashed trigrams: per-class log likelihoods with an extra zero row
+    for padding, plus which buckets were seen in training.
+    """
+
+    def __init__(self, classes: List[str], log_likelihood: np.ndarray, log_prior: np.ndarray, seen: np.ndarray):
+        self.classes = np.array(classes, dtype=object)
+        self.log_likelihood = log_likelihood.astype(np.float32)
+        self.log_prior = log_prior.astype(np.float32)
+        self.seen = seen.astype(bool)
+
+    @classmethod
+    def train(cls, texts: List[str], labels: List[str], alpha: float = 0.1) -> "CategoryModel":
+        classes = sorted(set(labels))
+        index = {label: i for i, label in enumerate(classes)}
+        features = trigram_features(texts)
+        rows = np.repeat([index[label] for label in labels], features.shape[1])
+        counts = np.zeros(((1 << HASH_BITS) + 1, len(classes)))
+        np.add.at(counts, (features.ravel(), rows), 1.0)
+        counts[-1] = 0.0
+        totals = counts.sum(axis=0)
+        log_likelihood = np.log((counts + alpha) / (totals + alpha * (1 << HASH_BITS)))
+        log_likelihood[-1] = 0.0
+        log_prior = np.log(np.bincount([index[label] for label in labels], minlength=len(classes)) / len(labels))
+        return cls(classes, log_likelihood, log_prior, counts.sum(axis=1) > 0)
+
+    @classmethod
+    def load(cls, path: str) -> "CategoryModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(list(data["classes"]), data["log_likelihood"], data["log_prior"], data["seen"])
+
+    def save(self, path: str):
+        np.savez(path, classes=self.classes.astype(str), log_likelihood=self.log_likelihood,
+                 log_prior=self.log_prior, seen=self.seen)
+
+    def predict(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Labels, probabilities and trigram coverage for a batch of normalized descriptions.
+        """
+        labels, confidence, coverage = [], [], []
+        for start in range(0, len(texts), BATCH_SIZE):
+            features = trigram_features(texts[start:start + BATCH_SIZE])
+            scores = self.log_likelihood[features].sum(axis=1) + self.log_prior
+            scores -= scores.max(axis=1, keepdims=True)
+            probabilities = np.exp(scores)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            present = features < (1 << HASH_BITS)
+            labels.append(self.classes[probabilities.argmax(axis=1)])
+            confidence.append(probabilities.max(axis=1))
+            coverage.append((self.seen[features] & present).sum(axis=1) / np.maximum(present.sum(axis=1), 1))
+        if not labels:
+            return np.array([], dtype=object), np.array([]), np.array([])
+        return np.concatenate(labels), np.concatenate(confidence), np.concatenate(coverage)
+
+
+class CategorizationEngine:
+    """
+    Cache, then merchant keywords, then the classifier; only distinct normalized descriptions are
+    labelled and the labels are broadcast back to every row.
+    """
+
+    def __init__(self, keywords: KeywordCategorizer, model: Optional[CategoryModel],
+                 cache_size: int = CATEGORY_CACHE_SIZE, default: str = DEFAULT_CATEGORY):
+        self.keywords = keywords
+        self.model = model
+        self.default = default
+        self.cache: LRUCache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+
+    def label(self, texts: List[str]) -> Dict[str, str]:
+        with self._lock:
+            cached = {text: self.cache[text] for text in texts if text in self.cache}
+        sources = {"cache": len(cached), "merchant": 0, "model": 0, "default": 0}
+        misses = [text for text in texts if text not in cached]
+        labels = {}
+        unmatched = []
+        for text in misses:
+            category = self.keywords.match(text) if text else None
+            if category is None:
+                unmatched.append(text)
+            else:
+                labels[text] = category
+        sources["merchant"] = len(labels)
+        if unmatched and self.model is not None:
+            predicted, confidence, coverage = self.model.predict(unmatched)
+            accepted = (confidence >= CATEGORY_MIN_CONFIDENCE) & (coverage >= CATEGORY_MIN_COVERAGE)
+            for text, category, ok in zip(unmatched, predicted, accepted):
+                labels[text] = category if ok else self.default
+            sources["model"] = int(accepted.sum())
+        else:
+            labels.update({text: self.default for text in unmatched})
+        sources["default"] = len(unmatched) - sources["model"]
+        with self._lock:
+            for text, category in labels.items():
+                self.cache[text] = category
+        metrics.inc("zenith_cache_requests_total", len(cached), cache="category", result="hit")
+        metrics.inc("zenith_cache_requests_total", len(misses), cache="category", result="miss")
+        for source, count in sources.items():
+            if count:
+                metrics.inc("zenith_categorized_total", count, source=source)
+        labels.update(cached)
+        return labels
+
+    def categorize(self, descriptions: pd.Series) -> pd.Series:
+        with timed("categorize"):
+            codes, uniques = pd.factorize(descriptions, use_na_sentinel=False)
+            normalized = normalize_descriptions(pd.Series(uniques, dtype=object)).tolist()
+            labels = self.label(list(dict.fromkeys(normalized)))
+            unique_labels = np.array([labels[text] for text in normalized], dtype=object)
+            return pd.Series(unique_labels[codes], index=descriptions.index)
+
+
+def train_from_keywords(keywords: Dict[str, str]) -> CategoryModel:
+    return CategoryModel.train(list(keywords), list(keywords.values()))
+
+
+_engine: Optional[CategorizationEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> CategorizationEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            keywords = load_merchant_categories()
+            model = None
+            if os.path.exists(CATEGORY_MODEL_PATH):
+                try:
+                    model = CategoryModel.load(CATEGORY_MODEL_PATH)
+                    logger.info("Loaded category model from %s (%d classes)", CATEGORY_MODEL_PATH, len(model.classes))
+                except (OSError, ValueError, KeyError) as e:
+                    logger.error("Ignoring unreadable category model %s: %s", CATEGORY_MODEL_PATH, str(e))
+            _engine = CategorizationEngine(KeywordCategorizer(keywords), model or train_from_keywords(keywords))
+        return _engine
+
+
+def categorize_descriptions(descriptions: pd.Series) -> pd.Series:
+    return get_engine().categorize(descriptions)
+
+
+def fill_categories(categories: pd.Series, descriptions: pd.Series) -> pd.Series:
+    """
+    Categorize the rows whose category is missing, empty or DEFAULT_CATEGORY from their description.
+    """
+    missing = categories.isna() | categories.astype(str).str.strip().isin(["", DEFAULT_CATEGORY, "nan", "None"])
+    missing &= descriptions.notna()
+    if not missing.any():
+        return categories
+    filled = categories.astype(object).copy()
+    filled[missing] = categorize_descriptions(descriptions[missing])
+    return filled
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", nargs="+", required=True, metavar="CSV",
+                        help="labelled CSVs with description and category columns")
+    parser.add_argument("--output", default=CATEGORY_MODEL_PATH)
+    args = parser.parse_args()
+    frames = [pd.read_csv(path, usecols=["description", "category"]).dropna() for path in args.train]
+    labelled = pd.concat(frames, ignore_index=True)
+    keywords = load_merchant_categories()
+    texts = normalize_descriptions(labelled["description"]).tolist() + list(keywords)
+    labels = labelled["category"].astype(str).tolist() + list(keywords.values())
+    model = CategoryModel.train(texts, labels)
+    model.save(args.output)
+    logger.info("Saved category model %s: %d classes from %d examples", args.output, len(model.classes), len(texts))
+
+
+if __name__ == "__main__":
+    main()
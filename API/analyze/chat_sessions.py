@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from cachetools import TTLCache
+from models import FinancialData
+import metrics
+from metrics import timed
+from analyze.rule_based import analyze_savings
+from analyze.planner import goal_feasibility, build_action_plan
+from analyze.investment_forecast import forecast_expenses
+from analyze.transaction_store import STORE_PATH
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sessions are stored in SQLite (the transaction store's file by default), so any worker can serve
+# the next turn of a conversation; they expire CHAT_SESSION_TTL seconds after their last turn
+CHAT_SESSIONS_PATH = os.getenv("ZENITH_CHAT_SESSIONS_PATH", STORE_PATH)
+CHAT_SESSION_TTL = int(os.getenv("ZENITH_CHAT_SESSION_TTL", "3600"))
+# Per-worker locks serializing turns of the same session
+CHAT_SESSION_MAX = int(os.getenv("ZENITH_CHAT_SESSIONS", "1000"))
+# Previous turns replayed into the prompt, and the character budget for the whole context
+CHAT_HISTORY_TURNS = 3
+CHAT_CONTEXT_CHARS = 1500
+
+
+class ChatSession:
+    """
+    Everything a chat turn needs from earlier turns: fingerprints of the inputs the context was
+    computed from, the computed analysis and forecast, their compact text summaries and recent turns.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.fingerprints: Dict[str, str] = {}
+        self.analysis: Optional[dict] = None
+        self.forecast: Optional[dict] = None
+        self.summaries: Dict[str, str] = {}
+        self.history: List[Tuple[str, str]] = []
+        self.updated_at = time.time()
+
+    def context(self) -> str:
+        parts = [self.summaries[key] for key in ("analysis", "forecast") if key in self.summaries]
+        for question, answer in self.history[-CHAT_HISTORY_TURNS:]:
+            parts.append(f"Earlier: Q: {question} A: {answer[:200]}")
+        return " ".join(parts)[-CHAT_CONTEXT_CHARS:]
+
+    def remember(self, question: str, answer: str):
+        self.history = (self.history + [(question, answer)])[-CHAT_HISTORY_TURNS:]
+        self.updated_at = time.time()
+
+    def to_json(self) -> str:
+        return json.dumps({"fingerprints": self.fingerprints, "analysis": self.analysis, "forecast": self.forecast,
+                           "summaries": self.summaries, "history": self.history}, default=str)
+
+    @classmethod
+    def from_json(cls, session_id: str, state: str, updated_at: float) -> "ChatSession":
+        session = cls(session_id)
+        values = json.loads(state)
+        session.fingerprints = values["fingerprints"]
+        session.analysis = values["analysis"]
+        session.forecast = values["forecast"]
+        session.summaries = values["summaries"]
+        session.history = [tuple(turn) for turn in values["history"]]
+        session.updated_at = updated_at
+        return session
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    session_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_sessions_updated ON chat_sessions (updated_at);
+"""
+
+
+class SessionStore:
+    """
+    Chat sessions as one JSON row each. Loaded at the start of every turn and saved at its end, so
+    consecutive turns may land on different workers; expired rows are purged on save.
+    """
+
+    def __init__(self, path: str = CHAT_SESSIONS_PATH, ttl: float = CHAT_SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._saves = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def load(self, session_id: Optional[str] = None) -> ChatSession:
+        """
+        The stored session for `session_id`, or a new one when it is missing or has expired.
+        """
+        row = None
+        if session_id:
+            row = self._connection().execute(
+                "SELECT state, updated_at FROM chat_sessions WHERE session_id = ? AND updated_at > ?",
+                (session_id, time.time() - self.ttl)
+            ).fetchone()
+        metrics.record_cache("chat_session", row is not None)
+        return ChatSession.from_json(session_id, *row) if row else ChatSession(uuid.uuid4().hex)
+
+    def save(self, session: ChatSession):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO chat_sessions (session_id, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (session.session_id, session.to_json(), session.updated_at)
+            )
+            self._saves += 1
+            if self._saves % 100 == 0:
+                conn.execute("DELETE FROM chat_sessions WHERE updated_at <= ?", (time.time() - self.ttl,))
+
+    def count(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM chat_sessions WHERE updated_at > ?", (time.time() - self.ttl,)
+        ).fetchone()[0]
+
+
+store = SessionStore()
+_locks: TTLCache = TTLCache(maxsize=CHAT_SESSION_MAX, ttl=CHAT_SESSION_TTL)
+_locks_lock = threading.Lock()
+
+
+def session_lock(session_id: Optional[str]) -> asyncio.Lock:
+    """
+    Lock serializing this worker's turns of one session (a new session needs none).
+    """
+    if not session_id:
+        return asyncio.Lock()
+    with _locks_lock:
+        lock = _locks.get(session_id)
+        if lock is None:
+            lock = _locks[session_id] = asyncio.Lock()
+        return lock
+
+
+def fingerprint(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def input_fingerprints(data: FinancialData) -> Dict[str, str]:
+    """
+    One fingerprint per independently recomputable part: the savings profile feeds the analysis,
+    the transactions (and their currency) feed the forecast.
+    """
+    profile = data.model_dump(exclude={"transactions"})
+    transactions = [(t.date, t.amount, t.category, t.currency, t.description) for t in data.transactions or []]
+    return {"analysis": fingerprint(profile), "forecast": fingerprint([data.currency, transactions])}
+
+
+def build_analysis(data: FinancialData) -> dict:
+    """
+    Deterministic savings analysis for chat context: the rule-based figures, goal feasibility and
+    action plan of /analyze/, without its LLM advice, chart or lookups.
+    """
+    rule = analyze_savings(data.income, data.expenses, data.spending_categories)
+    feasibility = [{"goal": goal.description,
+                    "feasibility": goal_feasibility(data.income, data.expenses, data.duration_months, goal.cost)}
+                   for goal in data.goals]
+    steps = build_action_plan(data.income, data.expenses, rule["monthly_savings"], data.spending_categories)
+    return {"analysis": rule, "goal_feasibility": feasibility, "step_by_step_plan": steps}
+
+
+def summarize_analysis(analysis: dict, data: FinancialData) -> str:
+    rule = analysis["analysis"]
+    goals = "; ".join(f"{item['goal']}: {item['feasibility']['feasibility']}" for item in analysis["goal_feasibility"])
+    top = sorted(rule["category_insights"].items(), key=lambda item: -item[1]["amount"])[:3]
+    categories = ", ".join(f"{category} {info['percentage']}%" for category, info in top)
+    return (f"Income {data.income:,.2f} {data.currency}, expenses {data.expenses:,.2f}, "
+            f"savings {rule['monthly_savings']:,.2f}/month ({rule['saving_ratio']}%, grade {rule['grade']}). "
+            + (f"Top categories: {categories}. " if categories else "")
+            + (f"Goals: {goals}. " if goals else "")
+            + " ".join(analysis["step_by_step_plan"][2:])).strip()
+
+
+def summarize_forecast(forecast: dict, currency: str) -> str:
+    return f"Forecast: {forecast['1_month']:,.2f} {currency} next month, {forecast['1_year']:,.2f} {currency} over 1 year."
+
+
+async def refresh(session: ChatSession, data: Optional[FinancialData], wants_forecast: bool) -> Set[str]:
+    """
+    Bring the session context up to date with `data` and return the parts that were recomputed.
+    Parts whose inputs are unchanged are reused; the forecast is only computed once a question asks
+    for it (and then kept in step with the transactions).
+    """
+    recomputed = set()
+    if data is None:
+        return recomputed
+    prints = input_fingerprints(data)
+    if session.analysis is None or prints["analysis"] != session.fingerprints.get("analysis"):
+        async with timed("chat_context"):
+            session.analysis = await asyncio.to_thread(build_analysis, data)
+        session.summaries["analysis"] = summarize_analysis(session.analysis, data)
+        session.fingerprints["analysis"] = prints["analysis"]
+        recomputed.add("analysis")
+
+    if prints["forecast"] != session.fingerprints.get("forecast"):
+        # Stale forecast: drop it now, recompute when it is next asked about
+        session.forecast = None
+        session.summaries.pop("forecast", None)
+        session.fingerprints["forecast"] = prints["forecast"]
+    if wants_forecast and session.forecast is None and len(data.transactions or []) >= 6:
+        session.forecast = await forecast_expenses(data.transactions, data.currency or "INR", "en")
+        session.summaries["forecast"] = summarize_forecast(session.forecast, data.currency or "INR")
+        recomputed.add("forecast")
+    for part in recomputed:
+        metrics.inc("zenith_chat_context_recomputed_total", part=part)
+    return recomputed
@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import importlib.util
+from functools import lru_cache
+from statistics import NormalDist
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Selection policy written by `python -m benchmarks.backtest --policy ...`; without one every
+# forecast uses DEFAULT_ENGINE
+FORECAST_POLICY_PATH = os.getenv("ZENITH_FORECAST_POLICY", "forecast_policy.json")
+DEFAULT_ENGINE = os.getenv("ZENITH_FORECAST_ENGINE", "prophet")
+# Months every API forecast covers; a policy backtested on another horizon is not used
+FORECAST_HORIZON = 12
+INTERVAL_WIDTH = 0.95
+
+
+def _future(history: pd.DataFrame, yhat: np.ndarray, spread: np.ndarray) -> pd.DataFrame:
+    start = history['ds'].max() + pd.offsets.MonthBegin(1)
+    return pd.DataFrame({
+        "ds": pd.date_range(start, periods=len(yhat), freq="MS"),
+        "yhat": yhat,
+        "yhat_lower": yhat - spread,
+        "yhat_upper": yhat + spread
+    })
+
+
+def _spread(residuals: np.ndarray, horizon: int, interval_width: float) -> np.ndarray:
+    """
+    Interval half-width from in-sample one-step residuals, growing with sqrt(h) like a random walk.
+    """
+    residuals = residuals[np.isfinite(residuals)]
+    sigma = float(np.std(residuals)) if len(residuals) > 1 else 0.0
+    z = NormalDist().inv_cdf((1 + interval_width) / 2)
+    return z * sigma * np.sqrt(np.arange(1, horizon + 1))
+
+
+def naive(history: pd.DataFrame, horizon: int, interval_width: float = INTERVAL_WIDTH) -> pd.DataFrame:
+    y = history['y'].to_numpy(dtype=float)
+    return _future(history, np.full(horizon, y[-1]), _spread(np.diff(y), horizon, interval_width))
+
+
+def seasonal_naive(history: pd.DataFrame, horizon: int, season: int = 12,
+                   interval_width: float = INTERVAL_WIDTH) -> pd.DataFrame:
+    """
+    Same month last year; falls back to the naive forecast with less than one full season.
+    """
+    y = history['y'].to_numpy(dtype=float)
+    if len(y) < season:
+        return naive(history, horizon, interval_width)
+    last_season = y[-season:]
+    yhat = np.array([last_season[h % season] for h in range(horizon)])
+    spread = _spread(y[season:] - y[:-season], horizon, interval_width) if len(y) > season + 1 else \
+        _spread(np.diff(y), horizon, interval_width)
+    return _future(history, yhat, spread)
+
+
+def trailing_mean(history: pd.DataFrame, horizon: int, window: int = 12,
+                  interval_width: float = INTERVAL_WIDTH) -> pd.DataFrame:
+    y = history['y'].to_numpy(dtype=float)
+    recent = y[-window:]
+    z = NormalDist().inv_cdf((1 + interval_width) / 2)
+    spread = np.full(horizon, z * float(np.std(recent)) if len(recent) > 1 else 0.0)
+    return _future(history, np.full(horizon, recent.mean()), spread)
+
+
+def holt(history: pd.DataFrame, horizon: int, alpha: float = 0.4, beta: float = 0.1, damping: float = 0.9,
+         interval_width: float = INTERVAL_WIDTH) -> pd.DataFrame:
+    """
+    Damped-trend exponential smoothing (Holt), a handful of float operations per month.
+    """
+    y = history['y'].to_numpy(dtype=float)
+    level, trend = y[0], 0.0
+    residuals = np.empty(len(y) - 1)
+    for t in range(1, len(y)):
+        predicted = level + damping * trend
+        residuals[t - 1] = y[t] - predicted
+        new_level = alpha * y[t] + (1 - alpha) * predicted
+        trend = beta * (new_level - level) + (1 - beta) * damping * trend
+        level = new_level
+    damped = np.cumsum(damping ** np.arange(1, horizon + 1))
+    yhat = np.maximum(level + damped * trend, 0.0)
+    return _future(history, yhat, _spread(residuals, horizon, interval_width))
+
+
+def prophet(history: pd.DataFrame, horizon: int, yearly_seasonality: bool = True, weekly_seasonality: bool = True,
+            interval_width: float = INTERVAL_WIDTH) -> pd.DataFrame:
+    from prophet import Prophet
+    model = Prophet(yearly_seasonality=yearly_seasonality, weekly_seasonality=weekly_seasonality,
+                    daily_seasonality=False, interval_width=interval_width)
+    model.fit(history[['ds', 'y']])
+    future = model.make_future_dataframe(periods=horizon, freq="MS")
+    forecast = model.predict(future)
+    return forecast[forecast['ds'] > history['ds'].max()][['ds', 'yhat', 'yhat_lower', 'yhat_upper']] \
+        .head(horizon).reset_index(drop=True)
+
+
+# name -> (function, settings); "prophet" is the configuration the forecaster has always used
+ENGINES: Dict[str, Tuple[Callable[..., pd.DataFrame], dict]] = {
+    "naive": (naive, {}),
+    "seasonal_naive": (seasonal_naive, {}),
+    "mean_12": (trailing_mean, {"window": 12}),
+    "mean_3": (trailing_mean, {"window": 3}),
+    "holt": (holt, {}),
+    "prophet_yearly": (prophet, {"yearly_seasonality": True, "weekly_seasonality": False}),
+    "prophet": (prophet, {"yearly_seasonality": True, "weekly_seasonality": True}),
+}
+
+
+@lru_cache(maxsize=1)
+def available_engines() -> Tuple[str, ...]:
+    has_prophet = "prophet" in sys.modules or importlib.util.find_spec("prophet") is not None
+    return tuple(name for name, (fn, _) in ENGINES.items() if fn is not prophet or has_prophet)
+
+
+def preload():
+    """
+    Import the Prophet/Stan backend now rather than on the first forecast, so a preloading parent
+    process shares it with the workers it forks.
+    """
+    if "prophet" in available_engines():
+        import prophet  # noqa: F401
+
+
+def run_engine(name: str, history: pd.DataFrame, horizon: int = 12) -> pd.DataFrame:
+    """
+    Forecast `horizon` months after a monthly (ds, y) history. Returns only the future rows with
+    ds, yhat, yhat_lower and yhat_upper.
+    """
+    fn, settings = ENGINES[name]
+    return fn(history, horizon, **settings)
+
+
+_policy: Optional[dict] = None
+_policy_version: Optional[tuple] = None
+
+
+def load_policy(path: str = FORECAST_POLICY_PATH) -> Optional[dict]:
+    """
+    Read the selection policy, re-reading it when the file changes. A missing or unreadable file,
+    or one backtested on a horizon other than FORECAST_HORIZON, means no policy.
+    """
+    global _policy, _policy_version
+    try:
+        version = (path, os.path.getmtime(path))
+    except OSError:
+        _policy, _policy_version = None, None
+        return None
+    if version != _policy_version:
+        try:
+            with open(path, encoding="utf-8") as handle:
+                _policy = json.load(handle)
+            if _policy.get("horizon") != FORECAST_HORIZON:
+                logger.error("Ignoring forecast policy %s: backtested on a %s-month horizon, forecasts cover %d",
+                             path, _policy.get("horizon"), FORECAST_HORIZON)
+                _policy = None
+            else:
+                logger.info("Loaded forecast policy from %s (%d rules)", path, len(_policy.get("rules", [])))
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error("Ignoring unreadable forecast policy %s: %s", path, str(e))
+            _policy = None
+        _policy_version = version
+    return _policy
+
+
+def select_engine(history_months: int, policy: Optional[dict] = None) -> str:
+    """
+    Engine the policy picked for this history length, or DEFAULT_ENGINE when there is no matching
+    rule or the chosen engine is not installed here.
+    """
+    policy = policy if policy is not None else load_policy()
+    for rule in (policy or {}).get("rules", []):
+        if rule["min_months"] <= history_months and (rule.get("max_months") is None or history_months <= rule["max_months"]):
+            if rule["engine"] in available_engines():
+                return rule["engine"]
+            logger.warning("Forecast policy engine %s is not available, using %s", rule["engine"], DEFAULT_ENGINE)
+            break
+    return DEFAULT_ENGINE
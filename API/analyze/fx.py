@@ -0,0 +1,122 @@
+import os
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+import logging
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = "INR"
+# CSV of date,currency,rate with rate = units of currency per 1 INR from that date on
+FX_RATES_PATH = os.getenv("ZENITH_FX_RATES", "data/fx_rates.csv")
+# Used when the rate file is missing
+DEFAULT_RATES = {"USD": 0.012, "EUR": 0.011, "GBP": 0.0095}
+
+
+class RateTable:
+    """
+    Dated rates per currency as sorted datetime64 / float64 arrays, so the rate in effect for a
+    whole column of dates is one searchsorted per currency. Dates before a currency's first row use
+    that first rate; a missing date (NaT) is rejected rather than priced at the latest rate.
+    """
+
+    def __init__(self, rates: pd.DataFrame):
+        self._series: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for currency, group in rates.groupby("currency"):
+            group = group.sort_values("date")
+            self._series[str(currency).upper()] = (group["date"].to_numpy(dtype="datetime64[D]"),
+                                                   group["rate"].to_numpy(dtype="float64"))
+
+    @classmethod
+    def load(cls, path: str = FX_RATES_PATH) -> "RateTable":
+        try:
+            rates = pd.read_csv(path, comment="#", parse_dates=["date"])
+            logger.info("Loaded %d FX rates from %s", len(rates), path)
+        except FileNotFoundError:
+            logger.warning("FX rate file %s not found, using built-in rates", path)
+            rates = pd.DataFrame({"date": pd.Timestamp("2000-01-01"), "currency": list(DEFAULT_RATES),
+                                  "rate": list(DEFAULT_RATES.values())})
+        return cls(rates)
+
+    def currencies(self):
+        return {BASE_CURRENCY, *self._series}
+
+    def rates(self, currency: str, dates: np.ndarray) -> np.ndarray:
+        """
+        Units of `currency` per INR in effect on each of `dates` (datetime64 array).
+        """
+        if currency == BASE_CURRENCY:
+            return np.ones(len(dates))
+        if currency not in self._series:
+            raise HTTPException(status_code=400, detail=f"Unsupported currency: {currency}")
+        days, values = self._series[currency]
+        dates = dates.astype("datetime64[D]")
+        missing = np.isnat(dates)
+        if missing.any():
+            raise HTTPException(status_code=400,
+                                detail=f"Cannot convert {int(missing.sum())} {currency} amounts without a valid date")
+        index = np.searchsorted(days, dates, side="right") - 1
+        return values[np.clip(index, 0, None)]
+
+
+@lru_cache(maxsize=1)
+def get_table() -> RateTable:
+    return RateTable.load()
+
+
+def reload():
+    get_table.cache_clear()
+    pair_rate.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def pair_rate(from_currency: str, to_currency: str, period: Optional[str] = None) -> float:
+    """
+    Multiplier from one currency to another for a period ("YYYY-MM" or "YYYY-MM-DD", using the rate
+    in effect on its first day), or at the latest rates when period is None.
+    """
+    from_currency, to_currency = from_currency.upper(), to_currency.upper()
+    if from_currency == to_currency:
+        return 1.0
+    day = np.array([np.datetime64(period, "D") if period else np.datetime64("9999-12-31")])
+    table = get_table()
+    return float(table.rates(to_currency, day)[0] / table.rates(from_currency, day)[0])
+
+
+def convert(amount: float, from_currency: str, to_currency: str, period: Optional[str] = None) -> float:
+    return amount * pair_rate(from_currency, to_currency, period)
+
+
+def convert_column(amounts, currencies, dates, to_currency: str = BASE_CURRENCY) -> np.ndarray:
+    """
+    Convert a column of amounts in mixed currencies at each row's own date: rows are grouped by
+    currency and every group is priced with one vectorized lookup.
+    """
+    amounts = np.asarray(amounts, dtype="float64")
+    currencies = pd.Series(currencies, dtype="object").fillna(BASE_CURRENCY).str.upper().to_numpy()
+    dates = pd.to_datetime(pd.Series(dates), errors="coerce", format="mixed").to_numpy(dtype="datetime64[D]")
+    table = get_table()
+    codes, uniques = pd.factorize(currencies)
+    to_rates = table.rates(to_currency.upper(), dates)
+    from_rates = np.empty(len(amounts))
+    for code, currency in enumerate(uniques):
+        rows = codes == code
+        from_rates[rows] = table.rates(currency, dates[rows])
+    return amounts * to_rates / from_rates
+
+
+def normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bring a date/amount/category(/currency) frame to INR amounts and drop the currency column.
+    Frames without a currency column are taken to be in INR already.
+    """
+    if "currency" not in frame.columns:
+        return frame
+    currencies = frame["currency"]
+    if currencies.isna().all() or (currencies.fillna(BASE_CURRENCY).str.upper() == BASE_CURRENCY).all():
+        return frame.drop(columns="currency")
+    normalized = frame.drop(columns="currency")
+    normalized["amount"] = convert_column(frame["amount"], currencies, frame["date"])
+    return normalized
@@ -2,8 +2,9 @@ import google.generativeai as genai
 from fastapi import HTTPException
 import logging
 import asyncio
+from metrics import timed
+from admission import llm_admission
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 def configure_gemini():
@@ -13,16 +14,19 @@ def configure_gemini():
         raise HTTPException(status_code=500, detail="Gemini API key not configured")
     genai.configure(api_key=api_key)
 
-async def ask_gemini(prompt: str, max_tokens: int = 300) -> str:
+async def ask_gemini(prompt: str, max_tokens: int = 300, timeout: float = 30.0) -> str:
     try:
         configure_gemini()
         model = genai.GenerativeModel('gemini-2.0-flash')
-        response = await asyncio.wait_for(
-            asyncio.to_thread(model.generate_content, prompt, generation_config={"max_output_tokens": max_tokens}),
-            timeout=30.0
-        )
+        async with llm_admission.admit(), timed("gemini"):
+            response = await asyncio.wait_for(
+                asyncio.to_thread(model.generate_content, prompt, generation_config={"max_output_tokens": max_tokens}),
+                timeout=timeout
+            )
         logger.debug("Gemini response: %s", response.text)
         return response.text.strip()
+    except HTTPException:
+        raise
     except asyncio.TimeoutError:
         logger.error("Gemini API call timed out")
         raise HTTPException(status_code=504, detail="Gemini API call timed out")
@@ -1,11 +1,13 @@
-from transformers import pipeline
+from transformers import pipeline, StoppingCriteria, StoppingCriteriaList
 from fastapi import HTTPException
 from cachetools import TTLCache
 import logging
 import asyncio
-from analyze.gemini_ai import ask_gemini
+import threading
+from metrics import timed, record_cache
+from admission import cpu_admission
+from cancellation import current_token
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 cache = TTLCache(maxsize=100, ttl=3600)
@@ -26,34 +28,58 @@ def get_pipeline(model_name: str):
         preload_model(model_name)
     return _pipelines[model_name]
 
+class StopWhenAbandoned(StoppingCriteria):
+    """
+    Ends generation at the next token once the caller stopped waiting for it (timeout, lost hedge
+    race) or the request it serves was cancelled.
+    """
+
+    def __init__(self, stop: threading.Event):
+        self.stop = stop
+        self.token = current_token()
+        self.steps = 0
+
+    def __call__(self, input_ids, scores, **kwargs):
+        self.steps += 1
+        # A plain bool is combined with the per-sequence done flags by StoppingCriteriaList
+        return self.stop.is_set() or (self.token is not None and self.token.cancelled)
+
+async def generate_local(prompt: str, max_tokens: int = 300, timeout: float = 60.0, model_name: str = "distilgpt2") -> str:
+    """
+    Generate with a local Hugging Face pipeline on a worker thread. The thread cannot be killed, so a
+    caller that gives up signals it to stop generating instead.
+    """
+    generator = get_pipeline(model_name)
+    stop = threading.Event()
+    criteria = StopWhenAbandoned(stop)
+    try:
+        async with cpu_admission.admit(), timed(f"hf_{model_name}"):
+            result = await asyncio.wait_for(asyncio.to_thread(
+                generator, prompt, max_length=max_tokens, num_return_sequences=1, do_sample=True, top_p=0.9,
+                stopping_criteria=StoppingCriteriaList([criteria])
+            ), timeout)
+    except BaseException:
+        stop.set()
+        logger.debug("Stopping abandoned %s generation after %d tokens", model_name, criteria.steps)
+        raise
+    text = result[0]['generated_text']
+    return text.replace(prompt, "").strip() if prompt in text else text.strip()
+
 async def get_advice_from_prompt(prompt: str, max_length: int = 300, model_name: str = "distilgpt2") -> str:
+    # Imported here: the router imports generate_local from this module
+    from analyze.llm_router import router
+
     if not prompt:
         raise HTTPException(status_code=400, detail="Prompt cannot be empty")
     
     cache_key = f"{model_name}:{prompt}"
+    record_cache("advice", cache_key in cache)
     if cache_key in cache:
         logger.debug("Returning cached advice for prompt")
         return cache[cache_key]
     
-    try:
-        logger.debug("Attempting Gemini AI for prompt")
-        advice = await ask_gemini(prompt, max_tokens=max_length)
-        cache[cache_key] = advice
-        logger.debug("Gemini advice: %s", advice)
-        return advice
-    except Exception as e:
-        logger.warning("Gemini AI failed: %s", str(e))
-    
-    try:
-        logger.debug("Falling back to Hugging Face model %s", model_name)
-        generator = get_pipeline(model_name)
-        result = await asyncio.to_thread(
-            generator, prompt, max_length=max_length, num_return_sequences=1, do_sample=True, top_p=0.9
-        )
-        advice = result[0]['generated_text'].replace(prompt, "").strip() if prompt in result[0]['generated_text'] else result[0]['generated_text'].strip()
-        cache[cache_key] = advice
-        logger.debug("Hugging Face advice: %s", advice)
-        return advice
-    except Exception as e:
-        logger.error("Hugging Face model %s failed: %s", model_name, str(e))
-        raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
\ No newline at end of file
+    result = await router.generate(prompt, max_tokens=max_length)
+    if result.provider != "template":
+        cache[cache_key] = result.text
+    logger.debug("Advice from %s: %s", result.provider, result.text)
+    return result.text
@@ -1,37 +1,35 @@
-from prophet import Prophet
+import asyncio
 import pandas as pd
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
 from fastapi import HTTPException
 from cachetools import TTLCache
 import logging
+from log_config import Lazy
 import numpy as np
-from typing import List
-from models import Transaction
-from analyze.huggingface_ai import get_advice_from_prompt
-from analyze.gemini_ai import ask_gemini
-from googletrans import Translator
+from analyze.transaction_parser import Transactions, to_frame
+from analyze import fx
+from analyze.narrative import forecast_narrative, has_templates
+from analyze.translation import translate
+from analyze.transaction_store import load_monthly_totals, data_version
+from analyze.forecast_engines import FORECAST_HORIZON, run_engine, select_engine
+import metrics
+from metrics import timed, record_cache
+from admission import cpu_admission
+from cancellation import checkpoint, RequestCancelled
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-cache = TTLCache(maxsize=100, ttl=3600)
-translator = Translator()
+cache = TTLCache(maxsize=1000, ttl=3600)
 
-def convert_currency(amount: float, from_currency: str, to_currency: str) -> float:
-    rates = {"INR": 1.0, "USD": 0.012, "EUR": 0.011, "GBP": 0.0095}
-    if from_currency not in rates or to_currency not in rates:
-        raise HTTPException(status_code=400, detail="Unsupported currency")
-    return amount * rates[to_currency] / rates[from_currency]
+# Result key -> months ahead summed into it
+HORIZONS = {"1_month": 1, "3_months": 3, "6_months": 6, "9_months": 9, "1_year": 12}
 
-def aggregate_transactions(transactions: List[Transaction]) -> pd.DataFrame:
+def aggregate_transactions(transactions: Transactions) -> pd.DataFrame:
     try:
-        df = pd.DataFrame([
-            {"ds": datetime.strptime(t.date, "%Y-%m-%d"), "y": t.amount, "category": t.category}
-            for t in transactions
-        ])
-        monthly = df.groupby(pd.Grouper(key='ds', freq='MS'))['y'].sum().reset_index()
-        logger.debug("Aggregated to %d monthly data points: %s", len(monthly), monthly.to_dict('records'))
+        with timed("aggregate"):
+            frame = to_frame(transactions)
+            df = pd.DataFrame({"ds": pd.to_datetime(frame["date"], format="%Y-%m-%d"), "y": frame["amount"]})
+            monthly = df.groupby(pd.Grouper(key='ds', freq='MS'))['y'].sum().reset_index()
+        logger.debug("Aggregated %d transactions to %d monthly data points", len(transactions), len(monthly))
         return monthly
     except Exception as e:
         logger.error("Transaction aggregation failed: %s", str(e))
@@ -49,7 +47,7 @@ def detect_anomalies(df: pd.DataFrame) -> pd.DataFrame:
         
         if df['is_anomaly'].any():
             removed = df[df['is_anomaly']][['ds', 'y']]
-            logger.debug("Removed %d anomalies: %s", len(removed), removed.to_dict('records'))
+            logger.debug("Removed %d anomalies: %s", len(removed), Lazy(lambda: removed.to_dict('records')))
             df_clean = df[~df['is_anomaly']][['ds', 'y']]
         else:
             logger.debug("No anomalies detected")
@@ -64,115 +62,116 @@ def detect_anomalies(df: pd.DataFrame) -> pd.DataFrame:
         logger.error("Anomaly detection failed: %s", str(e))
         return df[['ds', 'y']]
 
-async def forecast_expenses(transactions: List[Transaction], currency: str = "INR", language: str = "en") -> dict:
+async def forecast_expenses(transactions: Transactions, currency: str = "INR", language: str = "en") -> dict:
     logger.debug("Starting forecast_expenses with %d transactions", len(transactions))
-    if len(transactions) > 1000:
-        transactions = transactions[-1000:]
+    frame = to_frame(transactions)
+    if len(frame) > 1000:
+        frame = frame.iloc[-1000:]
         logger.debug("Limited transactions to 1000")
 
-    cache_key = f"forecast:{hash(str([(t.date, t.amount, t.category) for t in transactions]))}:{language}"
+    # Fits are cached in INR; conversion and narration happen per request, so one fit serves every
+    # currency and language
+    cache_key = f"forecast:{int(pd.util.hash_pandas_object(frame, index=False).sum())}"
+    record_cache("forecast", cache_key in cache)
     if cache_key in cache:
         logger.debug("Returning cached forecast")
-        forecast = cache[cache_key]
-        return {k: round(convert_currency(v, "INR", currency), 2) if k != "confidence_intervals" and k != "narrative" else v
-                for k, v in forecast.items()}
+        return await render_forecast(cache[cache_key], currency, language)
 
-    if len(transactions) < 6:
+    if len(frame) < 6:
         raise HTTPException(status_code=400, detail="At least 6 transactions required")
 
+    fit = await forecast_monthly(aggregate_transactions(frame), cache_key)
+    return await render_forecast(fit, currency, language)
+
+async def forecast_user_expenses(user_id: str, currency: str = "INR", language: str = "en", months: int = 36) -> dict:
+    """
+    Forecast from the stored monthly rollups of a user instead of re-parsing uploaded transactions.
+    """
+    cache_key = f"forecast:user:{user_id}:v{data_version(user_id)}:{months}"
+    record_cache("forecast", cache_key in cache)
+    if cache_key in cache:
+        logger.debug("Returning cached forecast for user %s", user_id)
+        return await render_forecast(cache[cache_key], currency, language)
+    monthly = load_monthly_totals(user_id, months)
+    if len(monthly) < 3:
+        raise HTTPException(status_code=400, detail="Insufficient stored history for forecasting (less than 3 months)")
+    fit = await forecast_monthly(monthly, cache_key)
+    return await render_forecast(fit, currency, language)
+
+def fit_engine(engine: str, df: pd.DataFrame) -> pd.DataFrame:
+    # The request may have been abandoned while this waited for a thread
+    checkpoint()
+    return run_engine(engine, df, horizon=FORECAST_HORIZON)
+
+async def forecast_monthly(df: pd.DataFrame, cache_key: str) -> dict:
+    """
+    Fit the selected engine on INR monthly totals and cache what rendering needs: the cleaned
+    history, the next 12 months and the horizon totals with their intervals.
+    """
     try:
-        df = aggregate_transactions(transactions)
-        df = detect_anomalies(df)
+        observed_months = len(df)
+        with timed("anomaly_detection"):
+            df = detect_anomalies(df)
         if len(df) < 3:
             raise HTTPException(status_code=400, detail="Insufficient data for forecasting (less than 3 monthly data points)")
-        logger.debug("Processed transaction data: %s", df.to_dict())
+        logger.debug("Processed %d monthly data points", len(df))
     except Exception as e:
         logger.error("Data processing failed: %s", str(e))
         raise HTTPException(status_code=400, detail=f"Data processing failed: {str(e)}")
 
-    try:
-        model = Prophet(yearly_seasonality=True, weekly_seasonality=True, daily_seasonality=False,
-                        interval_width=0.95)
-        model.fit(df)
-        future = model.make_future_dataframe(periods=12, freq="MS")
-        forecast = model.predict(future)
-        logger.debug("Prophet forecast completed")
-    except Exception as e:
-        logger.error("Prophet model failed: %s", str(e))
-        raise HTTPException(status_code=500, detail=f"Prophet model failed: {str(e)}")
-
-    def get_prophet_total(months: int) -> tuple:
+    engine = select_engine(len(df))
+    metrics.inc("zenith_forecast_engine_total", engine=engine)
+    async with cpu_admission.admit():
         try:
-            end_date = df['ds'].max() + relativedelta(months=months)
-            forecast_cutoff = forecast[forecast['ds'] <= end_date]
-            recent_forecast = forecast_cutoff.tail(months)
-            total = float(recent_forecast['yhat'].sum())
-            ci_lower = float(recent_forecast['yhat_lower'].sum())
-            ci_upper = float(recent_forecast['yhat_upper'].sum())
-            return total, (ci_lower, ci_upper)
+            # On a worker thread, so the loop keeps serving (and noticing disconnects) during a fit
+            async with timed(f"{engine}_fit"):
+                future = await asyncio.to_thread(fit_engine, engine, df)
+            logger.debug("%s forecast completed", engine)
+        except RequestCancelled:
+            raise
         except Exception as e:
-            logger.error("Prophet total calculation failed: %s", str(e))
-            raise HTTPException(status_code=500, detail=f"Prophet calculation failed: {str(e)}")
-
-    prophet_forecasts = {
-        1: get_prophet_total(1),
-        3: get_prophet_total(3),
-        6: get_prophet_total(6),
-        9: get_prophet_total(9),
-        12: get_prophet_total(12)
+            logger.error("%s model failed: %s", engine, str(e))
+            raise HTTPException(status_code=500, detail=f"Forecast model failed: {str(e)}")
+
+    def horizon_total(months: int) -> tuple:
+        upcoming = future.head(months)
+        return (float(upcoming['yhat'].sum()),
+                (float(upcoming['yhat_lower'].sum()), float(upcoming['yhat_upper'].sum())))
+
+    fit = {
+        "history": df,
+        "future": future,
+        "totals": {label: horizon_total(months) for label, months in HORIZONS.items()},
+        "anomalies": observed_months - len(df)
     }
-
-    narrative = "Unable to generate narrative forecast."
-    try:
-        gemini_prompt = (
-            f"Based on monthly expenses: {df[['ds', 'y']].to_dict('records')}, "
-            f"provide a narrative forecast for expenses over the next 12 months, "
-            f"focusing on trends, seasonality, and spending patterns."
-        )
-        narrative = await ask_gemini(gemini_prompt, max_tokens=500)
-        logger.debug("Gemini narrative: %s", narrative)
-    except Exception as e:
-        logger.warning("Gemini forecast failed: %s", str(e))
-        try:
-            hf_prompt = gemini_prompt
-            narrative = await get_advice_from_prompt(hf_prompt, max_length=500)
-            logger.debug("Hugging Face narrative: %s", narrative)
-        except Exception as e:
-            logger.error("Hugging Face fallback failed: %s", str(e))
-
-    if language != "en":
-        try:
-            narrative = translator.translate(narrative, dest=language).text
-            logger.debug("Translated narrative to %s: %s", language, narrative)
-        except Exception as e:
-            logger.error("Translation failed: %s", str(e))
-
-    result = {
-        "1_month": prophet_forecasts[1][0],
-        "3_months": prophet_forecasts[3][0],
-        "6_months": prophet_forecasts[6][0],
-        "9_months": prophet_forecasts[9][0],
-        "1_year": prophet_forecasts[12][0],
-        "confidence_intervals": {
-            "1_month": prophet_forecasts[1][1],
-            "3_months": prophet_forecasts[3][1],
-            "6_months": prophet_forecasts[6][1],
-            "9_months": prophet_forecasts[9][1],
-            "1_year": prophet_forecasts[12][1]
-        },
-        "narrative": narrative
-    }
-
-    result = {k: round(convert_currency(v, "INR", currency), 2) if k != "confidence_intervals" and k != "narrative" else v
-              for k, v in result.items()}
-    cache[cache_key] = result
+    cache[cache_key] = fit
+    return fit
+
+async def render_forecast(fit: dict, currency: str = "INR", language: str = "en") -> dict:
+    """
+    Convert a cached INR fit to `currency` at the latest rates and narrate it in `language`.
+    """
+    rate = fx.pair_rate(fx.BASE_CURRENCY, currency)
+    totals = fit["totals"]
+    result = {label: round(total * rate, 2) for label, (total, _) in totals.items()}
+    result["confidence_intervals"] = {label: tuple(round(bound * rate, 2) for bound in interval)
+                                      for label, (_, interval) in totals.items()}
+
+    with timed("narrative"):
+        narrative = forecast_narrative(fit["history"], fit["future"], result, result["confidence_intervals"]["1_year"],
+                                       currency, language, anomalies=fit["anomalies"])
+    if not has_templates(language):
+        narrative = await translate(narrative, language)
+    result["narrative"] = narrative
     logger.debug("Returning forecast result")
     return result
 
 def get_total(savings: float, months: int, currency: str = "INR") -> float:
     try:
         total = savings * months
-        return round(convert_currency(total, "INR", currency), 2)
+        return round(fx.convert(total, fx.BASE_CURRENCY, currency), 2)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Total calculation failed: %s", str(e))
-        raise HTTPException(status_code=500, detail=f"Total calculation failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Total calculation failed: {str(e)}")
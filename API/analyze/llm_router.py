@@ -0,0 +1,222 @@
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+from fastapi import HTTPException
+import metrics
+from analyze.gemini_ai import ask_gemini
+from analyze.huggingface_ai import generate_local
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failures that open a provider's circuit, and how long it stays open before a probe
+BREAKER_FAILURES = int(os.getenv("ZENITH_LLM_BREAKER_FAILURES", "3"))
+BREAKER_RESET_SECONDS = float(os.getenv("ZENITH_LLM_BREAKER_RESET", "30"))
+# Start the local model alongside a slow remote call instead of waiting for it to time out
+LLM_HEDGE = os.getenv("ZENITH_LLM_HEDGE", "1") == "1"
+
+DEFAULT_TEMPLATE = ("Personalised AI commentary is temporarily unavailable. The figures above are computed "
+                    "directly from your data and remain accurate.")
+
+
+class LLMResult(NamedTuple):
+    text: str
+    provider: str
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive errors; open -> half_open after `reset_seconds`, when a
+    single probe call is let through; its outcome closes or re-opens the circuit. A probe that ends
+    without an outcome (cancelled, shed) is released so the next call can probe instead.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def available(self) -> bool:
+        """
+        Whether allow() would let a call through, without taking the probe.
+        """
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            return time.monotonic() - self.opened_at >= self.reset_seconds
+        return not self._probing
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self):
+        if self.state == "half_open":
+            self._probing = False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failures:
+            if self.state != "open":
+                logger.warning("Circuit opened after %d consecutive failures", self.consecutive_failures)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class Provider:
+    """
+    One text-generation backend with its own breaker and an adaptive timeout derived from an EWMA of
+    observed latency (mean + 4 deviations, clamped to [min_timeout, max_timeout]).
+    """
+
+    def __init__(self, name: str, generate: Callable[[str, int, float], Awaitable[str]],
+                 min_timeout: float, max_timeout: float):
+        self.name = name
+        self.generate = generate
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.breaker = CircuitBreaker()
+        self.latency: Optional[float] = None
+        self.deviation = 0.0
+
+    def timeout(self) -> float:
+        if self.latency is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.latency + 4 * self.deviation))
+
+    def hedge_delay(self) -> float:
+        if self.latency is None:
+            return self.max_timeout / 4
+        return min(self.timeout(), max(0.25, self.latency + 2 * self.deviation))
+
+    def _observe(self, seconds: float):
+        if self.latency is None:
+            self.latency, self.deviation = seconds, seconds / 2
+        else:
+            self.deviation = 0.75 * self.deviation + 0.25 * abs(seconds - self.latency)
+            self.latency = 0.875 * self.latency + 0.125 * seconds
+
+    async def call(self, prompt: str, max_tokens: int) -> str:
+        if not self.breaker.allow():
+            metrics.inc("zenith_llm_requests_total", provider=self.name, outcome="short_circuit")
+            raise CircuitOpen(self.name)
+        probe = self.breaker.state == "half_open"
+        timeout = self.timeout()
+        started = time.perf_counter()
+        try:
+            text = await asyncio.wait_for(self.generate(prompt, max_tokens, timeout), timeout)
+            if not text or not text.strip():
+                raise ValueError("empty response")
+        except asyncio.CancelledError:
+            # Lost a hedge race or the request was cancelled; not the provider's fault
+            raise
+        except HTTPException as e:
+            if e.status_code == 503:
+                # Shed by local admission control: the provider itself is healthy
+                metrics.inc("zenith_llm_requests_total", provider=self.name, outcome="shed")
+                raise
+            self._fail(e, time.perf_counter() - started)
+            raise
+        except Exception as e:
+            self._fail(e, time.perf_counter() - started)
+            raise
+        finally:
+            # No-op once the probe's outcome closed or re-opened the circuit
+            if probe:
+                self.breaker.release()
+        elapsed = time.perf_counter() - started
+        self._observe(elapsed)
+        self.breaker.record_success()
+        metrics.inc("zenith_llm_requests_total", provider=self.name, outcome="success")
+        return text.strip()
+
+    def _fail(self, error: Exception, elapsed: float):
+        timed_out = isinstance(error, asyncio.TimeoutError) or getattr(error, "status_code", None) == 504
+        # A timeout tells us the latency is at least this long
+        self._observe(elapsed)
+        self.breaker.record_failure()
+        metrics.inc("zenith_llm_requests_total", provider=self.name, outcome="timeout" if timed_out else "failure")
+        logger.warning("LLM provider %s failed after %.2fs: %s", self.name, elapsed, str(error) or type(error).__name__)
+
+
+class LLMRouter:
+    """
+    Tries providers in order, skipping any whose circuit is open. While the first provider is still
+    running after its hedge delay, the next one is started as well and the first success wins. When
+    every provider fails or is unavailable, a template answer is returned so callers never error out.
+    """
+
+    def __init__(self, providers: List[Provider], hedge: bool = LLM_HEDGE):
+        self.providers = providers
+        self.hedge = hedge
+
+    def states(self) -> Dict[str, str]:
+        return {provider.name: provider.breaker.state for provider in self.providers}
+
+    async def generate(self, prompt: str, max_tokens: int = 300,
+                       fallback: Optional[Callable[[], str]] = None) -> LLMResult:
+        # The breaker itself is only consulted when a call starts, so a provider picked here but never
+        # launched (the first one answered) does not hold the half-open probe
+        candidates = []
+        for provider in self.providers:
+            if provider.breaker.available():
+                candidates.append(provider)
+            else:
+                metrics.inc("zenith_llm_requests_total", provider=provider.name, outcome="short_circuit")
+
+        running: Dict[asyncio.Task, Provider] = {}
+        launched = 0
+        try:
+            while running or launched < len(candidates):
+                if not running:
+                    provider = candidates[launched]
+                    launched += 1
+                    running[asyncio.create_task(provider.call(prompt, max_tokens))] = provider
+                hedge_delay = None
+                if self.hedge and len(running) == 1 and launched < len(candidates):
+                    hedge_delay = next(iter(running.values())).hedge_delay()
+                done, _ = await asyncio.wait(running, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    provider = candidates[launched]
+                    launched += 1
+                    metrics.inc("zenith_llm_requests_total", provider=provider.name, outcome="hedged")
+                    logger.debug("Hedging slow LLM call with %s", provider.name)
+                    running[asyncio.create_task(provider.call(prompt, max_tokens))] = provider
+                    continue
+                for task in done:
+                    provider = running.pop(task)
+                    if not task.cancelled() and task.exception() is None:
+                        return LLMResult(task.result(), provider.name)
+        finally:
+            for task in running:
+                task.cancel()
+
+        metrics.inc("zenith_llm_requests_total", provider="template", outcome="success")
+        return LLMResult(fallback() if fallback else DEFAULT_TEMPLATE, "template")
+
+
+router = LLMRouter([
+    Provider("gemini", ask_gemini, min_timeout=2.0, max_timeout=30.0),
+    Provider("local", generate_local, min_timeout=5.0, max_timeout=60.0),
+])
@@ -0,0 +1,174 @@
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from analyze import fx
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Changes smaller than this (relative) are described as stable / not seasonal
+TREND_THRESHOLD = 0.05
+SEASONALITY_THRESHOLD = 0.10
+
+TEMPLATES: Dict[str, Dict[str, str]] = {
+    "en": {
+        "trend_up": "Spending is trending up: the next 12 months are projected at {change:.0f}% above the last {months} months' average.",
+        "trend_down": "Spending is trending down: the next 12 months are projected at {change:.0f}% below the last {months} months' average.",
+        "trend_flat": "Spending is stable compared with the last {months} months.",
+        "seasonal": "Expect a seasonal peak around {peak} and the lightest month around {low}.",
+        "not_seasonal": "No strong seasonal pattern was detected.",
+        "anomalies": "{count} unusual month(s) were excluded from the model.",
+        "outlook": "Forecast: {month:,.2f} {currency} next month and {year:,.2f} {currency} over the next year (range {low_total:,.2f}-{high_total:,.2f}).",
+        "risk": "Spending risk is {risk} (volatility {volatility:.2f}).",
+        "risk_categories": "Categories above 30% of spending: {categories}.",
+        "emergency_fund": "Keep an emergency fund of about {fund:,.2f} {currency} (6 months of expenses).",
+        "invest": "Suggested instruments for your profile: {tickers}.",
+    },
+    "es": {
+        "trend_up": "El gasto tiende a subir: se proyecta que los próximos 12 meses estén un {change:.0f}% por encima del promedio de los últimos {months} meses.",
+        "trend_down": "El gasto tiende a bajar: se proyecta que los próximos 12 meses estén un {change:.0f}% por debajo del promedio de los últimos {months} meses.",
+        "trend_flat": "El gasto se mantiene estable respecto a los últimos {months} meses.",
+        "seasonal": "Se espera un pico estacional alrededor de {peak} y el mes más bajo alrededor de {low}.",
+        "not_seasonal": "No se detectó un patrón estacional marcado.",
+        "anomalies": "Se excluyeron {count} mes(es) atípicos del modelo.",
+        "outlook": "Pronóstico: {month:,.2f} {currency} el próximo mes y {year:,.2f} {currency} durante el próximo año (rango {low_total:,.2f}-{high_total:,.2f}).",
+        "risk": "El riesgo de gasto es {risk} (volatilidad {volatility:.2f}).",
+        "risk_categories": "Categorías por encima del 30% del gasto: {categories}.",
+        "emergency_fund": "Mantenga un fondo de emergencia de unos {fund:,.2f} {currency} (6 meses de gastos).",
+        "invest": "Instrumentos sugeridos para su perfil: {tickers}.",
+    },
+    "fr": {
+        "trend_up": "Les dépenses sont en hausse : les 12 prochains mois sont projetés {change:.0f}% au-dessus de la moyenne des {months} derniers mois.",
+        "trend_down": "Les dépenses sont en baisse : les 12 prochains mois sont projetés {change:.0f}% en dessous de la moyenne des {months} derniers mois.",
+        "trend_flat": "Les dépenses sont stables par rapport aux {months} derniers mois.",
+        "seasonal": "Un pic saisonnier est attendu vers {peak} et le mois le plus faible vers {low}.",
+        "not_seasonal": "Aucune saisonnalité marquée n'a été détectée.",
+        "anomalies": "{count} mois atypique(s) ont été exclus du modèle.",
+        "outlook": "Prévision : {month:,.2f} {currency} le mois prochain et {year:,.2f} {currency} sur l'année à venir (fourchette {low_total:,.2f}-{high_total:,.2f}).",
+        "risk": "Le risque de dépenses est {risk} (volatilité {volatility:.2f}).",
+        "risk_categories": "Catégories au-delà de 30% des dépenses : {categories}.",
+        "emergency_fund": "Constituez une épargne de précaution d'environ {fund:,.2f} {currency} (6 mois de dépenses).",
+        "invest": "Instruments suggérés pour votre profil : {tickers}.",
+    },
+    "hi": {
+        "trend_up": "खर्च बढ़ रहा है: अगले 12 महीनों का अनुमान पिछले {months} महीनों के औसत से {change:.0f}% अधिक है।",
+        "trend_down": "खर्च घट रहा है: अगले 12 महीनों का अनुमान पिछले {months} महीनों के औसत से {change:.0f}% कम है।",
+        "trend_flat": "पिछले {months} महीनों की तुलना में खर्च स्थिर है।",
+        "seasonal": "{peak} के आसपास मौसमी उच्चतम खर्च और {low} के आसपास सबसे कम खर्च की संभावना है।",
+        "not_seasonal": "कोई स्पष्ट मौसमी पैटर्न नहीं मिला।",
+        "anomalies": "{count} असामान्य महीने मॉडल से बाहर रखे गए।",
+        "outlook": "अनुमान: अगले महीने {month:,.2f} {currency} और अगले वर्ष में {year:,.2f} {currency} (सीमा {low_total:,.2f}-{high_total:,.2f})।",
+        "risk": "खर्च जोखिम {risk} है (अस्थिरता {volatility:.2f})।",
+        "risk_categories": "कुल खर्च के 30% से अधिक वाली श्रेणियाँ: {categories}।",
+        "emergency_fund": "लगभग {fund:,.2f} {currency} (6 महीने का खर्च) का आपातकालीन कोष रखें।",
+        "invest": "आपकी प्रोफ़ाइल के लिए सुझाए गए विकल्प: {tickers}।",
+    },
+}
+
+MONTH_NAMES: Dict[str, List[str]] = {
+    "en": ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+           "November", "December"],
+    "es": ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto", "septiembre", "octubre",
+           "noviembre", "diciembre"],
+    "fr": ["janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août", "septembre", "octobre",
+           "novembre", "décembre"],
+    "hi": ["जनवरी", "फ़रवरी", "मार्च", "अप्रैल", "मई", "जून", "जुलाई", "अगस्त", "सितंबर", "अक्टूबर", "नवंबर", "दिसंबर"],
+}
+
+LANGUAGE_NAMES = {"en": "English", "es": "Spanish", "fr": "French", "hi": "Hindi"}
+
+RISK_LEVELS: Dict[str, Dict[str, str]] = {
+    "es": {"Low": "bajo", "Medium": "medio", "High": "alto"},
+    "fr": {"Low": "faible", "Medium": "moyen", "High": "élevé"},
+    "hi": {"Low": "कम", "Medium": "मध्यम", "High": "अधिक"},
+}
+
+
+def has_templates(language: str) -> bool:
+    return language in TEMPLATES
+
+
+def _templates(language: str) -> Dict[str, str]:
+    return TEMPLATES.get(language, TEMPLATES["en"])
+
+
+def _month(ds: pd.Timestamp, language: str) -> str:
+    return MONTH_NAMES.get(language, MONTH_NAMES["en"])[ds.month - 1]
+
+
+def forecast_narrative(history: pd.DataFrame, future: pd.DataFrame, totals: Dict[str, float],
+                       year_interval: tuple, currency: str = "INR", language: str = "en", anomalies: int = 0) -> str:
+    """
+    Trend, seasonality and outlook commentary computed from the monthly history (ds, y) and the next
+    12 forecast months (ds, yhat); `totals` and `year_interval` are in `currency`. Runs in well under a
+    millisecond and needs no network. Languages without templates get English.
+    """
+    t = _templates(language)
+    sentences = []
+
+    recent = history['y'].tail(12).to_numpy(dtype=float)
+    upcoming = future['yhat'].to_numpy(dtype=float)
+    if len(recent) and len(upcoming) and recent.mean() > 0:
+        change = upcoming.mean() / recent.mean() - 1
+        if change > TREND_THRESHOLD:
+            sentences.append(t["trend_up"].format(change=change * 100, months=len(recent)))
+        elif change < -TREND_THRESHOLD:
+            sentences.append(t["trend_down"].format(change=-change * 100, months=len(recent)))
+        else:
+            sentences.append(t["trend_flat"].format(months=len(recent)))
+
+    if len(upcoming) and upcoming.mean() > 0 and (upcoming.max() - upcoming.min()) / upcoming.mean() > SEASONALITY_THRESHOLD:
+        sentences.append(t["seasonal"].format(peak=_month(future['ds'].iloc[int(np.argmax(upcoming))], language),
+                                              low=_month(future['ds'].iloc[int(np.argmin(upcoming))], language)))
+    else:
+        sentences.append(t["not_seasonal"])
+
+    if anomalies:
+        sentences.append(t["anomalies"].format(count=anomalies))
+
+    sentences.append(t["outlook"].format(month=totals["1_month"], year=totals["1_year"], currency=currency,
+                                         low_total=year_interval[0], high_total=year_interval[1]))
+    return " ".join(sentences)
+
+
+def risk_commentary(risk_profile: dict, currency: str = "INR", language: str = "en") -> List[str]:
+    """
+    Risk sentences; risk profiles are computed in INR, so amounts are converted to `currency`.
+    """
+    t = _templates(language)
+    risk = risk_profile.get("risk_score", "Low")
+    sentences = [t["risk"].format(risk=RISK_LEVELS.get(language, {}).get(risk, risk.lower()),
+                                  volatility=risk_profile.get("volatility", 0.0))]
+    if risk_profile.get("high_risk_categories"):
+        sentences.append(t["risk_categories"].format(categories=", ".join(risk_profile["high_risk_categories"])))
+    if risk_profile.get("average_monthly_expense"):
+        fund = risk_profile["average_monthly_expense"] * 6 * fx.pair_rate(fx.BASE_CURRENCY, currency)
+        sentences.append(t["emergency_fund"].format(fund=fund, currency=currency))
+    return sentences
+
+
+def forecast_commentary(forecast: dict, risk_profile: dict, currency: str = "INR", language: str = "en") -> str:
+    """
+    Deterministic replacement for the LLM forecast commentary: the narrative plus risk guidance.
+    """
+    return " ".join([forecast.get("narrative", "")] + risk_commentary(risk_profile, currency, language)).strip()
+
+
+def investment_commentary(risk_profile: dict, suggestions: dict, currency: str = "INR", language: str = "en") -> str:
+    t = _templates(language)
+    sentences = risk_commentary(risk_profile, currency, language)
+    if suggestions:
+        sentences.append(t["invest"].format(tickers=", ".join(
+            f"{ticker} ({info.get('name', ticker)})" for ticker, info in suggestions.items())))
+    return " ".join(sentences)
+
+
+def enrichment_prompt(commentary: str, language: str = "en", facts: Optional[dict] = None) -> str:
+    """
+    Prompt for the optional LLM tier: rewrite the template commentary without inventing numbers.
+    """
+    lines = [f"Rewrite the following financial commentary in friendly, plain {LANGUAGE_NAMES.get(language, language)}. "
+             "Keep every number unchanged and do not add new figures.", "", commentary]
+    if facts:
+        lines += ["", "Facts:"] + [f"- {key}: {value}" for key, value in facts.items()]
+    return "\n".join(lines)
@@ -0,0 +1,89 @@
+import io
+import os
+import re
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Tuple
+import pandas as pd
+import tabula
+import logging
+
+logger = logging.getLogger(__name__)
+
+PDF_WORKERS = int(os.getenv("ZENITH_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor = ThreadPoolExecutor(max_workers=PDF_WORKERS, thread_name_prefix="pdf")
+_warm_lock = threading.Lock()
+_warm = None
+
+_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?!s)")
+
+
+def warm_up() -> bool:
+    """
+    Start tabula's in-process JVM (via jpype) once, so later extractions skip JVM start-up.
+    Returns False when jpype is unavailable and every call falls back to a java subprocess.
+    """
+    global _warm
+    with _warm_lock:
+        if _warm is not None:
+            return _warm
+        try:
+            import jpype  # noqa: F401
+            from tabula.backend import TabulaVm
+            _warm = TabulaVm(java_options=["-Djava.awt.headless=true"], silent=True).tabula is not None
+        except Exception as e:
+            logger.warning("Could not start in-process tabula JVM: %s", str(e))
+            _warm = False
+        if _warm:
+            logger.info("Tabula JVM started in-process")
+        return _warm
+
+
+def queue_depth() -> int:
+    return _executor._work_queue.qsize()
+
+
+def count_pages(content: bytes) -> int:
+    """
+    Page count via pypdf when installed, otherwise by scanning page objects; 0 when unknown.
+    """
+    try:
+        from pypdf import PdfReader
+        return len(PdfReader(io.BytesIO(content)).pages)
+    except ImportError:
+        return len(_PAGE_PATTERN.findall(content))
+    except Exception as e:
+        logger.warning("Could not count PDF pages: %s", str(e))
+        return 0
+
+
+def _read_page(path: str, page) -> Tuple[object, List[pd.DataFrame], float]:
+    started = time.perf_counter()
+    dfs = tabula.read_pdf(path, pages=page, multiple_tables=True, silent=True,
+                          pandas_options={"header": None, "dtype": str})
+    return page, dfs or [], time.perf_counter() - started
+
+
+def iter_pdf_tables(content: bytes) -> Iterator[Tuple[object, List[pd.DataFrame], float]]:
+    """
+    Extract tables page by page on the PDF worker pool, yielding (page, tables, seconds) in page order
+    as soon as each page is ready. Tables are read without a header row; callers locate headers
+    themselves because continuation pages of a statement usually have none.
+    """
+    warm_up()
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as handle:
+        handle.write(content)
+        path = handle.name
+    try:
+        pages = count_pages(content)
+        if pages <= 1:
+            yield _read_page(path, "all" if pages == 0 else 1)
+            return
+        for result in _executor.map(lambda page: _read_page(path, page), range(1, pages + 1)):
+            logger.info("Extracted %d table(s) from PDF page %s in %.3fs", len(result[1]), result[0], result[2])
+            yield result
+    finally:
+        os.unlink(path)
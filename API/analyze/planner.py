@@ -2,7 +2,6 @@ from typing import Dict, List
 from fastapi import HTTPException
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 def goal_feasibility(income: float, expenses: float, duration_months: int, goal_cost: float) -> Dict:
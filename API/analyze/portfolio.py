@@ -0,0 +1,262 @@
+"""
+Historical price store and portfolio analytics for /invest/.
+
+Daily closes live in a local store (PRICE_STORE_PATH) of three files: dates.npy (datetime64[D]),
+close.npy (days x tickers, column-major so each ticker's history is contiguous) and tickers.json.
+Requests memory-map the store and only touch the columns of the tickers they need, so hundreds of
+tickers and decades of history cost no network and only milliseconds. The store is filled offline:
+    python -m analyze.portfolio --yfinance SPY QQQ VTI BND AAPL TSLA
+    python -m analyze.portfolio --files prices/*.csv
+"""
+import os
+import json
+import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from metrics import timed
+import logging
+
+logger = logging.getLogger(__name__)
+
+PRICE_STORE_PATH = os.getenv("ZENITH_PRICE_STORE", "data/prices")
+# Years of history backtested, and simulated paths for the projection
+BACKTEST_YEARS = int(os.getenv("ZENITH_BACKTEST_YEARS", "20"))
+MONTE_CARLO_PATHS = int(os.getenv("ZENITH_MONTE_CARLO_PATHS", "2000"))
+MAX_PROJECTION_MONTHS = 600
+TRADING_DAYS = 252
+
+
+class PriceStore:
+    def __init__(self, path: str = PRICE_STORE_PATH):
+        self.path = path
+        self.dates = np.load(os.path.join(path, "dates.npy"), mmap_mode="r")
+        self.close = np.load(os.path.join(path, "close.npy"), mmap_mode="r")
+        with open(os.path.join(path, "tickers.json"), encoding="utf-8") as handle:
+            self.tickers: List[str] = json.load(handle)
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._index
+
+    def window(self, tickers: List[str], years: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dates and closes (days x len(tickers)) of the last `years`, starting from the first day all
+        tickers have a price. Gaps from differing exchange holidays are filled with the previous close.
+        """
+        start = 0
+        if years:
+            start = int(np.searchsorted(self.dates, self.dates[-1] - np.timedelta64(int(years * 365.25), "D")))
+        prices = np.asarray(self.close[start:, [self._index[ticker] for ticker in tickers]], dtype="float64")
+        dates = np.asarray(self.dates[start:])
+        valid = np.isfinite(prices)
+        first = int(valid.all(axis=1).argmax()) if valid.all(axis=1).any() else len(prices)
+        prices, valid, dates = prices[first:], valid[first:], dates[first:]
+        last_seen = np.maximum.accumulate(np.where(valid, np.arange(len(prices))[:, None], 0), axis=0)
+        return dates, np.take_along_axis(prices, last_seen, axis=0)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(np.asarray(self.close), index=pd.DatetimeIndex(self.dates), columns=self.tickers)
+
+
+_store: Optional[PriceStore] = None
+_store_mtime: Optional[float] = None
+
+
+def get_store(path: str = PRICE_STORE_PATH) -> Optional[PriceStore]:
+    """
+    The memory-mapped store, re-opened when it is rewritten; None when it has not been filled.
+    """
+    global _store, _store_mtime
+    try:
+        mtime = os.path.getmtime(os.path.join(path, "tickers.json"))
+    except OSError:
+        _store, _store_mtime = None, None
+        return None
+    if _store is None or mtime != _store_mtime or _store.path != path:
+        try:
+            _store = PriceStore(path)
+            logger.info("Opened price store %s (%d tickers, %d days)", path, len(_store.tickers), len(_store.dates))
+        except (OSError, ValueError) as e:
+            logger.error("Ignoring unreadable price store %s: %s", path, str(e))
+            _store = None
+        _store_mtime = mtime
+    return _store
+
+
+def write_store(prices: pd.DataFrame, path: str = PRICE_STORE_PATH) -> int:
+    """
+    Merge a wide frame of daily closes (date index, one column per ticker) into the store; new
+    prices win over stored ones. Returns the number of tickers stored.
+    """
+    existing = get_store(path)
+    prices = prices.sort_index()
+    if existing is not None:
+        prices = prices.combine_first(existing.to_frame())
+    prices = prices[sorted(prices.columns)].astype("float64")
+    os.makedirs(path, exist_ok=True)
+    for name, array in (("dates", prices.index.values.astype("datetime64[D]")),
+                        ("close", np.asfortranarray(prices.to_numpy()))):
+        with open(os.path.join(path, f"{name}.npy.tmp"), "wb") as handle:
+            np.save(handle, array)
+        os.replace(os.path.join(path, f"{name}.npy.tmp"), os.path.join(path, f"{name}.npy"))
+    # Written last: readers re-open the store when tickers.json changes
+    with open(os.path.join(path, "tickers.json.tmp"), "w", encoding="utf-8") as handle:
+        json.dump([str(ticker) for ticker in prices.columns], handle)
+    os.replace(os.path.join(path, "tickers.json.tmp"), os.path.join(path, "tickers.json"))
+    return prices.shape[1]
+
+
+def read_price_file(path: str) -> pd.DataFrame:
+    """
+    Closes from a CSV: either long format (date, ticker, close) or a single-ticker export (e.g. from
+    Yahoo Finance) named after its ticker, preferring adjusted closes.
+    """
+    df = pd.read_csv(path)
+    df.columns = [str(col).strip().lower().replace(" ", "_") for col in df.columns]
+    close = next((col for col in ("adj_close", "close") if col in df.columns), None)
+    if "date" not in df.columns or close is None:
+        raise ValueError(f"{path} must contain date and close (or adj_close) columns")
+    df["date"] = pd.to_datetime(df["date"], utc=True).dt.tz_localize(None).dt.normalize()
+    if "ticker" in df.columns:
+        return df.pivot_table(index="date", columns="ticker", values=close, aggfunc="last")
+    ticker = os.path.splitext(os.path.basename(path))[0].upper()
+    return df.set_index("date")[[close]].rename(columns={close: ticker})
+
+
+def fetch_yfinance(tickers: Iterable[str]) -> pd.DataFrame:
+    import yfinance as yf
+    from http_client import yfinance_session
+    data = yf.download(list(tickers), period="max", auto_adjust=True, progress=False, session=yfinance_session())
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=list(tickers)[0])
+    closes.index = pd.DatetimeIndex(closes.index).tz_localize(None).normalize()
+    return closes
+
+
+def month_ends(dates: np.ndarray) -> np.ndarray:
+    months = dates.astype("datetime64[M]")
+    return np.append(np.flatnonzero(months[1:] != months[:-1]), len(months) - 1)
+
+
+def accumulate(growth: np.ndarray, contribution: float) -> np.ndarray:
+    """
+    Value after each period of investing `contribution` at the start of every period, given the
+    cumulative growth factors (last axis is time): V_t = G_t * sum_{s<=t} c / G_{s-1}.
+    """
+    previous = np.concatenate([np.ones(growth.shape[:-1] + (1,)), growth[..., :-1]], axis=-1)
+    return growth * np.cumsum(contribution / previous, axis=-1)
+
+
+def max_drawdown(growth: np.ndarray) -> np.ndarray:
+    # Peaks include the starting value of 1
+    peaks = np.maximum(np.maximum.accumulate(growth, axis=-1), 1.0)
+    return np.minimum((growth / peaks - 1).min(axis=-1), 0.0)
+
+
+def backtest(store: PriceStore, weights: Dict[str, float], monthly_contribution: float,
+             years: float = BACKTEST_YEARS) -> Optional[dict]:
+    """
+    Historical run of a fixed-weight mix: volatility and drawdown from daily returns (rebalanced
+    daily), and the outcome of monthly contributions with monthly rebalancing.
+    """
+    tickers = [ticker for ticker in weights if ticker in store]
+    if not tickers:
+        return None
+    w = np.array([weights[ticker] for ticker in tickers], dtype="float64")
+    w /= w.sum()
+    dates, prices = store.window(tickers, years)
+    ends = month_ends(dates)
+    if len(ends) < 13:
+        return None
+
+    daily = (prices[1:] / prices[:-1] - 1) @ w
+    daily_growth = np.concatenate([[1.0], np.cumprod(1 + daily)])
+    drawdowns = daily_growth / np.maximum.accumulate(daily_growth) - 1
+    trough = int(drawdowns.argmin())
+    peak = int(daily_growth[:trough + 1].argmax())
+    years_covered = (dates[-1] - dates[0]).astype(int) / 365.25
+
+    month_prices = prices[ends]
+    monthly = (month_prices[1:] / month_prices[:-1] - 1) @ w
+    values = accumulate(np.cumprod(1 + monthly), monthly_contribution)
+    return {
+        "tickers": tickers,
+        "weights": dict(zip(tickers, np.round(w, 4).tolist())),
+        "start": str(dates[0]),
+        "end": str(dates[-1]),
+        "annual_return": round(float(daily_growth[-1] ** (1 / years_covered) - 1), 4),
+        "annual_volatility": round(float(daily.std(ddof=1) * np.sqrt(TRADING_DAYS)), 4),
+        "max_drawdown": round(float(drawdowns[trough]), 4),
+        "max_drawdown_period": [str(dates[peak]), str(dates[trough])],
+        "worst_month": round(float(monthly.min()), 4),
+        "contributed": round(monthly_contribution * len(monthly), 2),
+        "final_value": round(float(values[-1]), 2),
+        "monthly_returns": monthly,
+    }
+
+
+def monte_carlo(monthly_returns: np.ndarray, monthly_contribution: float, months: int,
+                paths: int = MONTE_CARLO_PATHS, seed: int = 0) -> dict:
+    """
+    Project monthly contributions by resampling historical monthly returns of the mix (which keeps
+    the correlation between its holdings) for `paths` paths at once.
+    """
+    rng = np.random.default_rng(seed)
+    growth = np.cumprod(1 + rng.choice(monthly_returns, size=(paths, months)), axis=1)
+    final = accumulate(growth, monthly_contribution)[:, -1]
+    contributed = monthly_contribution * months
+    p10, p50, p90 = np.percentile(final, [10, 50, 90])
+    return {
+        "months": months,
+        "paths": paths,
+        "contributed": round(contributed, 2),
+        "final_value": {"p10": round(float(p10), 2), "p50": round(float(p50), 2), "p90": round(float(p90), 2)},
+        "probability_of_loss": round(float(np.mean(final < contributed)), 4),
+        "median_max_drawdown": round(float(np.median(max_drawdown(growth))), 4),
+    }
+
+
+def analyze_portfolio(tickers: List[str], monthly_savings: float, months: int,
+                      weights: Optional[Dict[str, float]] = None, store: Optional[PriceStore] = None) -> Optional[dict]:
+    """
+    Backtest and projection of investing the monthly savings in the suggested mix (equal weights
+    unless given). None when the store has no usable history for any of the tickers.
+    """
+    store = store or get_store()
+    if store is None:
+        return None
+    contribution = max(float(monthly_savings), 0.0)
+    with timed("portfolio_backtest"):
+        history = backtest(store, weights or {ticker: 1.0 for ticker in tickers}, contribution)
+    if history is None:
+        return None
+    monthly = history.pop("monthly_returns")
+    result = {"backtest": history, "projection": None}
+    if contribution > 0:
+        with timed("monte_carlo"):
+            result["projection"] = monte_carlo(monthly, contribution, min(max(int(months), 1), MAX_PROJECTION_MONTHS))
+    return result
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--yfinance", nargs="+", default=[], metavar="TICKER", help="download full histories")
+    parser.add_argument("--files", nargs="+", default=[], metavar="CSV", help="load closes from CSV files")
+    parser.add_argument("--store", default=PRICE_STORE_PATH)
+    args = parser.parse_args()
+    frames = [read_price_file(path) for path in args.files]
+    if args.yfinance:
+        frames.append(fetch_yfinance(args.yfinance))
+    if not frames:
+        parser.error("nothing to load: pass --yfinance and/or --files")
+    prices = pd.concat(frames, axis=1)
+    prices = prices.T.groupby(level=0).last().T
+    stored = write_store(prices, args.store)
+    logger.info("Price store %s: %d tickers, %d days", args.store, stored, len(get_store(args.store).dates))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,96 @@
 import pandas as pd
-from models import Transaction
 from fastapi import HTTPException
 import numpy as np
-from typing import List
+from typing import Dict, Optional
+from cachetools import TTLCache
+from analyze.transaction_store import load_monthly_rollups, load_category_totals, data_version
+from analyze.transaction_parser import Transactions, to_frame
+from metrics import record_cache
 
-def assess_risk(transactions: List[Transaction]) -> dict:
+# Stored-user profiles, keyed on the user's data version so every ingest invalidates them
+cache = TTLCache(maxsize=1000, ttl=3600)
+
+def summarize_transactions(transactions: Transactions) -> tuple:
+    """
+    Build monthly totals (with empty months as zero) and category totals from raw transactions in one pass.
+    """
+    frame = to_frame(transactions)
+    if frame.empty:
+        raise ValueError("No transactions to summarize")
+    df = pd.DataFrame({"date": pd.to_datetime(frame["date"]), "amount": frame["amount"], "category": frame["category"]})
+    monthly = df.groupby(pd.Grouper(key='date', freq='MS'))['amount'].sum()
+    category_spending = df.groupby('category')['amount'].sum()
+    return monthly, category_spending
+
+def category_averages(transactions: Transactions) -> Dict[str, float]:
+    """
+    Average monthly spending per category, shaped like FinancialData.spending_categories.
+    """
+    monthly, category_spending = summarize_transactions(transactions)
+    return {str(category): round(float(total) / len(monthly), 2) for category, total in category_spending.items()}
+
+def assess_risk(transactions: Transactions) -> dict:
     """
     Assess financial risk based on transaction volatility and patterns.
     """
     try:
-        df = pd.DataFrame([
-            {"date": pd.to_datetime(t.date), "amount": t.amount, "category": t.category}
-            for t in transactions
-        ])
-        
-        monthly = df.groupby(pd.Grouper(key='date', freq='MS'))['amount'].sum().reset_index()
-        volatility = monthly['amount'].std() / monthly['amount'].mean() if monthly['amount'].mean() != 0 else 0
-        
+        monthly, category_spending = summarize_transactions(transactions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Risk assessment failed: {str(e)}")
+    return assess_risk_from_rollups(monthly, category_spending)
+
+def _copy_profile(profile: dict) -> dict:
+    # Callers translate recommendations in place; keep the cached lists untouched
+    return dict(profile, recommendations=list(profile["recommendations"]),
+                high_risk_categories=list(profile["high_risk_categories"]))
+
+def assess_user_risk(user_id: str, months: Optional[int] = None) -> dict:
+    """
+    Assess risk for a stored user from the precomputed month and category rollups.
+    """
+    cache_key = f"risk:user:{user_id}:v{data_version(user_id)}:{months}"
+    record_cache("risk", cache_key in cache)
+    if cache_key in cache:
+        return _copy_profile(cache[cache_key])
+    try:
+        rollups = load_monthly_rollups(user_id, months)
+        monthly = rollups.set_index('ds')['total'].asfreq('MS', fill_value=0.0)
+        category_spending = load_category_totals(user_id, months)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Risk assessment failed: {str(e)}")
+    if len(rollups) < 2:
+        raise HTTPException(status_code=400, detail="Insufficient stored history for risk assessment (less than 2 months)")
+    profile = assess_risk_from_rollups(monthly, category_spending)
+    cache[cache_key] = _copy_profile(profile)
+    return profile
+
+def assess_risk_from_rollups(monthly: pd.Series, category_spending: pd.Series) -> dict:
+    """
+    Assess risk from monthly totals and category totals, in time proportional to the number of months.
+    """
+    if monthly.empty:
+        raise HTTPException(status_code=400, detail="No spending history to assess")
+    try:
+        # A single month has no spread to measure
+        volatility = monthly.std() / monthly.mean() if len(monthly) > 1 and monthly.mean() != 0 else 0
+
         risk_score = "Low"
         if volatility > 0.5:
             risk_score = "High"
         elif volatility > 0.2:
             risk_score = "Medium"
-        
-        category_spending = df.groupby('category')['amount'].sum()
+
         total_spending = category_spending.sum()
         high_risk_categories = category_spending[category_spending / total_spending > 0.3].index.tolist()
-        
+
         recommendations = []
-        avg_monthly = monthly['amount'].mean()
+        avg_monthly = monthly.mean()
         if risk_score in ["Medium", "High"]:
             recommendations.append(f"Build an emergency fund of 6-9 months of expenses (estimated: {round(avg_monthly * 6, 2)}-{round(avg_monthly * 9, 2)}).")
         if high_risk_categories:
             recommendations.append(f"Reduce spending in high-risk categories: {', '.join(high_risk_categories)}.")
         recommendations.append("Set monthly budgets for discretionary categories to stabilize spending.")
-        
+
         return {
             "risk_score": risk_score,
             "volatility": round(volatility, 2),
@@ -43,4 +99,4 @@ def assess_risk(transactions: List[Transaction]) -> dict:
             "average_monthly_expense": round(avg_monthly, 2)
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Risk assessment failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Risk assessment failed: {str(e)}")
@@ -2,7 +2,6 @@ from typing import Dict
 from fastapi import HTTPException
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 def analyze_savings(income: float, expenses: float, spending_categories: Dict[str, float] = None) -> Dict:
@@ -0,0 +1,82 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import logging
+from analyze.categorizer import categorize_descriptions, fill_categories
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['date', 'amount', 'category']
+
+# Aliases per canonical column, in priority order. 'description' is optional and only used to
+# derive a category when a statement has no category column; 'currency' is optional and kept for
+# converting multi-currency statements to INR.
+COLUMN_MAPPINGS = {
+    'date': ['date', 'transaction_date', 'date_of_transaction', 'txn_date', 'value_date', 'posting_date'],
+    'amount': ['amount', 'cost', 'transaction_amount', 'value', 'debit', 'credit', 'withdrawal_amount'],
+    'category': ['category', 'type', 'category_name'],
+    'description': ['description', 'narration', 'particulars', 'details', 'remarks', 'merchant'],
+    'currency': ['currency', 'currency_code', 'ccy', 'curr', 'transaction_currency']
+}
+
+
+def normalize_column(name) -> str:
+    return re.sub(r"[\s\-\.]+", "_", str(name).strip().lower()).strip("_")
+
+
+# Compiled once: normalized alias -> (canonical column, priority within its alias list)
+_ALIAS_TABLE: Dict[str, Tuple[str, int]] = {
+    normalize_column(alias): (canonical, priority)
+    for canonical, aliases in COLUMN_MAPPINGS.items()
+    for priority, alias in enumerate(aliases)
+}
+
+
+@lru_cache(maxsize=512)
+def _resolve_fingerprint(fingerprint: Tuple[str, ...]) -> Tuple[Tuple[str, int], ...]:
+    best: Dict[str, Tuple[int, int]] = {}
+    for index, name in enumerate(fingerprint):
+        match = _ALIAS_TABLE.get(name)
+        if match is None:
+            continue
+        canonical, priority = match
+        if canonical not in best or priority < best[canonical][0]:
+            best[canonical] = (priority, index)
+    return tuple((canonical, index) for canonical, (_, index) in best.items())
+
+
+def resolve_columns(columns: List) -> Dict[str, object]:
+    """
+    Map canonical column names to the matching original headers. Results are cached per header
+    fingerprint, since uploads from the same bank reuse the same layout.
+    """
+    columns = list(columns)
+    fingerprint = tuple(normalize_column(col) for col in columns)
+    return {canonical: columns[index] for canonical, index in _resolve_fingerprint(fingerprint)}
+
+
+def infer_schema(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Rename a raw upload frame to date/amount/category (plus currency when present), deriving category
+    from a description column when needed. Returns None when the required columns cannot be found.
+    """
+    found_columns = resolve_columns(df.columns)
+    if 'date' not in found_columns or 'amount' not in found_columns:
+        return None
+    if 'category' in found_columns:
+        category = df[found_columns['category']]
+        if 'description' in found_columns:
+            category = fill_categories(category, df[found_columns['description']])
+    elif 'description' in found_columns:
+        category = categorize_descriptions(df[found_columns['description']])
+    else:
+        return None
+    frame = pd.DataFrame({
+        'date': df[found_columns['date']],
+        'amount': df[found_columns['amount']],
+        'category': category
+    })
+    if 'currency' in found_columns:
+        frame['currency'] = df[found_columns['currency']]
+    return frame
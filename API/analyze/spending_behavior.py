@@ -1,11 +1,18 @@
-from transformers import pipeline
+from typing import Dict
 
-sentiment_analyzer = pipeline(
-  "sentiment-analysis",
-  model="distilbert/distilbert-base-uncased-finetuned-sst-2-english",
-  revision="714eb0f"
-)
+# Categories (as produced by the categorizer) that are hard to cut in the short term
+ESSENTIAL_CATEGORIES = {"Rent", "Groceries", "Utilities", "Health", "Insurance", "Loan", "Education", "Transport"}
 
-def analyze_behavior(spending_notes: str) -> str:
-    result = sentiment_analyzer(spending_notes)[0]
-    return f"Spending tone: {result['label']} (confidence: {result['score']:.2f})"
+
+def analyze_behavior(spending_categories: Dict[str, float]) -> str:
+    total = sum(amount for amount in spending_categories.values() if amount > 0) if spending_categories else 0
+    if total <= 0:
+        return "Spending mix: not enough categorized spending to assess"
+    essential = sum(amount for category, amount in spending_categories.items()
+                    if category in ESSENTIAL_CATEGORIES and amount > 0)
+    discretionary_share = 1 - essential / total
+    top = max(spending_categories, key=spending_categories.get)
+    tone = ("mostly discretionary" if discretionary_share > 0.5 else
+            "balanced" if discretionary_share > 0.3 else "mostly essential")
+    return (f"Spending mix: {tone} ({discretionary_share:.0%} discretionary, {1 - discretionary_share:.0%} essential); "
+            f"largest category: {top}")
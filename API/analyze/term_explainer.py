@@ -1,5 +1,4 @@
-import aiohttp
-import asyncio
+from http_client import http_client
 
 async def explain_term(term: str) -> str:
     url = "https://www.wikidata.org/w/api.php"
@@ -9,9 +8,7 @@ async def explain_term(term: str) -> str:
         "format": "json",
         "search": term
     }
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params) as response:
-            response_json = await response.json()
-            if response_json.get("search"):
-                return response_json["search"][0].get("description", "No description found.")
-            return "Term not found in financial context."
\ No newline at end of file
+    response_json = await http_client.get_json(url, params=params)
+    if response_json.get("search"):
+        return response_json["search"][0].get("description", "No description found.")
+    return "Term not found in financial context."
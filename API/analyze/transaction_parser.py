@@ -1,108 +1,218 @@
 from models import Transaction
 import pandas as pd
 import io
-import tabula
-from typing import List
+from typing import Iterator, List, Union
 import logging
+from analyze.pdf_extractor import iter_pdf_tables
+from analyze.schema_inference import REQUIRED_COLUMNS, resolve_columns, infer_schema
+from analyze import fx
+from analyze.categorizer import fill_categories
+from metrics import timed, observe
+from cancellation import checkpoint
 
 logger = logging.getLogger(__name__)
 
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Upload formats decoded straight into columns, without building a Transaction per row
+COLUMNAR_FORMATS = {"arrow", "feather", "ipc", "parquet", "msgpack"}
+COLUMNAR_CONTENT_TYPES = {
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+}
+
+Transactions = Union[List[Transaction], pd.DataFrame]
+
+
+def to_frame(transactions: Transactions) -> pd.DataFrame:
+    """
+    date/amount/category frame in INR from either a Transaction list or an already columnar frame.
+    Transactions carrying another currency are converted at the rate of their own date, and those
+    without a category are categorized from their description.
+    """
+    if isinstance(transactions, pd.DataFrame):
+        return fx.normalize(transactions)
+    frame = pd.DataFrame(
+        {"date": [t.date for t in transactions], "amount": [t.amount for t in transactions],
+         "category": [t.category for t in transactions]},
+        columns=REQUIRED_COLUMNS
+    )
+    if any(t.description for t in transactions):
+        frame["category"] = fill_categories(frame["category"], pd.Series([t.description for t in transactions]))
+    frame["category"] = frame["category"].fillna("Other")
+    if any(t.currency for t in transactions):
+        frame["currency"] = [t.currency for t in transactions]
+        frame = fx.normalize(frame)
+    return frame
+
+
+def to_transactions(df: pd.DataFrame) -> List[Transaction]:
+    return [
+        Transaction(date=date, amount=amount, category=category)
+        for date, amount, category in zip(df['date'], df['amount'].tolist(), df['category'])
+    ]
+
+
+def validate_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Column-wise equivalent of validating each row as a Transaction: dates must parse, amounts must be
+    numeric. Returns date (YYYY-MM-DD str), amount (float, in INR) and category (str) columns;
+    a currency column is converted away at each row's date.
+    """
+    if df.empty:
+        raise ValueError("No valid transactions found in file")
+    dates = pd.to_datetime(df['date'], errors='coerce', format='ISO8601')
+    if dates.isna().any():
+        # Only the non-ISO rows pay for per-element format inference
+        missing = dates.isna() & df['date'].notna()
+        dates[missing] = pd.to_datetime(df['date'][missing], errors='coerce', format='mixed')
+    amounts = pd.to_numeric(df['amount'], errors='coerce')
+    for name, column in (("dates", dates), ("amounts", amounts)):
+        invalid = column.isna()
+        if invalid.any():
+            raise ValueError(f"Invalid or missing {name} in {int(invalid.sum())} rows (first at row {int(invalid.argmax())})")
+    if 'currency' in df.columns:
+        amounts = pd.Series(fx.convert_column(amounts, df['currency'], dates), index=amounts.index)
+    return pd.DataFrame({
+        'date': dates.dt.strftime('%Y-%m-%d'),
+        'amount': amounts.astype('float64'),
+        'category': df['category'].fillna('Other').astype(str)
+    })
+
+
+def _read_columnar(content: bytes, file_type: str) -> pd.DataFrame:
+    if file_type == "msgpack":
+        if msgpack is None:
+            raise ValueError("msgpack uploads require the msgpack package")
+        payload = msgpack.unpackb(content, raw=False)
+        # Either {"date": [...], "amount": [...], "category": [...]} or a list of records
+        return pd.DataFrame(payload.get("transactions", payload) if isinstance(payload, dict) else payload)
+    if pa is None:
+        raise ValueError(f"{file_type} uploads require the pyarrow package")
+    if file_type == "parquet":
+        table = pq.read_table(io.BytesIO(content))
+    else:
+        try:
+            table = pa.ipc.open_file(pa.BufferReader(content)).read_all()
+        except pa.ArrowInvalid:
+            table = pa.ipc.open_stream(pa.BufferReader(content)).read_all()
+    return table.to_pandas()
+
+
+def parse_transaction_frame(content: bytes, file_type: str) -> pd.DataFrame:
+    """
+    Decode an Arrow IPC, Parquet or msgpack upload into a validated columnar frame.
+    """
+    with timed("parse"):
+        try:
+            df = infer_schema(_read_columnar(content, file_type))
+            if df is None:
+                raise ValueError(f"{file_type} data must contain columns or variations: {REQUIRED_COLUMNS}")
+            df = validate_frame(df)
+            logger.debug("Parsed %d transactions from %s", len(df), file_type)
+            return df
+        except Exception as e:
+            logger.error("Failed to parse %s transactions: %s", file_type, str(e))
+            raise ValueError(f"Failed to parse transactions: {str(e)}")
+
+def _pdf_frames(content: bytes) -> Iterator[pd.DataFrame]:
+    """
+    Normalize the tables of a PDF statement page by page while later pages are still being extracted.
+    The header row found on one page is carried over to continuation pages with the same width.
+    """
+    header = None
+    for page, tables, seconds in iter_pdf_tables(content):
+        rows = 0
+        for table in tables:
+            table = table.dropna(how="all")
+            start = 0
+            for i in range(min(5, len(table))):
+                found = resolve_columns(list(table.iloc[i]))
+                if 'date' in found and 'amount' in found:
+                    header, start = [str(col).strip() for col in table.iloc[i]], i + 1
+                    break
+            if header is None or len(header) != table.shape[1]:
+                logger.debug("Skipping table without a recognizable header on page %s", page)
+                continue
+            frame = table.iloc[start:].copy()
+            frame.columns = header
+            frame = infer_schema(frame)
+            if frame is None:
+                continue
+            frame = frame.dropna(subset=['date', 'amount'], how='all')
+            frame['amount'] = frame['amount'].astype(str).str.replace(r"[,\s₹$€£]", "", regex=True)
+            rows += len(frame)
+            yield frame
+        observe("zenith_stage_seconds", seconds, stage="pdf_page")
+        logger.debug("PDF page %s: %d rows in %.3fs", page, rows, seconds)
+
 def parse_transactions(content: bytes, is_file: bool = False, file_type: str = "xlsx") -> List[Transaction]:
+    with timed("parse"):
+        return _parse_transactions(content, is_file, file_type)
+
+def _parse_transactions(content: bytes, is_file: bool, file_type: str) -> List[Transaction]:
     try:
         df = None
-        required_columns = ['date', 'amount', 'category']
-        column_mappings = {
-            'date': ['date', 'transaction_date', 'date_of_transaction'],
-            'amount': ['amount', 'cost', 'transaction_amount', 'value', 'debit', 'credit'],
-            'category': ['category', 'type', 'category_name', 'description']
-        }
+        required_columns = REQUIRED_COLUMNS
 
         if is_file:
             if file_type == "xlsx":
                 xl = pd.ExcelFile(io.BytesIO(content))
                 logger.debug("Excel file sheets: %s", xl.sheet_names)
                 for sheet_name in xl.sheet_names:
-                    temp_df = pd.read_excel(io.BytesIO(content), sheet_name=sheet_name)
-                    original_columns = list(temp_df.columns)
-                    normalized_columns = [str(col).strip().lower() for col in original_columns]
-                    logger.debug("Sheet '%s' columns (original): %s", sheet_name, original_columns)
-                    found_columns = {}
-                    for req_col in required_columns:
-                        for alias in column_mappings[req_col]:
-                            if alias.lower() in normalized_columns:
-                                idx = normalized_columns.index(alias.lower())
-                                found_columns[req_col] = original_columns[idx]
-                                logger.debug("Matched '%s' to '%s' for '%s'", alias, found_columns[req_col], req_col)
-                                break
-                    if len(found_columns) == len(required_columns):
-                        df = temp_df.rename(columns={v: k for k, v in found_columns.items()})
-                        logger.debug("Using sheet '%s' with columns: %s", sheet_name, found_columns)
+                    df = infer_schema(xl.parse(sheet_name))
+                    if df is not None:
+                        logger.debug("Using sheet '%s'", sheet_name)
                         break
                 if df is None:
                     raise ValueError(f"No sheet contains required columns or their variations: {required_columns}")
 
             elif file_type == "csv":
-                df = pd.read_csv(io.BytesIO(content))
-                original_columns = list(df.columns)
-                normalized_columns = [str(col).strip().lower() for col in original_columns]
-                found_columns = {}
-                for req_col in required_columns:
-                    for alias in column_mappings[req_col]:
-                        if alias.lower() in normalized_columns:
-                            idx = normalized_columns.index(alias.lower())
-                            found_columns[req_col] = original_columns[idx]
-                            break
-                if len(found_columns) != len(required_columns):
+                df = infer_schema(pd.read_csv(io.BytesIO(content)))
+                if df is None:
                     raise ValueError(f"CSV file must contain columns or variations: {required_columns}")
-                df = df.rename(columns={v: k for k, v in found_columns.items()})
 
             elif file_type == "pdf":
-                dfs = tabula.read_pdf(io.BytesIO(content), pages="all")
-                if not dfs:
-                    raise ValueError("No tables found in PDF")
-                df = dfs[0]  # Assume first table
-                original_columns = list(df.columns)
-                normalized_columns = [str(col).strip().lower() for col in original_columns]
-                found_columns = {}
-                for req_col in required_columns:
-                    for alias in column_mappings[req_col]:
-                        if alias.lower() in normalized_columns:
-                            idx = normalized_columns.index(alias.lower())
-                            found_columns[req_col] = original_columns[idx]
-                            break
-                if len(found_columns) != len(required_columns):
-                    if 'description' in normalized_columns:
-                        df['category'] = df['description'].apply(lambda x: 'Food' if 'restaurant' in str(x).lower() else 'Other')
-                        found_columns['category'] = 'category'
-                        for req_col in ['date', 'amount']:
-                            for alias in column_mappings[req_col]:
-                                if alias.lower() in normalized_columns:
-                                    idx = normalized_columns.index(alias.lower())
-                                    found_columns[req_col] = original_columns[idx]
-                                    break
-                if len(found_columns) != len(required_columns):
+                frames = list(_pdf_frames(content))
+                if not frames:
                     raise ValueError(f"PDF file must contain columns or variations: {required_columns}")
-                df = df.rename(columns={v: k for k, v in found_columns.items()})
+                df = pd.concat(frames, ignore_index=True)
 
         else:
             df = pd.read_csv(io.StringIO(content.decode('utf-8')))
             if not all(col in df.columns for col in required_columns):
                 raise ValueError("CSV file must contain 'date', 'amount', 'category' columns")
 
-        df['date'] = df['date'].astype(str)
-        df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
-        df['category'] = df['category'].astype(str)
-        if df['amount'].isna().any():
-            raise ValueError("Invalid or missing amounts in file")
-        if df.empty or len(df) < 1:
-            raise ValueError("No valid transactions found in file")
-
-        transactions = [
-            Transaction(date=row['date'], amount=row['amount'], category=row['category'])
-            for _, row in df.iterrows()
-        ]
+        transactions = to_transactions(validate_frame(df))
         logger.debug("Parsed %d transactions", len(transactions))
         return transactions
     except Exception as e:
         logger.error("Failed to parse transactions: %s", str(e), exc_info=True)
-        raise ValueError(f"Failed to parse transactions: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Failed to parse transactions: {str(e)}")
+
+def stream_pdf_transactions(content: bytes) -> Iterator[pd.DataFrame]:
+    """
+    Yield validated date/amount/category frames from a PDF statement, one per extracted table,
+    so callers can aggregate or store rows while later pages are still being parsed.
+    """
+    for frame in _pdf_frames(content):
+        # Stop extracting pages once the request this ingest serves has been abandoned
+        checkpoint()
+        if not frame.empty:
+            # Same checks and defaults as whole-file uploads: dates and amounts must parse, missing
+            # categories become Other, and other currencies are converted at each row's date
+            yield validate_frame(frame)
@@ -0,0 +1,319 @@
+import os
+import time
+import sqlite3
+import threading
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+from fastapi import HTTPException
+import logging
+from models import Transaction
+from analyze.transaction_parser import to_frame
+
+logger = logging.getLogger(__name__)
+
+STORE_PATH = os.getenv("ZENITH_STORE_PATH", "transactions.db")
+
+_local = threading.local()
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    month TEXT NOT NULL,
+    amount REAL NOT NULL,
+    category TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions (user_id, date);
+CREATE TABLE IF NOT EXISTS monthly_rollups (
+    user_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    total REAL NOT NULL,
+    count INTEGER NOT NULL,
+    sum_sq REAL NOT NULL,
+    PRIMARY KEY (user_id, month)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS category_rollups (
+    user_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total REAL NOT NULL,
+    count INTEGER NOT NULL,
+    sum_sq REAL NOT NULL,
+    PRIMARY KEY (user_id, month, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_activity (
+    user_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    ingested_at REAL,
+    seen_at REAL,
+    currency TEXT,
+    language TEXT
+) WITHOUT ROWID;
+"""
+
+# Rollups are derived data, so an older store is migrated by rebuilding them from the raw rows
+REBUILD_ROLLUPS = """
+DROP TABLE IF EXISTS monthly_rollups;
+DROP TABLE IF EXISTS category_rollups;
+{schema}
+INSERT INTO category_rollups (user_id, month, category, total, count, sum_sq)
+SELECT user_id, month, category, SUM(amount), COUNT(*), SUM(amount * amount)
+FROM transactions GROUP BY user_id, month, category;
+INSERT INTO monthly_rollups (user_id, month, total, count, sum_sq)
+SELECT user_id, month, SUM(total), SUM(count), SUM(sum_sq)
+FROM category_rollups GROUP BY user_id, month;
+PRAGMA user_version = {version};
+"""
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Return this thread's connection to the transaction store, creating or migrating the schema on first use.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(STORE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            _migrate(conn)
+        else:
+            conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def _migrate(conn: sqlite3.Connection):
+    """
+    Rebuild the rollups of an older store. The write lock is taken before the version is checked
+    again, so when several workers open an old store together exactly one of them migrates it.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            logger.info("Migrating transaction store %s to schema version %d", STORE_PATH, SCHEMA_VERSION)
+            # executescript would commit first, so the statements run one by one inside the transaction
+            for statement in REBUILD_ROLLUPS.format(schema=SCHEMA, version=SCHEMA_VERSION).split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    dates = pd.to_datetime(df["date"], errors="coerce")
+    if dates.isna().any():
+        raise ValueError("Invalid transaction dates")
+    df = df[["amount", "category"]].copy()
+    df["date"] = dates.dt.strftime("%Y-%m-%d")
+    df["month"] = dates.dt.strftime("%Y-%m")
+    return df
+
+
+def _apply_deltas(conn: sqlite3.Connection, user_id: str, deltas: pd.DataFrame, sign: float = 1.0):
+    """
+    Add (or with sign=-1 subtract) per month × category deltas to both rollup tables.
+    `deltas` has columns month, category, total, count, sum_sq.
+    """
+    if deltas.empty:
+        return
+    conn.executemany(
+        "INSERT INTO category_rollups (user_id, month, category, total, count, sum_sq) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (user_id, month, category) DO UPDATE SET total = total + excluded.total, "
+        "count = count + excluded.count, sum_sq = sum_sq + excluded.sum_sq",
+        ((user_id, m, c, sign * float(t), int(sign * n), sign * float(q)) for m, c, t, n, q in
+         deltas[["month", "category", "total", "count", "sum_sq"]].itertuples(index=False))
+    )
+    monthly = deltas.groupby("month", as_index=False)[["total", "count", "sum_sq"]].sum()
+    conn.executemany(
+        "INSERT INTO monthly_rollups (user_id, month, total, count, sum_sq) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (user_id, month) DO UPDATE SET total = total + excluded.total, "
+        "count = count + excluded.count, sum_sq = sum_sq + excluded.sum_sq",
+        ((user_id, m, sign * float(t), int(sign * n), sign * float(q)) for m, t, n, q in
+         monthly[["month", "total", "count", "sum_sq"]].itertuples(index=False))
+    )
+    if sign < 0:
+        conn.execute("DELETE FROM category_rollups WHERE user_id = ? AND count <= 0", (user_id,))
+        conn.execute("DELETE FROM monthly_rollups WHERE user_id = ? AND count <= 0", (user_id,))
+
+
+def ingest_transactions(user_id: str, transactions, replace: bool = True) -> int:
+    """
+    Bulk-insert transactions for a user and update the month and category rollups incrementally.
+    With replace=True, stored rows inside the uploaded date range are dropped first (and their
+    contribution subtracted from the rollups), so re-uploading a full statement does not double count.
+    Accepts a Transaction list or a columnar date/amount/category frame; amounts in other currencies
+    are stored in INR.
+    """
+    if len(transactions) == 0:
+        return 0
+    return ingest_frames(user_id, [to_frame(transactions)[["date", "amount", "category"]]], replace)
+
+
+def ingest_frames(user_id: str, frames: Iterable[pd.DataFrame], replace: bool = True) -> int:
+    """
+    Ingest a stream of date/amount/category frames (e.g. one per PDF page) in a single store transaction,
+    applying each chunk to the rollups as it arrives. Replacement only touches rows stored before this ingest.
+    """
+    try:
+        conn = get_connection()
+        stored = 0
+        with conn:
+            cutoff = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+            for frame in frames:
+                if frame.empty:
+                    continue
+                df = _normalize_frame(frame)
+                start, end = df["date"].min(), df["date"].max()
+                deltas = (df.assign(sum_sq=df["amount"] ** 2)
+                          .groupby(["month", "category"], as_index=False)
+                          .agg(total=("amount", "sum"), count=("amount", "size"), sum_sq=("sum_sq", "sum")))
+                if replace:
+                    removed = pd.DataFrame(conn.execute(
+                        "SELECT month, category, SUM(amount), COUNT(*), SUM(amount * amount) FROM transactions "
+                        "WHERE user_id = ? AND date BETWEEN ? AND ? AND id <= ? GROUP BY month, category",
+                        (user_id, start, end, cutoff)
+                    ).fetchall(), columns=["month", "category", "total", "count", "sum_sq"])
+                    conn.execute(
+                        "DELETE FROM transactions WHERE user_id = ? AND date BETWEEN ? AND ? AND id <= ?",
+                        (user_id, start, end, cutoff)
+                    )
+                    _apply_deltas(conn, user_id, removed, sign=-1.0)
+                conn.executemany(
+                    "INSERT INTO transactions (user_id, date, month, amount, category) VALUES (?, ?, ?, ?, ?)",
+                    ((user_id, d, m, float(a), c) for d, m, a, c in
+                     zip(df["date"], df["month"], df["amount"], df["category"]))
+                )
+                _apply_deltas(conn, user_id, deltas)
+                stored += len(df)
+                logger.debug("Ingested chunk of %d transactions for user %s (%s to %s)", len(df), user_id, start, end)
+            if stored:
+                conn.execute(
+                    "INSERT INTO user_activity (user_id, version, ingested_at) VALUES (?, 1, ?) "
+                    "ON CONFLICT (user_id) DO UPDATE SET version = version + 1, ingested_at = excluded.ingested_at",
+                    (user_id, time.time())
+                )
+        logger.info("Ingested %d transactions for user %s", stored, user_id)
+        return stored
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error("Transaction ingest failed: %s", str(e))
+        raise HTTPException(status_code=500, detail=f"Transaction ingest failed: {str(e)}")
+
+
+def load_transactions(user_id: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Transaction]:
+    """
+    Read a user's transactions between two ISO dates (inclusive) using the (user_id, date) index.
+    """
+    rows = get_connection().execute(
+        "SELECT date, amount, category FROM transactions "
+        "WHERE user_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+        (user_id, start or "0000-00-00", end or "9999-12-31")
+    ).fetchall()
+    return [Transaction(date=d, amount=a, category=c) for d, a, c in rows]
+
+
+def load_monthly_rollups(user_id: str, months: Optional[int] = None) -> pd.DataFrame:
+    """
+    Return the user's most recent monthly rollups (oldest first) with columns
+    ds, total, count, sum_sq plus the per-transaction mean and std derived from them.
+    """
+    query = "SELECT month, total, count, sum_sq FROM monthly_rollups WHERE user_id = ? ORDER BY month DESC"
+    params = (user_id,)
+    if months:
+        query += " LIMIT ?"
+        params = (user_id, months)
+    rows = get_connection().execute(query, params).fetchall()
+    df = pd.DataFrame(rows[::-1], columns=["ds", "total", "count", "sum_sq"])
+    df["ds"] = pd.to_datetime(df["ds"] + "-01")
+    df["mean"] = df["total"] / df["count"]
+    df["std"] = (df["sum_sq"] / df["count"] - df["mean"] ** 2).clip(lower=0) ** 0.5
+    return df
+
+
+def load_monthly_totals(user_id: str, months: Optional[int] = None) -> pd.DataFrame:
+    """
+    Return the user's most recent monthly totals as a Prophet-ready frame with 'ds' and 'y' columns.
+    """
+    rollups = load_monthly_rollups(user_id, months)
+    return rollups[["ds", "total"]].rename(columns={"total": "y"})
+
+
+def load_category_totals(user_id: str, months: Optional[int] = None) -> pd.Series:
+    """
+    Total spending per category over the user's most recent `months` months of rollups.
+    """
+    start = "0000-00"
+    if months:
+        row = get_connection().execute(
+            "SELECT MIN(month) FROM (SELECT month FROM monthly_rollups WHERE user_id = ? "
+            "ORDER BY month DESC LIMIT ?)",
+            (user_id, months)
+        ).fetchone()
+        start = row[0] or start
+    rows = get_connection().execute(
+        "SELECT category, SUM(total) FROM category_rollups WHERE user_id = ? AND month >= ? GROUP BY category",
+        (user_id, start)
+    ).fetchall()
+    return pd.Series(dict(rows), dtype=float)
+
+
+def average_category_spending(user_id: str, months: int = 12) -> Dict[str, float]:
+    """
+    Average monthly spending per category, shaped like FinancialData.spending_categories.
+    """
+    covered = len(load_monthly_rollups(user_id, months))
+    if not covered:
+        return {}
+    return {category: round(total / covered, 2) for category, total in load_category_totals(user_id, months).items()}
+
+
+def data_version(user_id: str) -> int:
+    """
+    Counter bumped by every ingest for the user; caches of derived results are keyed on it.
+    """
+    row = get_connection().execute("SELECT version FROM user_activity WHERE user_id = ?", (user_id,)).fetchone()
+    return row[0] if row else 0
+
+
+def touch_user(user_id: str, currency: Optional[str] = None, language: Optional[str] = None):
+    """
+    Record that the user just requested results, and in which currency and language.
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO user_activity (user_id, seen_at, currency, language) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET seen_at = excluded.seen_at, "
+            "currency = COALESCE(excluded.currency, currency), language = COALESCE(excluded.language, language)",
+            (user_id, time.time(), currency, language)
+        )
+
+
+ACTIVITY_COLUMNS = ("user_id", "version", "ingested_at", "seen_at", "currency", "language")
+
+
+def get_activity(user_id: str) -> Optional[Dict]:
+    row = get_connection().execute(
+        f"SELECT {', '.join(ACTIVITY_COLUMNS)} FROM user_activity WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    return dict(zip(ACTIVITY_COLUMNS, row)) if row else None
+
+
+def active_users(since: float, limit: int = 1000) -> List[Dict]:
+    """
+    Users who ingested or requested results after `since` (epoch seconds), most recent first.
+    """
+    rows = get_connection().execute(
+        f"SELECT {', '.join(ACTIVITY_COLUMNS)} FROM user_activity "
+        "WHERE MAX(COALESCE(ingested_at, 0), COALESCE(seen_at, 0)) >= ? "
+        "ORDER BY MAX(COALESCE(ingested_at, 0), COALESCE(seen_at, 0)) DESC LIMIT ?",
+        (since, limit)
+    ).fetchall()
+    return [dict(zip(ACTIVITY_COLUMNS, row)) for row in rows]
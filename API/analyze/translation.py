@@ -0,0 +1,200 @@
+import os
+import json
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional
+from cachetools import LRUCache
+from metrics import timed, record_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_CACHE_PATH = os.getenv("ZENITH_TRANSLATION_CACHE", "translations.db")
+# googletrans (network), marian (local Helsinki-NLP/opus-mt models on CPU) or dictionary (JSON file)
+TRANSLATION_BACKEND = os.getenv("ZENITH_TRANSLATION_BACKEND", "googletrans")
+TRANSLATION_DICTIONARY = os.getenv("ZENITH_TRANSLATION_DICTIONARY")
+# Languages offered by the Streamlit client; their fixed strings are translated at start-up
+PRECOMPUTE_LANGUAGES = ("es", "hi", "fr")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    hash TEXT NOT NULL,
+    language TEXT NOT NULL,
+    text TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    PRIMARY KEY (hash, language)
+) WITHOUT ROWID;
+"""
+
+_local = threading.local()
+_memory = LRUCache(maxsize=4096)
+_memory_lock = threading.Lock()
+
+
+def get_connection() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(TRANSLATION_CACHE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class GoogleTransBackend:
+    name = "googletrans"
+
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def translate_batch(self, texts: List[str], language: str) -> List[str]:
+        results = self.translator.translate(texts, dest=language)
+        return [result.text for result in results]
+
+
+class MarianBackend:
+    """
+    Offline translation with the Helsinki-NLP opus-mt English -> <language> models, loaded lazily per
+    language and run on CPU.
+    """
+    name = "marian"
+
+    def __init__(self, model_pattern: str = "Helsinki-NLP/opus-mt-en-{language}"):
+        self.model_pattern = model_pattern
+        self._pipelines = {}
+        self._lock = threading.Lock()
+
+    def _pipeline(self, language: str):
+        with self._lock:
+            if language not in self._pipelines:
+                from transformers import pipeline
+                self._pipelines[language] = pipeline("translation", model=self.model_pattern.format(language=language),
+                                                     device=-1)
+            return self._pipelines[language]
+
+    def translate_batch(self, texts: List[str], language: str) -> List[str]:
+        return [result["translation_text"] for result in self._pipeline(language)(texts)]
+
+
+class DictionaryBackend:
+    """
+    Looks strings up in a {language: {english: translation}} JSON file; unknown strings pass through.
+    """
+    name = "dictionary"
+
+    def __init__(self, path: Optional[str] = TRANSLATION_DICTIONARY):
+        self.entries: Dict[str, Dict[str, str]] = {}
+        if path:
+            with open(path, encoding="utf-8") as handle:
+                self.entries = json.load(handle)
+
+    def translate_batch(self, texts: List[str], language: str) -> List[str]:
+        table = self.entries.get(language, {})
+        return [table.get(text, text) for text in texts]
+
+
+BACKENDS = {"googletrans": GoogleTransBackend, "marian": MarianBackend, "dictionary": DictionaryBackend}
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[TRANSLATION_BACKEND]()
+        logger.info("Using %s translation backend", _backend.name)
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+def translate_batch(texts: Iterable[str], language: str, source: str = "en") -> List[str]:
+    """
+    Translate many strings with at most one backend call. Hits come from an in-process LRU, then the
+    SQLite cache; only distinct misses are sent to the backend. Strings that cannot be translated are
+    returned unchanged (and not cached).
+    """
+    texts = list(texts)
+    if language == source or not texts:
+        return texts
+    keys = {text: text_hash(text) for text in texts if text}
+    found: Dict[str, str] = {}
+    with _memory_lock:
+        for text, key in keys.items():
+            if (key, language) in _memory:
+                found[text] = _memory[(key, language)]
+    missing = [text for text in keys if text not in found]
+    if missing:
+        conn = get_connection()
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            by_hash = {keys[text]: text for text in chunk}
+            rows = conn.execute(
+                f"SELECT hash, text FROM translations WHERE language = ? AND hash IN ({','.join('?' * len(by_hash))})",
+                [language, *by_hash]
+            ).fetchall()
+            found.update({by_hash[h]: translated for h, translated in rows})
+        missing = [text for text in missing if text not in found]
+        with _memory_lock:
+            for text in keys:
+                if text in found:
+                    _memory[(keys[text], language)] = found[text]
+    for text in keys:
+        record_cache("translation", text not in missing)
+
+    if missing:
+        backend = get_backend()
+        try:
+            with timed("translation_backend"):
+                translated = backend.translate_batch(missing, language)
+            found.update(zip(missing, translated))
+            # A string handed back unchanged was not translated (e.g. not in the dictionary); caching it
+            # would keep serving it after switching to a backend that can translate it
+            results = [(text, result) for text, result in zip(missing, translated) if result != text]
+            conn = get_connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO translations (hash, language, text, backend) VALUES (?, ?, ?, ?)",
+                    [(keys[text], language, result, backend.name) for text, result in results]
+                )
+            with _memory_lock:
+                for text, result in results:
+                    _memory[(keys[text], language)] = result
+        except Exception as e:
+            logger.error("Translation to %s failed for %d strings: %s", language, len(missing), str(e))
+    return [found.get(text, text) for text in texts]
+
+
+async def translate_many(texts: Iterable[str], language: str) -> List[str]:
+    """
+    translate_batch on a worker thread, so backend network or model calls never block the event loop.
+    """
+    texts = list(texts)
+    if language == "en" or not texts:
+        return texts
+    async with timed("translation"):
+        return await asyncio.to_thread(translate_batch, texts, language)
+
+
+async def translate(text: str, language: str) -> str:
+    return (await translate_many([text], language))[0]
+
+
+def precompute(texts: Iterable[str], languages: Iterable[str] = PRECOMPUTE_LANGUAGES):
+    texts = list(texts)
+    for language in languages:
+        try:
+            translate_batch(texts, language)
+        except Exception as e:
+            logger.warning("Precomputing %s translations failed: %s", language, str(e))
@@ -4,7 +4,23 @@ import pandas as pd
 import base64
 import io
 
+API_URL = "http://127.0.0.1:8000"
+# The API stops working on a request after this many seconds
+REQUEST_TIMEOUT = 120
+
 st.set_page_config(page_title="Smart Financial Planner", layout="wide")
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    # One keep-alive session per Streamlit server instead of a new connection per button press
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    session.headers["X-Request-Timeout"] = str(REQUEST_TIMEOUT)
+    return session
+
+
+session = get_session()
 st.title("Smart Financial Planning App")
 st.markdown("Plan your finances with AI-powered forecasts and advice!")
 
@@ -17,10 +33,11 @@ with tab1:
     language = st.selectbox("Language", ["en", "es", "hi", "fr"], index=0)
     if uploaded_file and st.button("Forecast"):
         with st.spinner("Generating forecast..."):
-            response = requests.post(
-                "http://127.0.0.1:8000/forecast_expenses/",
+            response = session.post(
+                f"{API_URL}/forecast_expenses/",
                 files={"file": uploaded_file},
-                data={"forecast_currency": currency}
+                data={"forecast_currency": currency},
+                params={"language": language}
             )
             if response.status_code == 200:
                 result = response.json()
@@ -55,8 +72,8 @@ with tab2:
                 "currency": "INR",
                 "spending_categories": {"Food": expenses * 0.4, "Rent": expenses * 0.5}
             }
-            response = requests.post(
-                "http://127.0.0.1:8000/analyze/",
+            response = session.post(
+                f"{API_URL}/analyze/",
                 json=data,
                 params={"low_income_mode": low_income_mode}
             )
@@ -98,7 +115,7 @@ with tab3:
                     {"date": "2025-06-01", "amount": 600, "category": "Food"}
                 ]
             }
-            response = requests.post("http://127.0.0.1:8000/invest/", json=data)
+            response = session.post(f"{API_URL}/invest/", json=data, params={"language": language})
             if response.status_code == 200:
                 result = response.json()
                 st.success("Suggestions Generated!")
@@ -107,6 +124,16 @@ with tab3:
                 st.write("**Investment Suggestions**:")
                 for ticker, details in result["investment_suggestions"].items():
                     st.write(f"**{ticker}**: {details['name']} (Price: {details['price']}, Sector: {details['sector']})")
+                if result.get("portfolio"):
+                    history = result["portfolio"]["backtest"]
+                    st.write(f"**Backtest** ({history['start']} to {history['end']}):")
+                    cols = st.columns(3)
+                    cols[0].metric("Annual return", f"{history['annual_return']:.1%}")
+                    cols[1].metric("Volatility", f"{history['annual_volatility']:.1%}")
+                    cols[2].metric("Max drawdown", f"{history['max_drawdown']:.1%}")
+                    if result["portfolio"]["projection"]:
+                        st.write("**Projection of your monthly savings**:")
+                        st.json(result["portfolio"]["projection"])
             else:
                 st.error(f"Error: {response.json().get('detail', 'Failed to get suggestions')}")
 
@@ -131,11 +158,13 @@ with tab4:
                     {"date": "2025-06-01", "amount": 600, "category": "Food"}
                 ]
             }
-            response = requests.post(
-                "http://127.0.0.1:8000/chat/",
-                json={"question": question, "user_data": user_data}
+            response = session.post(
+                f"{API_URL}/chat/",
+                json={"question": question, "user_data": user_data,
+                      "session_id": st.session_state.get("chat_session_id")}
             )
             if response.status_code == 200:
+                st.session_state["chat_session_id"] = response.json()["session_id"]
                 st.write("**Assistant**: ", response.json()["answer"])
             else:
                 st.error(f"Error: {response.json().get('detail', 'Chat failed')}")
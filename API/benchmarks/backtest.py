@@ -0,0 +1,200 @@
+"""
+Rolling-origin backtest of the forecast engines in analyze/forecast_engines.py.
+
+Every series in the corpus is cut at successive origins; each engine is fit on the months before
+the origin and scored on the next --horizon months (by default the 12 the API forecasts). Work is
+spread over a process pool, one task per (series, engine). The report gives, per engine and
+history-length bucket, the error of the monthly values (sMAPE), the error of the horizon total the
+API returns (total APE), interval coverage, fit latency and peak Python memory of a fit.
+
+With --policy, the cheapest engine whose error meets --target is chosen for each bucket and written
+as the selection policy investment_forecast loads (ZENITH_FORECAST_POLICY). The policy records its
+horizon and is ignored at load unless that is the API's. Prophet engines are skipped when prophet
+is not installed.
+
+Run from the API directory:
+    python -m benchmarks.backtest --series 200 --workers 4 --output backtest.json
+    python -m benchmarks.backtest --store transactions.db --target 0.15 --policy forecast_policy.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import sqlite3
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import monthly_series
+from analyze.forecast_engines import ENGINES, FORECAST_HORIZON, available_engines, run_engine
+
+# (min_months, max_months) of training history; the policy has one rule per bucket
+BUCKETS: List[Tuple[int, Optional[int]]] = [(3, 11), (12, 23), (24, 35), (36, None)]
+
+
+def bucket_of(months: int) -> Optional[Tuple[int, Optional[int]]]:
+    for low, high in BUCKETS:
+        if months >= low and (high is None or months <= high):
+            return low, high
+    return None
+
+
+def load_store_corpus(path: str, min_months: int) -> List[Tuple[str, pd.DataFrame]]:
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT user_id, month, total FROM monthly_rollups ORDER BY user_id, month").fetchall()
+    conn.close()
+    frame = pd.DataFrame(rows, columns=["user_id", "month", "y"])
+    frame["ds"] = pd.to_datetime(frame["month"] + "-01")
+    return [(user_id, group[["ds", "y"]].reset_index(drop=True))
+            for user_id, group in frame.groupby("user_id") if len(group) >= min_months]
+
+
+def backtest_series(task: Tuple[str, pd.DataFrame, str, int, int, int, int]) -> List[dict]:
+    """
+    Worker: all rolling origins of one series for one engine. Peak memory is measured on a separate
+    re-run of every `memory_every`-th fit so tracemalloc does not inflate the latency figures.
+    """
+    series_id, history, engine, horizon, min_train, step, memory_every = task
+    records = []
+    y = history["y"].to_numpy(dtype=float)
+    for i, origin in enumerate(range(min_train, len(history) - horizon + 1, step)):
+        train = history.iloc[:origin]
+        actual = y[origin:origin + horizon]
+        started = time.perf_counter()
+        try:
+            forecast = run_engine(engine, train, horizon)
+        except Exception as e:
+            records.append({"series": series_id, "engine": engine, "months": origin, "error": str(e)})
+            continue
+        fit_ms = (time.perf_counter() - started) * 1000
+        peak_kb = None
+        if memory_every and i % memory_every == 0:
+            tracemalloc.start()
+            run_engine(engine, train, horizon)
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+        yhat = forecast["yhat"].to_numpy(dtype=float)[:len(actual)]
+        denominator = np.abs(actual) + np.abs(yhat)
+        smape = float(np.mean(np.where(denominator > 0, 2 * np.abs(yhat - actual) / np.maximum(denominator, 1e-9), 0.0)))
+        total_ape = abs(yhat.sum() - actual.sum()) / max(abs(actual.sum()), 1e-9)
+        covered = (actual >= forecast["yhat_lower"].to_numpy()[:len(actual)]) & \
+                  (actual <= forecast["yhat_upper"].to_numpy()[:len(actual)])
+        records.append({"series": series_id, "engine": engine, "months": origin, "smape": smape,
+                        "total_ape": float(total_ape), "coverage": float(covered.mean()),
+                        "fit_ms": fit_ms, "peak_kb": peak_kb})
+    return records
+
+
+def summarize(records: List[dict]) -> dict:
+    ok = [r for r in records if "error" not in r]
+    if not ok:
+        return {"origins": 0, "errors": len(records)}
+    fit = np.array([r["fit_ms"] for r in ok])
+    peaks = [r["peak_kb"] for r in ok if r["peak_kb"] is not None]
+    return {
+        "origins": len(ok),
+        "errors": len(records) - len(ok),
+        "smape": round(float(np.mean([r["smape"] for r in ok])), 4),
+        "total_ape": round(float(np.mean([r["total_ape"] for r in ok])), 4),
+        "coverage": round(float(np.mean([r["coverage"] for r in ok])), 3),
+        "fit_ms_median": round(float(np.median(fit)), 3),
+        "fit_ms_p95": round(float(np.percentile(fit, 95)), 3),
+        "peak_kb_max": round(float(max(peaks)), 1) if peaks else None,
+    }
+
+
+def build_policy(by_bucket: Dict[str, Dict[str, dict]], metric: str, target: float, horizon: int) -> dict:
+    """
+    Per bucket: the engine with the lowest median fit latency among those whose mean `metric` is
+    within `target`; when none qualifies, the most accurate one.
+    """
+    rules = []
+    for low, high in BUCKETS:
+        stats = {engine: s for engine, s in by_bucket.get(label(low, high), {}).items() if s.get("origins")}
+        if not stats:
+            continue
+        meeting = [engine for engine, s in stats.items() if s[metric] <= target]
+        if meeting:
+            engine = min(meeting, key=lambda e: stats[e]["fit_ms_median"])
+        else:
+            engine = min(stats, key=lambda e: stats[e][metric])
+        rules.append({"min_months": low, "max_months": high, "engine": engine, metric: stats[engine][metric],
+                      "fit_ms_median": stats[engine]["fit_ms_median"], "meets_target": bool(meeting)})
+    return {"generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "metric": metric,
+            "target": target, "horizon": horizon, "rules": rules}
+
+
+def label(low: int, high: Optional[int]) -> str:
+    return f"{low}-{high}" if high is not None else f"{low}+"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, default=100, help="synthetic series to generate")
+    parser.add_argument("--store", help="backtest the users in this transaction store instead")
+    parser.add_argument("--engines", nargs="+", default=None, help=f"default: all installed of {list(ENGINES)}")
+    parser.add_argument("--horizon", type=int, default=FORECAST_HORIZON, help="months scored after each origin")
+    parser.add_argument("--min-train", type=int, default=6)
+    parser.add_argument("--step", type=int, default=3, help="months between rolling origins")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--memory-every", type=int, default=4, help="measure peak memory on every Nth fit (0: never)")
+    parser.add_argument("--metric", choices=["total_ape", "smape"], default="total_ape")
+    parser.add_argument("--target", type=float, default=0.15, help="accuracy target for the policy")
+    parser.add_argument("--policy", help="write the selection policy JSON to this file")
+    parser.add_argument("--output", help="write the full report as JSON to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.policy and args.horizon != FORECAST_HORIZON:
+        parser.error(f"--policy needs --horizon {FORECAST_HORIZON}, the horizon the API forecasts")
+
+    engines = args.engines or list(available_engines())
+    skipped = [engine for engine in engines if engine not in available_engines()]
+    engines = [engine for engine in engines if engine not in skipped]
+    corpus = load_store_corpus(args.store, args.min_train + args.horizon) if args.store \
+        else monthly_series(args.series, args.seed, min_months=args.min_train + args.horizon)
+    tasks = [(series_id, history, engine, args.horizon, args.min_train, args.step, args.memory_every)
+             for series_id, history in corpus for engine in engines]
+    print(f"Backtesting {len(engines)} engines on {len(corpus)} series ({len(tasks)} tasks, "
+          f"{args.workers} workers)", file=sys.stderr)
+
+    started = time.perf_counter()
+    records: List[dict] = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for result in pool.map(backtest_series, tasks, chunksize=max(1, len(tasks) // (args.workers * 8))):
+            records.extend(result)
+    elapsed = time.perf_counter() - started
+
+    by_bucket: Dict[str, Dict[str, dict]] = {}
+    for low, high in BUCKETS:
+        for engine in engines:
+            in_bucket = [r for r in records if r["engine"] == engine and bucket_of(r["months"]) == (low, high)]
+            if in_bucket:
+                by_bucket.setdefault(label(low, high), {})[engine] = summarize(in_bucket)
+    report = {
+        "benchmark": "backtest",
+        "corpus": args.store or f"synthetic:{args.series}:seed={args.seed}",
+        "series": len(corpus),
+        "horizon": args.horizon,
+        "elapsed_seconds": round(elapsed, 2),
+        "skipped_engines": {engine: "not installed" for engine in skipped},
+        "overall": {engine: summarize([r for r in records if r["engine"] == engine]) for engine in engines},
+        "by_history_months": by_bucket,
+    }
+    policy = build_policy(by_bucket, args.metric, args.target, args.horizon)
+    report["policy"] = policy
+    print(json.dumps(report, indent=2))
+    if args.policy:
+        with open(args.policy, "w") as handle:
+            json.dump(policy, handle, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
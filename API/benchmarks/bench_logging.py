@@ -0,0 +1,98 @@
+"""
+Per-request cost of logging on the /forecast_expenses/ hot path, before and after log_config.
+
+Replays the log calls one forecast request makes (payload dumps included) against:
+  before - logging.basicConfig(level=DEBUG) writing synchronously, arguments built eagerly
+  after  - configure_logging() at INFO behind a QueueHandler, payloads behind Lazy()/summarize()
+
+Run from the API directory:  python -m benchmarks.bench_logging [--requests 2000] [--output out.json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from log_config import configure_logging, Lazy, summarize
+
+
+def _payloads(transactions: int):
+    dates = pd.date_range("2020-01-01", periods=transactions, freq="D")
+    raw = [{"date": d.strftime("%Y-%m-%d"), "amount": float(a), "category": "Food"}
+           for d, a in zip(dates, np.random.default_rng(0).uniform(10, 500, transactions))]
+    monthly = pd.DataFrame({"ds": dates, "y": [r["amount"] for r in raw]}).groupby(
+        pd.Grouper(key="ds", freq="MS"))["y"].sum().reset_index()
+    body = json.dumps({"transactions": raw}).encode()
+    return raw, monthly, body
+
+
+def before_request(logger, raw, monthly, body):
+    logger.debug("Received /forecast_expenses/ request with data: %s, file: %s", raw, None)
+    logger.debug("Raw request body: %s", body.decode("utf-8", errors="ignore"))
+    logger.debug("Aggregated to %d monthly data points: %s", len(monthly), monthly.to_dict("records"))
+    logger.debug("Processed transaction data: %s", monthly.to_dict())
+    logger.debug("Forecast results: %s", {"1_month": 1.0, "1_year": 12.0})
+    logger.info("Returning /forecast_expenses/ response")
+
+
+def after_request(logger, raw, monthly, body):
+    logger.debug("Received /forecast_expenses/ request: %s, file: %s", summarize(raw), None)
+    logger.debug("Raw request body: %d bytes", len(body))
+    logger.debug("Aggregated %d transactions to %d monthly data points", len(raw), len(monthly))
+    logger.debug("Processed %d monthly data points", len(monthly))
+    logger.debug("Forecast results: %s", Lazy(lambda: {"1_month": 1.0, "1_year": 12.0}))
+    logger.info("Returning /forecast_expenses/ response")
+
+
+def measure(fn, logger, payloads, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        fn(logger, *payloads)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--transactions", type=int, default=1000)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    payloads = _payloads(args.transactions)
+    sink = open(os.devnull, "w")
+    logger = logging.getLogger("bench")
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    logging.basicConfig(level=logging.DEBUG, stream=sink, force=True)
+    before = measure(before_request, logger, payloads, args.requests)
+
+    configure_logging(level="INFO", stream=sink)
+    after = measure(after_request, logger, payloads, args.requests)
+
+    configure_logging(level="DEBUG", fmt="json", debug_sample=0.01, stream=sink)
+    sampled = measure(after_request, logger, payloads, args.requests)
+
+    results = {
+        "benchmark": "logging_per_request",
+        "requests": args.requests,
+        "transactions": args.transactions,
+        "before_debug_sync_us": round(before, 2),
+        "after_info_queue_us": round(after, 2),
+        "after_debug_json_sampled_1pct_us": round(sampled, 2),
+        "speedup": round(before / after, 1) if after else None,
+    }
+    logging.shutdown()
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Local stand-ins for the network and model dependencies of the API, plus payload generators.
+
+install_fakes() must run before `main` is imported. It replaces Gemini, yfinance and googletrans
+with fakes that sleep for a configurable latency, and (unless tiny_models is set) replaces the
+transformers pipelines with a canned generator. patch_app() then swaps the Wikidata lookup and
+disables the per-IP rate limits so a single client can drive the app.
+"""
+import sys
+import time
+import types
+import asyncio
+import importlib.util
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+@dataclass
+class FakeLatency:
+    gemini: float = 0.3
+    yfinance: float = 0.1
+    translate: float = 0.05
+    wikidata: float = 0.1
+    hf: float = 0.05
+
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def install_fakes(latency: FakeLatency, tiny_models: bool = False) -> Dict[str, str]:
+    """
+    Register fake modules in sys.modules. Returns which backends are real and which are stubbed.
+    """
+    backends = {"gemini": "fake", "yfinance": "fake", "googletrans": "fake", "wikidata": "fake"}
+
+    class GenerativeModel:
+        def __init__(self, name):
+            self.name = name
+
+        def generate_content(self, prompt, **kwargs):
+            time.sleep(latency.gemini)
+            return types.SimpleNamespace(text=f"Fake Gemini advice for a {len(str(prompt))}-character prompt.")
+
+    google = sys.modules.get("google") or _module("google")
+    google.__path__ = getattr(google, "__path__", [])
+    google.generativeai = _module("google.generativeai", configure=lambda **kwargs: None, GenerativeModel=GenerativeModel)
+
+    class Ticker:
+        def __init__(self, ticker, session=None):
+            self.ticker = ticker
+
+        @property
+        def info(self):
+            time.sleep(latency.yfinance)
+            return {"longName": f"{self.ticker} Fund", "regularMarketPrice": 100.0, "sector": "Index"}
+
+    _module("yfinance", Ticker=Ticker)
+
+    class Translator:
+        def translate(self, text, dest="en", src="auto"):
+            time.sleep(latency.translate)
+            if isinstance(text, list):
+                return [types.SimpleNamespace(text=f"[{dest}] {t}") for t in text]
+            return types.SimpleNamespace(text=f"[{dest}] {text}")
+
+    _module("googletrans", Translator=Translator)
+
+    if tiny_models and importlib.util.find_spec("transformers"):
+        import transformers
+        real_pipeline = transformers.pipeline
+        tiny = {"text-generation": "sshleifer/tiny-gpt2"}
+
+        def pipeline(task, model=None, **kwargs):
+            kwargs.pop("revision", None)
+            return real_pipeline(task, model=tiny.get(task, model), **kwargs)
+
+        transformers.pipeline = pipeline
+        backends["transformers"] = "tiny"
+    else:
+        class Pipeline:
+            def __init__(self, task):
+                self.task = task
+
+            def __call__(self, inputs, **kwargs):
+                time.sleep(latency.hf)
+                return [{"generated_text": f"{inputs} Keep a monthly budget and automate savings."}]
+
+        class StoppingCriteria:
+            def __call__(self, input_ids, scores, **kwargs):
+                return False
+
+        _module("transformers", pipeline=lambda task, model=None, **kwargs: Pipeline(task),
+                StoppingCriteria=StoppingCriteria, StoppingCriteriaList=list)
+        backends["transformers"] = "fake"
+
+    if not importlib.util.find_spec("langchain"):
+        class PromptTemplate:
+            def __init__(self, input_variables, template):
+                self.template = template
+
+            def format(self, **kwargs):
+                return self.template.format(**kwargs)
+
+        _module("langchain", __path__=[])
+        _module("langchain.prompts", PromptTemplate=PromptTemplate)
+    if not importlib.util.find_spec("tabula"):
+        _module("tabula", read_pdf=lambda *args, **kwargs: [])
+        backends["tabula"] = "fake"
+
+    backends["prophet"] = "real" if importlib.util.find_spec("prophet") else "fake"
+    if backends["prophet"] == "fake":
+        _module("prophet", Prophet=_MeanProphet)
+    return backends
+
+
+class _MeanProphet:
+    """
+    Flat-mean stand-in used only when prophet is not installed; keeps the pipeline runnable.
+    """
+
+    def __init__(self, **kwargs):
+        self.df = None
+
+    def fit(self, df):
+        self.df = df.copy()
+        return self
+
+    def make_future_dataframe(self, periods, freq):
+        import pandas as pd
+        future = pd.date_range(self.df["ds"].max(), periods=periods + 1, freq=freq)[1:]
+        return pd.DataFrame({"ds": pd.concat([self.df["ds"], pd.Series(future)], ignore_index=True)})
+
+    def predict(self, future):
+        import pandas as pd
+        mean = float(self.df["y"].mean())
+        return pd.DataFrame({"ds": future["ds"], "yhat": mean, "yhat_lower": mean * 0.8, "yhat_upper": mean * 1.2})
+
+
+def patch_app(main, latency: FakeLatency):
+    async def explain_term(term: str) -> str:
+        await asyncio.sleep(latency.wikidata)
+        return f"{term}: a way of investing a fixed amount at regular intervals."
+
+    main.explain_term = explain_term
+    main.limiter.enabled = False
+
+
+def transactions(count: int, seed: int = 0, start: str = "2022-01-01") -> List[dict]:
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=count, freq=f"{max(1, int(730 * 24 / max(count, 1)))}h")
+    categories = np.array(["Food", "Rent", "Transport", "Shopping", "Utilities"])
+    return [
+        {"date": d.strftime("%Y-%m-%d"), "amount": round(float(a), 2), "category": str(c)}
+        for d, a, c in zip(dates, rng.gamma(2.0, 150.0, count), rng.choice(categories, count))
+    ]
+
+
+def transactions_csv(count: int, seed: int = 0) -> bytes:
+    rows = ["date,amount,category"] + [f"{t['date']},{t['amount']},{t['category']}" for t in transactions(count, seed)]
+    return "\n".join(rows).encode()
+
+
+def financial_data(with_transactions: int = 0) -> dict:
+    data = {
+        "income": 5000.0,
+        "expenses": 3000.0,
+        "goals": [{"description": "Buy a car", "cost": 20000.0, "priority": 1}],
+        "duration_months": 12,
+        "currency": "INR",
+        "spending_categories": {"Food": 1200.0, "Rent": 1500.0, "Transport": 300.0},
+    }
+    if with_transactions:
+        data["transactions"] = transactions(with_transactions)
+    return data
+
+
+def monthly_series(count: int, seed: int = 0, min_months: int = 6, max_months: int = 60) -> List[Tuple[str, "pd.DataFrame"]]:
+    """
+    Synthetic monthly spending histories (ds, y) of varying length with a mix of level, trend,
+    yearly seasonality, noise and occasional one-off spikes, for backtesting forecast engines.
+    """
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for i in range(count):
+        months = int(rng.integers(min_months, max_months + 1))
+        t = np.arange(months)
+        level = rng.gamma(4.0, 5000.0)
+        trend = level * rng.normal(0, 0.01) * t
+        season = level * rng.choice([0.0, rng.uniform(0.05, 0.3)]) * np.sin(2 * np.pi * (t + rng.integers(12)) / 12)
+        noise = level * rng.uniform(0.02, 0.25) * rng.standard_normal(months)
+        spikes = level * (rng.random(months) < 0.05) * rng.uniform(0.5, 1.5, months)
+        y = np.maximum(level + trend + season + noise + spikes, 0.1 * level)
+        ds = pd.date_range(end="2025-06-01", periods=months, freq="MS")
+        corpus.append((f"synthetic-{i}", pd.DataFrame({"ds": ds, "y": y.round(2)})))
+    return corpus
+
+
+def price_history(tickers: int, years: int = 30, seed: int = 0) -> "pd.DataFrame":
+    """
+    Synthetic daily closes (business days, one column per ticker) from correlated geometric Brownian
+    motion; some tickers list later and have no prices before then.
+    """
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-06-30", periods=years * 252)
+    market = rng.normal(0.0003, 0.01, len(dates))
+    beta = rng.uniform(0.5, 1.5, tickers)
+    returns = market[:, None] * beta + rng.normal(0.0001, 0.012, (len(dates), tickers))
+    closes = 100 * np.exp(np.cumsum(returns, axis=0))
+    listed = rng.integers(0, len(dates) // 2, tickers) * (rng.random(tickers) < 0.3)
+    closes[np.arange(len(dates))[:, None] < listed] = np.nan
+    return pd.DataFrame(closes, index=dates, columns=[f"T{i:04d}" for i in range(tickers)])
+
+
+
+def descriptions(count: int, seed: int = 0, distinct: int = 2000) -> List[str]:
+    """
+    Bank-statement style narrations drawn from `distinct` merchant/channel combinations, each with
+    a reference number, so most rows repeat a description up to the digits.
+    """
+    rng = np.random.default_rng(seed)
+    merchants = ["SWIGGY", "Zomato Ltd", "UBER INDIA", "BigBasket", "AMAZON PAY", "Netflix.com", "Airtel Broadband",
+                 "APOLLO PHARMACY", "IRCTC", "Starbucks", "HDFC EMI", "Zerodha SIP", "Shell Fuel", "Cafe Coffee Day",
+                 "Local Kirana Store", "Sharma Tailors", "Metro Cash", "PVR Cinemas", "MyGym Fitness", "Landlord Rent"]
+    channels = ["UPI", "POS", "NEFT", "IMPS", "ACH", "CARD"]
+    variants = [f"{rng.choice(channels)}/{rng.choice(merchants)} {rng.choice(['', 'BLR', 'MUM', 'DEL', 'Online'])}-{i}"
+                for i in range(distinct)]
+    picks = rng.integers(0, distinct, count)
+    refs = rng.integers(10 ** 5, 10 ** 9, count)
+    return [f"{variants[p].rsplit('-', 1)[0]}/{ref}" for p, ref in zip(picks, refs)]
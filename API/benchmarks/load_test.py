@@ -0,0 +1,144 @@
+"""
+In-process load test of the FastAPI app with stubbed AI and network backends.
+
+Drives /analyze/, /forecast_expenses/, /invest/ and /chat/ through an httpx ASGI transport at a
+fixed concurrency and reports throughput, latency percentiles, error counts and process RSS.
+
+Run from the API directory:
+    python -m benchmarks.load_test --requests 200 --concurrency 8 --output load.json
+    python -m benchmarks.load_test --endpoints forecast --gemini-latency 0.5
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import FakeLatency, install_fakes, patch_app, transactions, financial_data
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {}
+    values = np.array(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+def requests_for(endpoint: str, history: int):
+    """
+    (method, path, json body) for each scenario; every call uses a fresh history so caches stay cold
+    unless --warm is given.
+    """
+    if endpoint == "analyze":
+        return lambda i: ("POST", "/analyze/", financial_data())
+    if endpoint == "forecast":
+        return lambda i: ("POST", "/forecast_expenses/", {"transactions": transactions(history, seed=i)})
+    if endpoint == "invest":
+        return lambda i: ("POST", "/invest/", financial_data(with_transactions=24))
+    if endpoint == "chat":
+        return lambda i: ("POST", "/chat/", {"question": "How much should I save each month?",
+                                            "user_data": financial_data(with_transactions=24)})
+    raise ValueError(f"Unknown endpoint {endpoint}")
+
+
+async def drive(client, build, total: int, concurrency: int, warm: bool):
+    latencies, statuses = [], {}
+    counter = iter(range(total))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        method, path, body = build(0 if warm else i)
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in counter))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def run(args, main):
+    import httpx
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for endpoint in args.endpoints:
+                build = requests_for(endpoint, args.history)
+                await drive(client, build, min(args.concurrency, args.requests), args.concurrency, args.warm)
+                rss_before = rss_mb()
+                latencies, statuses, elapsed = await drive(client, build, args.requests, args.concurrency, args.warm)
+                results.append({
+                    "endpoint": endpoint,
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "throughput_rps": round(args.requests / elapsed, 2),
+                    **percentiles(latencies),
+                    "status_counts": {str(k): v for k, v in sorted(statuses.items())},
+                    "rss_mb_before": round(rss_before, 1),
+                    "rss_mb_after": round(rss_mb(), 1),
+                })
+                print(json.dumps(results[-1]), file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", default=["analyze", "forecast", "invest", "chat"],
+                        choices=["analyze", "forecast", "invest", "chat"])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--history", type=int, default=365, help="transactions per forecast request")
+    parser.add_argument("--warm", action="store_true", help="repeat identical payloads so caches are hit")
+    parser.add_argument("--gemini-latency", type=float, default=FakeLatency.gemini)
+    parser.add_argument("--yfinance-latency", type=float, default=FakeLatency.yfinance)
+    parser.add_argument("--translate-latency", type=float, default=FakeLatency.translate)
+    parser.add_argument("--wikidata-latency", type=float, default=FakeLatency.wikidata)
+    parser.add_argument("--hf-latency", type=float, default=FakeLatency.hf)
+    parser.add_argument("--tiny-models", action="store_true", help="run real transformers with tiny checkpoints")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    latency = FakeLatency(args.gemini_latency, args.yfinance_latency, args.translate_latency,
+                          args.wikidata_latency, args.hf_latency)
+    workdir = tempfile.mkdtemp(prefix="zenith-bench-")
+    os.environ.setdefault("ZENITH_STORE_PATH", os.path.join(workdir, "transactions.db"))
+    os.environ.setdefault("ZENITH_JOBS_PATH", os.path.join(workdir, "jobs.db"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    backends = install_fakes(latency, tiny_models=args.tiny_models)
+    import main as app_main
+    patch_app(app_main, latency)
+
+    results = asyncio.run(run(args, app_main))
+    report = {"benchmark": "load_test", "backends": backends, "fake_latency_s": vars(latency), "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
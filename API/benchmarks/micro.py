@@ -0,0 +1,170 @@
+"""
+Micro-benchmarks for the CPU-bound building blocks of the forecast pipeline.
+
+Times parse_transactions (CSV), columnar uploads (Arrow, Parquet, msgpack via parse_transaction_frame),
+aggregate_transactions, detect_anomalies, assess_risk and a Prophet fit+predict over generated
+histories, and reports median / p95 / min per call in milliseconds plus the upload payload sizes.
+The portfolio analytics of /invest/ are timed against a generated price store of --price-tickers
+tickers and --price-years years of daily closes. Transaction categorization is timed on
+--categorize-rows generated descriptions: cold (fresh engine, nothing cached), warm (all cached) and
+with every description distinct, reported as rows per second.
+Prophet and pyarrow cases are reported as skipped when those packages are not installed.
+
+Run from the API directory:
+    python -m benchmarks.micro --sizes 100 1000 10000 --output micro.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import importlib.util
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import FakeLatency, install_fakes, transactions, transactions_csv, price_history, descriptions
+
+
+def bench(fn, repeat: int) -> dict:
+    fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    values = np.array(timings)
+    return {"median_ms": round(float(np.median(values)), 3),
+            "p95_ms": round(float(np.percentile(values, 95)), 3),
+            "min_ms": round(float(values.min()), 3),
+            "repeat": repeat}
+
+
+def columnar_payloads(df: pd.DataFrame, pa, msgpack) -> dict:
+    payloads = {}
+    if pa is not None:
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        payloads["arrow"] = sink.getvalue().to_pybytes()
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink)
+        payloads["parquet"] = sink.getvalue().to_pybytes()
+    if msgpack is not None:
+        payloads["msgpack"] = msgpack.packb(df.to_dict(orient="list"))
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--prophet-repeat", type=int, default=3)
+    parser.add_argument("--price-tickers", type=int, default=500)
+    parser.add_argument("--price-years", type=int, default=30)
+    parser.add_argument("--categorize-rows", type=int, default=100000)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    prophet_installed = importlib.util.find_spec("prophet") is not None
+    install_fakes(FakeLatency(0, 0, 0, 0, 0))
+    from models import Transaction
+    from log_config import configure_logging
+    from analyze.transaction_parser import parse_transactions, parse_transaction_frame, pa, msgpack
+    from analyze.investment_forecast import aggregate_transactions, detect_anomalies
+    from analyze.risk_management import assess_risk
+    configure_logging()
+
+    results = []
+    for size in args.sizes:
+        csv = transactions_csv(size)
+        txs = [Transaction(**t) for t in transactions(size)]
+        monthly = aggregate_transactions(txs)
+        entry = {
+            "transactions": size,
+            "parse_transactions_csv": bench(lambda: parse_transactions(csv, is_file=True, file_type="csv"), args.repeat),
+            "payload_bytes": {"json": len(json.dumps({"transactions": transactions(size)})), "csv": len(csv)},
+            "aggregate_transactions": bench(lambda: aggregate_transactions(txs), args.repeat),
+            "detect_anomalies": bench(lambda: detect_anomalies(monthly.copy()), args.repeat),
+            "assess_risk": bench(lambda: assess_risk(txs), args.repeat),
+        }
+        for file_type, payload in columnar_payloads(pd.DataFrame(transactions(size)), pa, msgpack).items():
+            entry["payload_bytes"][file_type] = len(payload)
+            entry[f"parse_{file_type}"] = bench(lambda: parse_transaction_frame(payload, file_type), args.repeat)
+        if pa is None:
+            entry["parse_arrow"] = entry["parse_parquet"] = "skipped: pyarrow not installed"
+        if prophet_installed:
+            from prophet import Prophet
+
+            def fit():
+                model = Prophet(yearly_seasonality=True, weekly_seasonality=True, daily_seasonality=False,
+                                interval_width=0.95)
+                model.fit(monthly)
+                model.predict(model.make_future_dataframe(periods=12, freq="MS"))
+
+            entry["prophet_fit_predict"] = bench(fit, args.prophet_repeat)
+        else:
+            entry["prophet_fit_predict"] = "skipped: prophet not installed"
+        results.append(entry)
+        print(json.dumps(entry), file=sys.stderr)
+
+    from analyze.portfolio import PriceStore, write_store, get_store, backtest, monte_carlo, analyze_portfolio
+    with tempfile.TemporaryDirectory() as path:
+        write_store(price_history(args.price_tickers, args.price_years), path)
+        store = get_store(path)
+        mix = store.tickers[:4]
+        history = backtest(store, {ticker: 1.0 for ticker in mix}, 1000.0, years=args.price_years)
+        portfolio = {
+            "tickers": args.price_tickers,
+            "years": args.price_years,
+            "store_bytes": sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)),
+            "open_store": bench(lambda: PriceStore(path), args.repeat),
+            "window_all_tickers": bench(lambda: store.window(store.tickers), args.repeat),
+            "backtest_4_tickers": bench(lambda: backtest(store, {ticker: 1.0 for ticker in mix}, 1000.0,
+                                                         years=args.price_years), args.repeat),
+            "monte_carlo_360_months": bench(lambda: monte_carlo(history["monthly_returns"], 1000.0, 360), args.repeat),
+            "analyze_portfolio": bench(lambda: analyze_portfolio(mix, 1000.0, 120, store=store), args.repeat),
+        }
+        del store
+    print(json.dumps(portfolio), file=sys.stderr)
+
+    from analyze.categorizer import (CategorizationEngine, KeywordCategorizer, load_merchant_categories,
+                                     normalize_descriptions, train_from_keywords)
+    keywords = load_merchant_categories()
+    model = train_from_keywords(keywords)
+    rows = args.categorize_rows
+    repeated = pd.Series(descriptions(rows))
+    # Digits are normalized away, so make every description distinct with a letter suffix
+    distinct = pd.Series([f"{text} {str(i).translate(str.maketrans('0123456789', 'abcdefghij'))}"
+                          for i, text in enumerate(descriptions(rows, seed=1, distinct=rows))])
+
+    def fresh_engine():
+        return CategorizationEngine(KeywordCategorizer(keywords), model, cache_size=2 * rows)
+
+    def throughput(timing: dict) -> dict:
+        return {**timing, "rows_per_second": int(rows / (timing["median_ms"] / 1000))}
+
+    warm = fresh_engine()
+    repeat = max(3, args.repeat // 4)
+    categorize = {
+        "rows": rows,
+        "distinct_normalized": int(normalize_descriptions(repeated).nunique()),
+        "cold": throughput(bench(lambda: fresh_engine().categorize(repeated), repeat)),
+        "warm": throughput(bench(lambda: warm.categorize(repeated), repeat)),
+        "all_distinct_cold": throughput(bench(lambda: fresh_engine().categorize(distinct), repeat)),
+    }
+    print(json.dumps(categorize), file=sys.stderr)
+
+    report = {"benchmark": "micro", "results": results, "portfolio": portfolio, "categorize": categorize}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Memory per worker of the gunicorn deployment (gunicorn.conf.py) as the worker count grows.
+
+For every worker count, starts gunicorn with and without preload_app, drives --requests /analyze/
+calls so the workers actually generate with their models, and then reads /proc/<pid>/smaps_rollup of
+the master and every worker:
+    unique_mb  Private_Clean + Private_Dirty, what the worker costs on its own
+    shared_mb  Shared_Clean + Shared_Dirty, pages also mapped by another process
+    pss_mb     proportional share; the sum over all processes is the real memory bill
+Linux only. --tiny-models serves the app with the small test models and stubbed network backends
+of benchmarks.fixtures (the real transformers and torch packages are still required).
+
+Run from the API directory:
+    python -m benchmarks.worker_memory --workers 1 2 4 --output worker_memory.json
+"""
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixtures import FakeLatency, financial_data
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def tiny_app():
+    """
+    App factory for `gunicorn benchmarks.worker_memory:tiny_app()`.
+    """
+    from benchmarks.fixtures import install_fakes, patch_app
+    install_fakes(FakeLatency(0, 0, 0, 0, 0), tiny_models=True)
+    import main
+    patch_app(main, FakeLatency(0, 0, 0, 0, 0))
+    return main.app
+
+
+def smaps_rollup(pid: int) -> Dict[str, float]:
+    """
+    Memory of one process in MB from /proc/<pid>/smaps_rollup.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            name, _, rest = line.partition(":")
+            if name in SMAPS_FIELDS:
+                values[name] = int(rest.split()[0]) / 1024
+    return {
+        "rss_mb": round(values["Rss"], 1),
+        "pss_mb": round(values["Pss"], 1),
+        "shared_mb": round(values["Shared_Clean"] + values["Shared_Dirty"], 1),
+        "unique_mb": round(values["Private_Clean"] + values["Private_Dirty"], 1),
+    }
+
+
+def children(pid: int) -> List[int]:
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may contain spaces; fields after it are fixed
+                ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return sorted(found)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def post(url: str, payload: dict, timeout: float) -> int:
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def wait_ready(url: str, master: subprocess.Popen, workers: int, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if master.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {master.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/metrics", timeout=5):
+                if len(children(master.pid)) >= workers:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"gunicorn did not start {workers} workers within {timeout:.0f}s")
+
+
+def measure(workers: int, preload: bool, args) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    state = tempfile.mkdtemp(prefix="zenith-workers-")
+    env = dict(os.environ, ZENITH_WORKERS=str(workers), ZENITH_PRELOAD="1" if preload else "0",
+               ZENITH_BIND=f"127.0.0.1:{port}", ZENITH_PRECOMPUTE="0", LOG_LEVEL="WARNING",
+               ZENITH_JOBS_PATH=os.path.join(state, "jobs.db"),
+               ZENITH_STORE_PATH=os.path.join(state, "transactions.db"),
+               ZENITH_RATE_LIMIT_STORAGE=f"sqlite:///{os.path.join(state, 'ratelimit.db')}")
+    app = "benchmarks.worker_memory:tiny_app()" if args.tiny_models else "main:app"
+    master = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", app], env=env)
+    try:
+        wait_ready(url, master, workers, args.start_timeout)
+        statuses = [post(f"{url}/analyze/", financial_data(), args.request_timeout) for _ in range(args.requests)]
+        # Let the workers settle (finished generations freed, gc run) before reading their maps
+        time.sleep(args.settle)
+        pids = children(master.pid)
+        per_worker = [smaps_rollup(pid) for pid in pids]
+        parent = smaps_rollup(master.pid)
+    finally:
+        master.send_signal(signal.SIGTERM)
+        try:
+            master.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            master.kill()
+    return {
+        "workers": workers,
+        "preload": preload,
+        "requests_ok": sum(status == 200 for status in statuses),
+        "master": parent,
+        "per_worker": per_worker,
+        "mean_unique_mb": round(sum(w["unique_mb"] for w in per_worker) / len(per_worker), 1),
+        "mean_shared_mb": round(sum(w["shared_mb"] for w in per_worker) / len(per_worker), 1),
+        "total_pss_mb": round(parent["pss_mb"] + sum(w["pss_mb"] for w in per_worker), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", choices=["preload", "no-preload"], default=["preload", "no-preload"])
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--settle", type=float, default=2.0)
+    parser.add_argument("--start-timeout", type=float, default=300.0)
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--tiny-models", action="store_true")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        for mode in args.modes:
+            entry = measure(workers, mode == "preload", args)
+            results.append(entry)
+            print(json.dumps({key: value for key, value in entry.items() if key != "per_worker"}), file=sys.stderr)
+
+    report = {"benchmark": "worker_memory", "tiny_models": args.tiny_models, "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from contextvars import ContextVar
+from typing import Dict, Optional
+import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Default per-request deadline in seconds (0: none). Clients may ask for a shorter one with an
+# X-Request-Timeout header, e.g. the timeout they will give up after.
+REQUEST_TIMEOUT = float(os.getenv("ZENITH_REQUEST_TIMEOUT", "120"))
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    """
+    Set when the request that owns it is abandoned. Worker threads inherit the request's token
+    through the context, so CPU-bound code can stop at a checkpoint() instead of finishing work
+    nobody will read.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str):
+        self.reason = reason
+        self._event.set()
+
+
+_current: ContextVar[Optional[CancelToken]] = ContextVar("cancel_token", default=None)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _current.get()
+
+
+def checkpoint():
+    """
+    Raise RequestCancelled if the current request has been abandoned. Safe to call from threads
+    started with asyncio.to_thread, which copy the request context.
+    """
+    token = _current.get()
+    if token is not None and token.cancelled:
+        raise RequestCancelled(token.reason)
+
+
+def request_deadline(headers: Dict[bytes, bytes], default: float = REQUEST_TIMEOUT) -> Optional[float]:
+    try:
+        requested = float(headers.get(b"x-request-timeout", b"0"))
+    except ValueError:
+        requested = 0.0
+    deadline = min(requested, default) if requested > 0 and default > 0 else requested or default
+    return deadline if deadline > 0 else None
+
+
+class CancellationMiddleware:
+    """
+    Runs each HTTP request as a task and cancels it when the client disconnects or the request
+    deadline passes. Cancellation reaches every await in the handler: admission waits are abandoned,
+    executor jobs that have not started are dropped, and the request's CancelToken is set so running
+    threads (and local generation, via a stopping criterion) stop at their next checkpoint. A request
+    past its deadline gets a 504 if nothing was sent yet; a disconnected client gets nothing.
+
+    The CPU time saved is estimated per route as the mean duration of its completed requests minus
+    the time the cancelled one had already run.
+    """
+
+    def __init__(self, app, timeout: float = REQUEST_TIMEOUT):
+        self.app = app
+        self.timeout = timeout
+        self._durations: Dict[str, float] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        deadline = request_deadline(headers, self.timeout)
+        disconnected = asyncio.Event()
+        body_read = asyncio.Event()
+        # Without a body the watcher can listen straight away; the app is handed an empty body once.
+        # A malformed Content-Length is treated as a body, left for the app to read (and reject).
+        try:
+            empty_body = int(headers.get(b"content-length", b"0") or 0) == 0 and b"transfer-encoding" not in headers
+        except ValueError:
+            empty_body = False
+        if empty_body:
+            body_read.set()
+        response_started = False
+
+        async def app_receive():
+            nonlocal empty_body
+            if disconnected.is_set():
+                return {"type": "http.disconnect"}
+            if body_read.is_set():
+                if empty_body:
+                    empty_body = False
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+            elif not message.get("more_body", False):
+                body_read.set()
+            return message
+
+        async def app_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        async def watch_disconnect():
+            # Once the body has been read, the only message left from the server is the disconnect
+            await body_read.wait()
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        token = CancelToken()
+        reset = _current.set(token)
+        try:
+            task = asyncio.ensure_future(self.app(scope, app_receive, app_send))
+        finally:
+            _current.reset(reset)
+        watcher = asyncio.ensure_future(watch_disconnect())
+        gone = asyncio.ensure_future(disconnected.wait())
+        started = time.perf_counter()
+        try:
+            done, _ = await asyncio.wait({task, gone}, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+            if task in done:
+                self._completed(scope, time.perf_counter() - started)
+                return task.result()
+            reason = "disconnect" if disconnected.is_set() else "deadline"
+            token.cancel(reason)
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
+            self._cancelled(scope, reason, time.perf_counter() - started)
+            if reason == "deadline" and not response_started:
+                body = json.dumps({"detail": "Request deadline exceeded"}).encode()
+                await send({"type": "http.response.start", "status": 504,
+                            "headers": [(b"content-type", b"application/json"),
+                                        (b"content-length", str(len(body)).encode())]})
+                await send({"type": "http.response.body", "body": body})
+        finally:
+            for pending in (task, watcher, gone):
+                if not pending.done():
+                    pending.cancel()
+
+    @staticmethod
+    def _route(scope) -> str:
+        route = scope.get("route")
+        return route.path if route else "unmatched"
+
+    def _completed(self, scope, elapsed: float):
+        route = self._route(scope)
+        previous = self._durations.get(route)
+        self._durations[route] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+
+    def _cancelled(self, scope, reason: str, elapsed: float):
+        route = self._route(scope)
+        metrics.inc("zenith_cancelled_requests_total", route=route, reason=reason)
+        expected = self._durations.get(route)
+        if expected is not None and expected > elapsed:
+            metrics.inc("zenith_cancelled_cpu_seconds_total", expected - elapsed, route=route)
+        logger.info("Cancelled %s %s after %.2fs (%s)", scope.get("method"), scope.get("path"), elapsed, reason)
@@ -0,0 +1,56 @@
+"""
+Multi-worker deployment. With preload_app the app, and with it the distilgpt2 weights and the
+Prophet/Stan backend, is imported once in the gunicorn master; workers are forked from it and share
+those pages copy-on-write instead of loading a copy each. Run from the API directory:
+    gunicorn -c gunicorn.conf.py main:app
+(`uvicorn --workers N` starts every worker from scratch and shares nothing.) Measure with
+    python -m benchmarks.worker_memory --workers 1 2 4
+
+Shared between workers through SQLite files: jobs, chat sessions and, by the default set below,
+rate-limit counters. Still per worker: the result and forecast caches and their precompute
+warming, provider circuit breakers, and the admission slots (ZENITH_CPU_SLOTS and
+ZENITH_LLM_SLOTS are per worker, so size them for the node divided by the worker count).
+"""
+import gc
+import os
+
+bind = os.getenv("ZENITH_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("ZENITH_WORKERS", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("ZENITH_PRELOAD", "1") == "1"
+# Kill workers stuck past the request deadline (see cancellation.REQUEST_TIMEOUT)
+timeout = int(float(os.getenv("ZENITH_REQUEST_TIMEOUT", "120"))) + 30
+graceful_timeout = 30
+
+# Read by the app (so it knows it shares the node) in the master and in every worker
+os.environ.setdefault("ZENITH_WORKERS", str(workers))
+if workers > 1:
+    # memory:// would give every worker its own counters, multiplying each limit by the worker count
+    os.environ.setdefault("ZENITH_RATE_LIMIT_STORAGE", "sqlite://ratelimit.db")
+
+if preload_app:
+    # Model tensors live in their own allocations that refcounting never writes to, but a cyclic
+    # garbage collection in a worker writes to the header of every tracked object it scans, which
+    # un-shares the pages of everything the master imported. Collecting while the app loads would also
+    # leave freed holes in those pages for workers to fill. So: no collections until the app is
+    # loaded, then freeze everything (moved to a permanent generation the collector skips) before
+    # each fork, and let workers collect only what they allocate themselves.
+    gc.disable()
+
+
+def when_ready(server):
+    # The app is loaded and no worker is forked yet; the master collects again from here on, only
+    # ever scanning what it allocates after the freeze
+    if preload_app:
+        gc.freeze()
+        gc.enable()
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        gc.enable()
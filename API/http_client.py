@@ -0,0 +1,141 @@
+import os
+import time
+import asyncio
+import threading
+from typing import Optional
+from urllib.parse import urlsplit
+import aiohttp
+import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_LIMIT = int(os.getenv("ZENITH_HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("ZENITH_HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_TIMEOUT = float(os.getenv("ZENITH_HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("ZENITH_HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_RETRIES = int(os.getenv("ZENITH_HTTP_RETRIES", "2"))
+# Retries may add at most this fraction of extra load on top of first attempts
+HTTP_RETRY_RATIO = float(os.getenv("ZENITH_HTTP_RETRY_RATIO", "0.1"))
+DNS_CACHE_SECONDS = 300
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RetryBudget:
+    """
+    Token bucket shared by all outbound calls: every request deposits `ratio` tokens and every retry
+    spends one, so a failing upstream sees at most ~ratio extra traffic instead of a retry storm.
+    """
+
+    def __init__(self, ratio: float = HTTP_RETRY_RATIO, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+class HttpClient:
+    """
+    One keep-alive aiohttp session for every outbound call, opened and closed by the app lifespan.
+    Connections are pooled per host and DNS answers cached; requests get timeouts, budgeted retries
+    with backoff, and per-host latency and outcome metrics.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.retry_budget = RetryBudget()
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=HTTP_POOL_LIMIT, limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                                             ttl_dns_cache=DNS_CACHE_SECONDS, keepalive_timeout=30)
+            timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT, sock_connect=HTTP_CONNECT_TIMEOUT)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def stop(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("HTTP client not started; call http_client.start() in the app lifespan")
+        return self._session
+
+    def pool_stats(self):
+        connector = self._session.connector if self._session is not None and not self._session.closed else None
+        if connector is None:
+            return {}
+        # aiohttp keeps idle keep-alive connections per (host, port, ssl) key
+        return {(("host", key.host),): len(conns) for key, conns in getattr(connector, "_conns", {}).items()}
+
+    async def get_json(self, url: str, params: Optional[dict] = None, timeout: Optional[float] = None,
+                       retries: int = HTTP_RETRIES):
+        if self._session is None or self._session.closed:
+            await self.start()
+        host = urlsplit(url).hostname or "unknown"
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+                async with self.session.get(url, params=params, timeout=request_timeout) as response:
+                    outcome = str(response.status)
+                    if response.status not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+                    error: Exception = aiohttp.ClientResponseError(response.request_info, response.history,
+                                                                   status=response.status)
+            except asyncio.TimeoutError as e:
+                outcome, error = "timeout", e
+            except aiohttp.ClientResponseError:
+                raise
+            except aiohttp.ClientError as e:
+                error = e
+            finally:
+                elapsed = time.perf_counter() - started
+                metrics.observe("zenith_http_client_seconds", elapsed, host=host)
+                metrics.inc("zenith_http_client_requests_total", host=host, outcome=outcome)
+
+            if attempt >= retries or not self.retry_budget.withdraw():
+                logger.warning("GET %s failed after %d attempt(s): %s", host, attempt + 1, str(error) or type(error).__name__)
+                raise error
+            attempt += 1
+            await asyncio.sleep(0.1 * 2 ** (attempt - 1))
+
+
+http_client = HttpClient()
+
+_yfinance_sessions = threading.local()
+
+
+def yfinance_session():
+    """
+    Session for yfinance, one per thread: curl_cffi sessions are not thread-safe and yfinance calls run
+    concurrently on worker threads. Each thread's session keeps its connections pooled. Recent yfinance
+    releases only accept curl_cffi sessions; without it, None lets yfinance use its own module-wide session.
+    """
+    session = getattr(_yfinance_sessions, "session", None)
+    if session is None:
+        try:
+            from curl_cffi import requests as curl_requests
+            session = curl_requests.Session(impersonate="chrome")
+        except ImportError:
+            session = False
+        _yfinance_sessions.session = session
+    return session or None
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+from fastapi import HTTPException
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOBS_PATH = os.getenv("ZENITH_JOBS_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("ZENITH_JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("ZENITH_JOB_QUEUE_SIZE", "100"))
+# Every process renews a lease on its unfinished jobs each JOB_HEARTBEAT seconds; unfinished jobs whose
+# lease is older than JOB_LEASE belong to a process that is gone and are marked failed
+JOB_HEARTBEAT = float(os.getenv("ZENITH_JOB_HEARTBEAT", "10"))
+JOB_LEASE = float(os.getenv("ZENITH_JOB_LEASE", "60"))
+# Finished jobs (and their results) are deleted this long after their last update
+JOB_RETENTION = float(os.getenv("ZENITH_JOB_RETENTION", str(24 * 3600)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stages TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    owner TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, heartbeat_at);
+"""
+
+
+class JobContext:
+    """
+    Handed to a job runner so it can report stage-level progress.
+    """
+
+    def __init__(self, queue: "JobQueue", job_id: str, stages: List[Dict]):
+        self.queue = queue
+        self.job_id = job_id
+        self.stages = stages
+
+    def _stage(self, name: str) -> Dict:
+        for stage in self.stages:
+            if stage["name"] == name:
+                return stage
+        stage = {"name": name, "status": "pending"}
+        self.stages.append(stage)
+        return stage
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        stage = self._stage(name)
+        stage.update(status="running", started_at=time.time())
+        self.queue._update(self.job_id, stages=self.stages)
+        try:
+            yield
+        except BaseException:
+            stage.update(status="failed", finished_at=time.time())
+            self.queue._update(self.job_id, stages=self.stages)
+            raise
+        stage.update(status="done", finished_at=time.time(),
+                     seconds=round(time.time() - stage["started_at"], 3))
+        self.queue._update(self.job_id, stages=self.stages)
+
+
+class JobQueue:
+    """
+    In-process job queue: jobs are persisted in SQLite and executed by a fixed pool of asyncio workers.
+    Runner closures live in memory, so a job can only finish in the process that accepted it. Several
+    processes (gunicorn workers) share one jobs.db: each owns its jobs and keeps their lease fresh, and
+    only jobs whose owner stopped renewing are marked failed. Finished jobs expire after JOB_RETENTION.
+    """
+
+    def __init__(self, path: str = JOBS_PATH, workers: int = JOB_WORKERS, maxsize: int = JOB_QUEUE_SIZE):
+        self.path = path
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._lock = threading.Lock()
+        # Unique per process lifetime, so a restarted worker that reuses a pid does not adopt old jobs
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._connect()
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if columns and "owner" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+        self._conn.executescript(SCHEMA)
+        self._pid = os.getpid()
+
+    async def start(self):
+        # A connection must not be used across fork: workers forked from a preloading master open their own
+        if self._pid != os.getpid():
+            self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            self._connect()
+        self.maintain()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintenance_loop()))
+        logger.info("Started %d job workers", self.workers)
+
+    def maintain(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Renew the lease on this process's unfinished jobs, fail other processes' jobs whose lease
+        expired, and delete finished jobs past JOB_RETENTION.
+        """
+        now = now or time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                (now, self.owner)
+            )
+            orphaned = self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart', updated_at = ? "
+                "WHERE status IN ('queued', 'running') AND (owner IS NULL OR heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (now, now - JOB_LEASE)
+            ).rowcount
+            expired = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (now - JOB_RETENTION,)
+            ).rowcount
+        if orphaned or expired:
+            logger.info("Failed %d orphaned jobs, deleted %d expired jobs", orphaned, expired)
+        return {"orphaned": orphaned, "expired": expired}
+
+    async def _maintenance_loop(self):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT)
+            try:
+                self.maintain()
+            except sqlite3.Error as e:
+                logger.error("Job maintenance failed: %s", str(e))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def submit(self, kind: str, stages: List[str], runner: Callable[[JobContext], Awaitable[dict]]) -> str:
+        if self._queue is None:
+            raise HTTPException(status_code=503, detail="Job workers are not running")
+        if self._queue.full():
+            raise HTTPException(status_code=503, detail="Job queue is full, retry later")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        stage_list = [{"name": name, "status": "pending"} for name in stages]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, stages, created_at, updated_at, owner, heartbeat_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(stage_list), now, now, self.owner, now)
+            )
+        self._queue.put_nowait((job_id, stage_list, runner))
+        logger.debug("Queued %s job %s", kind, job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, stages, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        stages = json.loads(row[3])
+        done = sum(1 for stage in stages if stage["status"] == "done")
+        return {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "progress": round(done / len(stages), 2) if stages else 0.0,
+            "stages": stages,
+            "result": json.loads(row[4]) if row[4] else None,
+            "error": row[5],
+            "created_at": row[6],
+            "updated_at": row[7]
+        }
+
+    def _update(self, job_id: str, **fields):
+        if "stages" in fields:
+            fields["stages"] = json.dumps(fields["stages"])
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], default=str)
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        # A job failed as orphaned stays failed, even if its owner turns out to be alive after all
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ? AND owner = ? AND status IN ('queued', 'running')",
+                (*fields.values(), job_id, self.owner)
+            )
+
+    async def _worker(self, index: int):
+        while True:
+            job_id, stages, runner = await self._queue.get()
+            try:
+                self._update(job_id, status="running")
+                result = await runner(JobContext(self, job_id, stages))
+                self._update(job_id, status="done", result=result)
+                logger.debug("Job %s finished on worker %d", job_id, index)
+            except asyncio.CancelledError:
+                self._update(job_id, status="failed", error="Cancelled")
+                raise
+            except HTTPException as e:
+                self._update(job_id, status="failed", error=str(e.detail))
+            except Exception as e:
+                logger.error("Job %s failed: %s", job_id, str(e), exc_info=True)
+                self._update(job_id, status="failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+
+job_queue = JobQueue()
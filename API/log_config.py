@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import queue
+import random
+import atexit
+import logging
+import logging.handlers
+from typing import Callable, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+# Fraction of DEBUG records kept when running at DEBUG level (1.0 keeps everything)
+LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE", "1.0"))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class Lazy:
+    """
+    Defers building an expensive log argument until the record is actually emitted:
+
+        logger.debug("Monthly totals: %s", Lazy(lambda: monthly.to_dict('records')))
+    """
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], object]):
+        self.fn = fn
+
+    def __str__(self) -> str:
+        return str(self.fn())
+
+    __repr__ = __str__
+
+
+def summarize(value) -> str:
+    """
+    Short description of a payload (type and size) for logs that must not serialize it.
+    """
+    if value is None:
+        return "None"
+    size = getattr(value, "shape", None) or (len(value) if hasattr(value, "__len__") else None)
+    return f"{type(value).__name__}(size={size})" if size is not None else type(value).__name__
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class DebugSampler(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, debug_sample: float = LOG_DEBUG_SAMPLE,
+                      stream=None) -> logging.Logger:
+    """
+    Route all records through a QueueHandler so request handlers never block on I/O; a background
+    QueueListener formats (text or JSON) and writes them. Safe to call more than once.
+    """
+    global _listener
+    root = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else
+                        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    if debug_sample < 1.0:
+        queue_handler.addFilter(DebugSampler(debug_sample))
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    logging.getLogger("matplotlib").setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return root
+
+
+@atexit.register
+def _flush():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_after_fork():
+    """
+    The listener thread does not survive fork, so a forked worker (gunicorn preload_app) gets its own
+    queue and listener; records still queued in the parent are written by the parent only.
+    """
+    if _listener is None:
+        return
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.handlers.QueueHandler) and handler.queue is _listener.queue:
+            handler.queue = records
+    _listener.queue = records
+    _listener._thread = None
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
@@ -1,39 +1,69 @@
 from fastapi import FastAPI, HTTPException, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.encoders import jsonable_encoder
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from models import FinancialData, ExpenseForecastInput, Transaction, Goal
+from jobs import job_queue
+import metrics
+import profiling
+from admission import cpu_admission, llm_admission
+from cancellation import CancellationMiddleware
+import ratelimit_storage  # noqa: F401 (registers the sqlite:// rate-limit storage)
+from http_client import http_client, yfinance_session
+from precompute import PrecomputeScheduler
+from metrics import timed
 import matplotlib.pyplot as plt
 import io
+import os
+import time
 import base64
-from typing import List, Dict, Optional
+import hashlib
+from typing import List, Dict, Optional, Tuple
 import asyncio
+from contextlib import asynccontextmanager, nullcontext
 import pandas as pd
-from analyze.transaction_parser import parse_transactions
+from analyze.transaction_parser import (parse_transactions, stream_pdf_transactions, parse_transaction_frame,
+                                       Transactions, COLUMNAR_FORMATS, COLUMNAR_CONTENT_TYPES)
+from analyze.pdf_extractor import warm_up as warm_up_pdf_extractor, queue_depth as pdf_queue_depth
 from analyze.rule_based import analyze_savings
-from analyze.huggingface_ai import get_advice_from_prompt, preload_model
+from analyze.huggingface_ai import get_advice_from_prompt, preload_model, cache as advice_cache
+from analyze.llm_router import router as llm_router
+from analyze import chat_sessions
+from analyze.narrative import forecast_commentary, investment_commentary, enrichment_prompt
+from analyze.translation import translate_many, precompute as precompute_translations
 from analyze.planner import goal_feasibility, build_action_plan
 from analyze.prompt_engine import build_financial_prompt
-from analyze.investment_forecast import forecast_expenses, get_total
+from analyze.investment_forecast import (forecast_expenses, forecast_user_expenses, get_total, HORIZONS,
+                                         cache as forecast_cache)
+from analyze.transaction_store import (ingest_transactions, ingest_frames, average_category_spending, load_monthly_rollups,
+                                       get_activity, touch_user)
 from analyze.inflation_adjustment import adjusted_goal_cost
 from analyze.spending_behavior import analyze_behavior
 from analyze.term_explainer import explain_term
 from analyze.knowledge_base import get_faq_answer
-from analyze.risk_management import assess_risk
+from analyze.risk_management import assess_risk, assess_user_risk, category_averages, cache as risk_cache
+from analyze.portfolio import analyze_portfolio
+from analyze.forecast_engines import preload as preload_forecast_engines
 import logging
+from log_config import configure_logging, Lazy, summarize
 import google.generativeai as genai
 from pydantic import ValidationError
+from cachetools import TTLCache
 import json
 import yfinance as yf
-from langchain_huggingface import HuggingFacePipeline
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 from langchain.prompts import PromptTemplate
-from transformers import pipeline
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging (LOG_LEVEL, LOG_FORMAT=json|text, LOG_DEBUG_SAMPLE)
+configure_logging()
 logger = logging.getLogger(__name__)
-logging.getLogger('matplotlib.font_manager').setLevel(logging.WARNING)
 
 # Configure Gemini API
 GEMINI_API_KEY = "YOUR-API-KEY"
@@ -42,11 +72,62 @@ if GEMINI_API_KEY:
 else:
     logger.error("GEMINI_API_KEY not found in environment variables")
 
-app = FastAPI()
-limiter = Limiter(key_func=get_remote_address)
+# Return a Server-Timing breakdown on every response (otherwise only when X-Server-Timing is sent)
+SERVER_TIMING = os.getenv("ZENITH_SERVER_TIMING", "0") == "1"
+
+# Months of stored history read when forecasting by user id
+FORECAST_HISTORY_MONTHS = 36
+
+# Commentary is rendered from templates; set to 1 to rewrite it with an LLM unless a request passes enrich=false
+LLM_ENRICH_DEFAULT = os.getenv("ZENITH_LLM_ENRICH", "0") == "1"
+enrichment_cache = TTLCache(maxsize=500, ttl=6 * 3600)
+chart_cache = TTLCache(maxsize=500, ttl=3600)
+
+INVEST_NOTE = "Prices are indicative and subject to market changes."
+# Fixed English strings in responses, translated ahead of time for the client's languages
+STATIC_TEXTS = [INVEST_NOTE, "Set monthly budgets for discretionary categories to stabilize spending."]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_client.start()
+    await job_queue.start()
+    register_executor_gauges(asyncio.get_running_loop())
+    asyncio.get_running_loop().run_in_executor(None, warm_up_pdf_extractor)
+    asyncio.get_running_loop().run_in_executor(None, precompute_translations, STATIC_TEXTS)
+    await precompute_scheduler.start()
+    yield
+    await precompute_scheduler.stop()
+    await job_queue.stop()
+    await http_client.stop()
+
+# Rate-limit counters: memory:// is per worker process. With several workers on one node use
+# sqlite:///path/ratelimit.db (ratelimit_storage); across nodes use redis:// (or any scheme the `limits`
+# package supports), so every worker shares one budget per client.
+RATE_LIMIT_STORAGE = os.getenv("ZENITH_RATE_LIMIT_STORAGE", "memory://")
+WORKER_COUNT = int(os.getenv("ZENITH_WORKERS") or os.getenv("WEB_CONCURRENCY") or "1")
+if WORKER_COUNT > 1 and RATE_LIMIT_STORAGE.startswith("memory://"):
+    logger.warning("Rate limits use memory:// with %d workers, so every limit is multiplied by %d; "
+                   "set ZENITH_RATE_LIMIT_STORAGE to a shared backend (sqlite:// or redis://)",
+                   WORKER_COUNT, WORKER_COUNT)
+# Per-client budget of cost units shared by all endpoints, on top of their request-count limits
+COST_LIMIT = os.getenv("ZENITH_COST_LIMIT", "100/minute")
+# Base cost per endpoint; uploads add one unit per COST_UPLOAD_BYTES of body
+ROUTE_COSTS = {"analyze": 4, "forecast": 10, "forecast_job": 10, "ingest": 2, "invest": 4, "chat": 6}
+COST_UPLOAD_BYTES = 256 * 1024
+
+app = FastAPI(lifespan=lifespan)
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE,
+                  in_memory_fallback_enabled=not RATE_LIMIT_STORAGE.startswith("memory://"))
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+def request_cost(route: str):
+    base = ROUTE_COSTS[route]
+    return lambda request: base + int(request.headers.get("content-length") or 0) // COST_UPLOAD_BYTES
+
+def cost_limit(route: str):
+    return limiter.shared_limit(COST_LIMIT, scope="cost", cost=request_cost(route))
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:8501"],
@@ -55,37 +136,116 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Preload Hugging Face models
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    timings = metrics.start_request_timings()
+    profiler = None
+    if (profiling.is_authorized(request.headers.get("x-profile") or request.query_params.get("profile"))
+            and not request.url.path.startswith("/debug/profiles")):
+        profiler = profiling.start(request.method, request.url.path)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    except asyncio.CancelledError:
+        # Abandoned by the client or past its deadline (see CancellationMiddleware)
+        status = 499
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        route = request.scope.get("route")
+        metrics.observe("zenith_request_seconds", elapsed, route=route.path if route else "unmatched",
+                        method=request.method, status=status)
+        profile_id = profiling.finish(profiler, status, timings) if profiler else None
+    if SERVER_TIMING or request.headers.get("x-server-timing"):
+        response.headers["Server-Timing"] = metrics.server_timing_header(timings, elapsed)
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+# Added last so it is the outermost layer: abandoned requests are cancelled through the whole stack
+app.add_middleware(CancellationMiddleware)
+
+def register_executor_gauges(loop: asyncio.AbstractEventLoop):
+    def queue_depths():
+        depths = {(("executor", "jobs"),): job_queue.depth(),
+                  (("executor", "pdf"),): pdf_queue_depth()}
+        default_executor = getattr(loop, "_default_executor", None)
+        if default_executor is not None:
+            depths[(("executor", "default"),)] = default_executor._work_queue.qsize()
+        return depths
+
+    metrics.register_gauge("zenith_executor_queue_depth", queue_depths, "Work items waiting per executor.")
+    controllers = (cpu_admission, llm_admission)
+    metrics.register_gauge("zenith_admission_in_flight", lambda: {
+        (("resource", c.name),): c.in_flight for c in controllers
+    }, "Cost units currently admitted per resource.")
+    metrics.register_gauge("zenith_admission_waiting", lambda: {
+        (("resource", c.name),): c.waiting() for c in controllers
+    }, "Callers queued for admission per resource.")
+    metrics.register_gauge("zenith_llm_circuit_open", lambda: {
+        (("provider", name),): int(state != "closed") for name, state in llm_router.states().items()
+    }, "1 while a provider's circuit breaker is open or half-open.")
+    metrics.register_gauge("zenith_http_pool_idle_connections", http_client.pool_stats,
+                           "Idle keep-alive connections held per outbound host.")
+    metrics.register_gauge("zenith_cache_entries", lambda: {
+        (("cache", "advice"),): len(advice_cache),
+        (("cache", "forecast"),): len(forecast_cache),
+        (("cache", "enrichment"),): len(enrichment_cache),
+        (("cache", "risk"),): len(risk_cache),
+        (("cache", "chart"),): len(chart_cache)
+    }, "Entries currently held per TTLCache.")
+    metrics.register_gauge("zenith_chat_sessions", lambda: {(): chat_sessions.store.count()},
+                           "Chat sessions active within their TTL, across all workers.")
+    metrics.register_gauge("zenith_precompute_queue", lambda: {(): precompute_scheduler.queue_depth()},
+                           "Users waiting for background cache warming.")
+
+# Load models at import time: under gunicorn with preload_app (gunicorn.conf.py) this runs once in
+# the master and forked workers share the weights. /chat/ generates through llm_router, which uses
+# the same distilgpt2 pipeline as /analyze/.
 try:
     preload_model("distilgpt2")
-    logger.info("Simulating preload for bert-base-uncased")
 except Exception as e:
     logger.error("Failed to preload models: %s", str(e))
+preload_forecast_engines()
 
-# Initialize chatbot
-chatbot = pipeline("text-generation", model="distilgpt2")
-llm = HuggingFacePipeline(pipeline=chatbot)
 prompt_template = PromptTemplate(
     input_variables=["question", "context"],
     template="Question: {question}\nContext: {context}\nAnswer: "
 )
 
 def generate_forecast_chart(forecasts: Dict[str, float], currency: str) -> str:
+    """
+    Chart of the HORIZONS totals in `forecasts`, cached by their values. A failed render ("") is
+    not cached, so the next request tries again.
+    """
+    cache_key = (tuple(forecasts.get(label) for label in HORIZONS), currency)
+    metrics.record_cache("chart", cache_key in chart_cache)
+    if cache_key in chart_cache:
+        return chart_cache[cache_key]
+    chart = render_forecast_chart(forecasts, currency)
+    if chart:
+        chart_cache[cache_key] = chart
+    return chart
+
+def render_forecast_chart(forecasts: Dict[str, float], currency: str) -> str:
     try:
-        plt.figure(figsize=(8, 4))
-        periods = [1, 3, 6, 9, 12]
-        amounts = [forecasts[f"{p}_month{'s' if p > 1 else ''}"] for p in periods]
-        plt.plot(periods, amounts, 'b-', label='Forecasted Expenses')
-        plt.title('Expense Forecast')
-        plt.xlabel('Months')
-        plt.ylabel(f'Expenses ({currency})')
-        plt.grid(True)
-        plt.legend()
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close()
-        buf.seek(0)
-        return base64.b64encode(buf.read()).decode('utf-8')
+        with timed("chart"):
+            plt.figure(figsize=(8, 4))
+            periods = list(HORIZONS.values())
+            amounts = [forecasts[label] for label in HORIZONS]
+            plt.plot(periods, amounts, 'b-', label='Forecasted Expenses')
+            plt.title('Expense Forecast')
+            plt.xlabel('Months')
+            plt.ylabel(f'Expenses ({currency})')
+            plt.grid(True)
+            plt.legend()
+            buf = io.BytesIO()
+            plt.savefig(buf, format='png')
+            plt.close()
+            buf.seek(0)
+            return base64.b64encode(buf.read()).decode('utf-8')
     except Exception as e:
         logger.error("Chart generation failed: %s", str(e))
         return ""
@@ -94,62 +254,45 @@ async def get_gemini_advice(prompt: str, max_length: int = 300) -> str:
     if not GEMINI_API_KEY:
         return "Gemini API key not configured."
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        response = await asyncio.to_thread(
-            model.generate_content,
-            f"Provide concise financial advice (max {max_length} characters) based on this data: {prompt}"
+        result = await llm_router.generate(
+            f"Provide concise financial advice (max {max_length} characters) based on this data: {prompt}",
+            max_tokens=max_length
         )
-        advice = response.text.strip()
-        return advice[:max_length]
+        return result.text[:max_length]
     except Exception as e:
         logger.error("Gemini advice failed: %s", str(e))
         return f"Error generating Gemini advice: {str(e)}"
     
-# 👇 Place this below get_gemini_advice()
-
-def build_forecast_ai_prompt(forecast_data: dict, currency: str) -> str:
-    forecast_summary = ", ".join([f"{k}: {v:.2f} {currency}" for k, v in forecast_data.items() if '_' in k])
-    return f"""
-Analyze this financial forecast and provide insights.
-
-Forecast data:
-{forecast_summary}
-
-Highlight trends, risks, and potential advice in plain English.
-"""
-
-async def get_forecast_commentary(forecast_data: dict, currency: str) -> str:
-    try:
-        prompt = build_forecast_ai_prompt(forecast_data, currency)
-        return await get_gemini_advice(prompt, max_length=400)
-    except Exception as e:
-        logger.error("Failed to generate AI forecast commentary: %s", str(e))
-        return f"AI commentary error: {str(e)}"
-
-def build_investment_ai_prompt(risk_profile: dict, suggestions: dict) -> str:
-    tickers = ", ".join(suggestions.keys())
-    return f"""
-The user's financial risk profile is as follows:
-{json.dumps(risk_profile, indent=2)}
-
-They have been recommended the following stocks or ETFs: {tickers}
-
-Provide investment rationale and advice in human-friendly language.
-"""
-
-async def get_investment_ai_commentary(risk_profile: dict, suggestions: dict) -> str:
-    try:
-        prompt = build_investment_ai_prompt(risk_profile, suggestions)
-        return await get_gemini_advice(prompt, max_length=400)
-    except Exception as e:
-        logger.error("Failed to generate AI investment commentary: %s", str(e))
-        return f"AI commentary error: {str(e)}"
-
+async def enrich_commentary(commentary: str, language: str = "en") -> Tuple[str, str]:
+    """
+    Optional LLM tier over the template commentary. Returns (text, source); results are cached by
+    the commentary text, which is itself a deterministic function of the numbers.
+    """
+    cache_key = f"{language}:{hashlib.sha256(commentary.encode()).hexdigest()}"
+    metrics.record_cache("enrichment", cache_key in enrichment_cache)
+    if cache_key in enrichment_cache:
+        return enrichment_cache[cache_key]
+    result = await llm_router.generate(enrichment_prompt(commentary, language), max_tokens=400,
+                                       fallback=lambda: commentary)
+    enriched = (result.text, result.provider)
+    if result.provider != "template":
+        enrichment_cache[cache_key] = enriched
+    return enriched
+
+def negotiate(request: Request, payload: dict):
+    """
+    Return msgpack when the client sends `Accept: application/msgpack`, otherwise the default JSON.
+    """
+    if msgpack is not None and "application/msgpack" in request.headers.get("accept", ""):
+        return Response(msgpack.packb(jsonable_encoder(payload)), media_type="application/msgpack")
+    return payload
 
 @app.post("/analyze/")
 @limiter.limit("5/minute")
+@cost_limit("analyze")
 async def advanced_financial_advisor(request: Request, data: FinancialData, low_income_mode: bool = False):
-    logger.debug("Received /analyze/ request with data: %s", data)
+    logger.debug("Received /analyze/ request: %d goals, %d categories, %s transactions",
+                 len(data.goals), len(data.spending_categories), summarize(data.transactions))
     try:
         try:
             if not data.income or not data.expenses or not data.currency:
@@ -162,6 +305,10 @@ async def advanced_financial_advisor(request: Request, data: FinancialData, low_
             logger.error("Validation error in FinancialData: %s", str(e))
             raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
 
+        if data.user_id and not data.spending_categories:
+            data.spending_categories = await asyncio.to_thread(average_category_spending, data.user_id, 12)
+        if data.transactions and not data.spending_categories:
+            data.spending_categories = await asyncio.to_thread(category_averages, data.transactions)
         rule = await asyncio.to_thread(analyze_savings, data.income, data.expenses, data.spending_categories)
         logger.debug("Savings analysis: %s", rule)
         prompt = build_financial_prompt(data, rule)
@@ -213,16 +360,14 @@ async def advanced_financial_advisor(request: Request, data: FinancialData, low_
         projected_savings = [rule["monthly_savings"] * i for i in range(1, min(data.duration_months + 1, 121))]
         savings_chart = generate_forecast_chart({"1_month": projected_savings[0], "3_months": projected_savings[2], 
                                                 "6_months": projected_savings[5], "9_months": projected_savings[8], 
-                                                "12_months": projected_savings[-1]}, data.currency)
+                                                "1_year": projected_savings[-1]}, data.currency)
         
         primary_goal = min(data.goals, key=lambda g: g.priority)
         inflation_adjusted = await asyncio.to_thread(
             adjusted_goal_cost, primary_goal.cost, data.duration_months / 12
         )
         
-        behavior = await asyncio.to_thread(
-            analyze_behavior, ", ".join(data.spending_categories.keys()) if data.spending_categories else "General spending"
-        )
+        behavior = analyze_behavior(data.spending_categories)
         term_info = await explain_term("Systematic Investment Plan")
         faq = await asyncio.to_thread(get_faq_answer, "What is SIP?")
 
@@ -254,116 +399,186 @@ async def advanced_financial_advisor(request: Request, data: FinancialData, low_
         logger.error("Error in /analyze/: %s", str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
-@app.post("/forecast_expenses/")
-@limiter.limit("5/minute")
-async def predict_expense_forecast(request: Request, data: ExpenseForecastInput = None, file: UploadFile = File(None), language: str = "en"):
-    logger.debug("Received /forecast_expenses/ request with data: %s, file: %s", data, file)
+async def read_transactions(request: Request, data: Optional[ExpenseForecastInput], file: Optional[UploadFile],
+                            allow_empty: bool = False) -> tuple:
+    """
+    Collect transactions from an uploaded file, base64 file content, a transaction list or an expense
+    history. Returns the transactions and the (possibly manually parsed) input model.
+    """
+    transactions = []
     try:
-        transactions = []
-        try:
-            if "multipart/form-data" in request.headers.get("content-type", ""):
-                form = await request.form()
-                logger.debug("Form-data received: %s", {key: f"File: {value.filename}, Size: {value.size}" if isinstance(value, UploadFile) else str(value) for key, value in form.items()})
-            
-            if file and file.filename:
-                file_type = file.filename.split(".")[-1].lower()
-                if file_type not in ["xlsx", "csv", "pdf"]:
-                    raise HTTPException(status_code=400, detail="File must be Excel (.xlsx), CSV (.csv), or PDF (.pdf)")
-                if file.size == 0:
-                    raise HTTPException(status_code=400, detail="Uploaded file is empty")
-                content = await file.read()
-                logger.debug("Processing uploaded %s file: %s, size: %d bytes", file_type, file.filename, len(content))
-                try:
+        if "multipart/form-data" in request.headers.get("content-type", ""):
+            form = await request.form()
+            logger.debug("Form-data received: %s", Lazy(lambda: {key: f"File: {value.filename}, Size: {value.size}" if isinstance(value, UploadFile) else str(value) for key, value in form.items()}))
+        
+        if file and file.filename:
+            file_type = file.filename.split(".")[-1].lower()
+            if file_type not in ["xlsx", "csv", "pdf"] and file_type not in COLUMNAR_FORMATS:
+                raise HTTPException(status_code=400, detail="File must be Excel (.xlsx), CSV (.csv), PDF (.pdf), Arrow (.arrow), Parquet (.parquet) or msgpack (.msgpack)")
+            if file.size == 0:
+                raise HTTPException(status_code=400, detail="Uploaded file is empty")
+            content = await file.read()
+            logger.debug("Processing uploaded %s file: %s, size: %d bytes", file_type, file.filename, len(content))
+            try:
+                if file_type in COLUMNAR_FORMATS:
+                    transactions = await asyncio.to_thread(parse_transaction_frame, content, file_type)
+                else:
                     transactions = await asyncio.to_thread(parse_transactions, content, is_file=True, file_type=file_type)
-                    logger.debug("Parsed %d transactions from %s file", len(transactions), file_type)
-                except ValueError as ve:
-                    logger.error("Failed to parse %s file: %s", file_type, str(ve))
-                    raise HTTPException(status_code=400, detail=f"Invalid {file_type} file: {str(ve)}")
-            elif data and data.file_content:
-                logger.debug("Processing base64-encoded file content")
-                content = base64.b64decode(data.file_content)
-                transactions = await asyncio.to_thread(parse_transactions, content, is_file=True, file_type="xlsx")
-            elif data and data.transactions:
-                logger.debug("Processing transactions list")
-                transactions = data.transactions
-            elif data and data.expense_history:
-                logger.debug("Processing expense history")
-                transactions = [
-                    Transaction(date=f"{date}-01", amount=amount, category="General")
-                    for date, amount in list(data.expense_history.items())[:1000]
-                ]
-            else:
+                logger.debug("Parsed %d transactions from %s file", len(transactions), file_type)
+            except ValueError as ve:
+                logger.error("Failed to parse %s file: %s", file_type, str(ve))
+                raise HTTPException(status_code=400, detail=f"Invalid {file_type} file: {str(ve)}")
+        elif data and data.file_content:
+            logger.debug("Processing base64-encoded file content")
+            content = base64.b64decode(data.file_content)
+            transactions = await asyncio.to_thread(parse_transactions, content, is_file=True, file_type="xlsx")
+        elif data and data.transactions:
+            logger.debug("Processing transactions list")
+            transactions = data.transactions
+        elif data and data.expense_history:
+            logger.debug("Processing expense history")
+            transactions = [
+                Transaction(date=f"{date}-01", amount=amount, category="General")
+                for date, amount in list(data.expense_history.items())[:1000]
+            ]
+        elif request.headers.get("content-type", "").split(";")[0].strip() in COLUMNAR_CONTENT_TYPES:
+            file_type = COLUMNAR_CONTENT_TYPES[request.headers["content-type"].split(";")[0].strip()]
+            content = await request.body()
+            if not content:
+                raise HTTPException(status_code=400, detail="No input provided")
+            try:
+                transactions = await asyncio.to_thread(parse_transaction_frame, content, file_type)
+            except ValueError as ve:
+                raise HTTPException(status_code=400, detail=f"Invalid {file_type} body: {str(ve)}")
+        else:
+            try:
+                raw_body = await request.body()
+                logger.debug("Raw request body: %d bytes", len(raw_body))
+                if raw_body:
+                    json_data = json.loads(raw_body)
+                    try:
+                        data = ExpenseForecastInput(**json_data)
+                        if data.transactions:
+                            logger.debug("Manually parsed transactions list")
+                            transactions = data.transactions
+                        elif data.expense_history:
+                            logger.debug("Manually parsed expense history")
+                            transactions = [
+                                Transaction(date=f"{date}-01", amount=amount, category="General")
+                                for date, amount in list(data.expense_history.items())[:1000]
+                            ]
+                        elif data.file_content:
+                            logger.debug("Manually parsed file content")
+                            content = base64.b64decode(data.file_content)
+                            transactions = await asyncio.to_thread(parse_transactions, content, is_file=True, file_type="xlsx")
+                        elif not allow_empty:
+                            logger.error("No valid data in manually parsed JSON: %s", json_data)
+                            raise HTTPException(status_code=400, detail="No valid input in JSON")
+                    except ValidationError as ve:
+                        logger.error("Validation error in manual ExpenseForecastInput parsing: %s", str(ve))
+                        raise HTTPException(status_code=400, detail=f"Invalid JSON input: {str(ve)}")
+                elif not allow_empty:
+                    logger.error("Empty request body")
+                    raise HTTPException(status_code=400, detail="No input provided")
+            except json.JSONDecodeError as e:
+                logger.error("Failed to decode raw JSON body: %s", str(e))
+                raise HTTPException(status_code=400, detail=f"Invalid JSON format: {str(e)}")
+
+    except ValidationError as e:
+        logger.error("Validation error in ExpenseForecastInput: %s", str(e))
+        raise HTTPException(status_code=400, detail=f"Invalid JSON input: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Input validation failed: %s", str(e), exc_info=True)
+        raise HTTPException(status_code=400, detail=f"Input processing failed: {str(e)}")
+    return transactions, data
+
+async def run_forecast_pipeline(transactions: Transactions, currency: str = "INR", language: str = "en",
+                                user_id: Optional[str] = None, progress=None, enrich: bool = False,
+                                record_activity: bool = True) -> dict:
+    """
+    Forecast, risk, chart and commentary stages shared by /forecast_expenses/, forecast jobs and
+    background cache warming. `progress(stage)` returns an async context manager wrapped around each stage.
+    """
+    progress = progress or (lambda stage: nullcontext())
+    if user_id:
+        if record_activity:
+            await asyncio.to_thread(touch_user, user_id, currency, language)
+        if len(transactions):
+            async with progress("ingest"):
                 try:
-                    raw_body = await request.body()
-                    logger.debug("Raw request body: %s", raw_body.decode('utf-8', errors='ignore'))
-                    if raw_body:
-                        json_data = json.loads(raw_body)
-                        try:
-                            data = ExpenseForecastInput(**json_data)
-                            if data.transactions:
-                                logger.debug("Manually parsed transactions list")
-                                transactions = data.transactions
-                            elif data.expense_history:
-                                logger.debug("Manually parsed expense history")
-                                transactions = [
-                                    Transaction(date=f"{date}-01", amount=amount, category="General")
-                                    for date, amount in list(data.expense_history.items())[:1000]
-                                ]
-                            elif data.file_content:
-                                logger.debug("Manually parsed file content")
-                                content = base64.b64decode(data.file_content)
-                                transactions = await asyncio.to_thread(parse_transactions, content, is_file=True, file_type="xlsx")
-                            else:
-                                logger.error("No valid data in manually parsed JSON: %s", json_data)
-                                raise HTTPException(status_code=400, detail="No valid input in JSON")
-                        except ValidationError as ve:
-                            logger.error("Validation error in manual ExpenseForecastInput parsing: %s", str(ve))
-                            raise HTTPException(status_code=400, detail=f"Invalid JSON input: {str(ve)}")
-                    else:
-                        logger.error("Empty request body")
-                        raise HTTPException(status_code=400, detail="No input provided")
-                except json.JSONDecodeError as e:
-                    logger.error("Failed to decode raw JSON body: %s", str(e))
-                    raise HTTPException(status_code=400, detail=f"Invalid JSON format: {str(e)}")
-
-        except ValidationError as e:
-            logger.error("Validation error in ExpenseForecastInput: %s", str(e))
-            raise HTTPException(status_code=400, detail=f"Invalid JSON input: {str(e)}")
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error("Input validation failed: %s", str(e), exc_info=True)
-            raise HTTPException(status_code=400, detail=f"Input processing failed: {str(e)}")
-
+                    await asyncio.to_thread(ingest_transactions, user_id, transactions)
+                except ValueError as ve:
+                    raise HTTPException(status_code=400, detail=f"Invalid transactions: {str(ve)}")
+        async with progress("forecast"):
+            forecast = await forecast_user_expenses(user_id, currency, language, months=FORECAST_HISTORY_MONTHS)
+        async with progress("risk"):
+            risk_profile = await asyncio.to_thread(assess_user_risk, user_id, FORECAST_HISTORY_MONTHS)
+    else:
         if len(transactions) < 6:
             raise HTTPException(status_code=400, detail="At least 6 transactions required")
         if len(transactions) > 1000:
-            transactions = transactions[-1000:]
+            transactions = transactions.iloc[-1000:] if isinstance(transactions, pd.DataFrame) else transactions[-1000:]
             logger.debug("Limited transactions to 1000")
 
-        forecast = await forecast_expenses(transactions, data.forecast_currency if data else "INR", language)
-        logger.debug("Forecast results: %s", forecast)
-        risk_profile = await asyncio.to_thread(assess_risk, transactions)
-        forecast_chart = generate_forecast_chart(forecast, data.forecast_currency if data else "INR")
+        async with progress("forecast"):
+            forecast = await forecast_expenses(transactions, currency, language)
+        async with progress("risk"):
+            risk_profile = await asyncio.to_thread(assess_risk, transactions)
+    logger.debug("Forecast results: %s", Lazy(lambda: {k: v for k, v in forecast.items() if k != "narrative"}))
+    if language != "en":
+        risk_profile["recommendations"] = await translate_many(risk_profile["recommendations"], language)
+    async with progress("chart"):
+        forecast_chart = generate_forecast_chart(forecast, currency)
+
+    async with progress("commentary"):
+        ai_commentary, commentary_source = forecast_commentary(forecast, risk_profile, currency, language), "template"
+        if enrich:
+            ai_commentary, commentary_source = await enrich_commentary(ai_commentary, language)
+
+    return {
+        "forecast_summary": {
+            "1_month": forecast["1_month"],
+            "3_months": forecast["3_months"],
+            "6_months": forecast["6_months"],
+            "9_months": forecast["9_months"],
+            "1_year": forecast["1_year"]
+        },
+        "confidence_intervals": forecast["confidence_intervals"],
+        "forecast_chart": f"data:image/png;base64,{forecast_chart}" if forecast_chart else "",
+        "currency": currency,
+        "risk_profile": risk_profile,
+        "ai_commentary": ai_commentary,
+        "commentary_source": commentary_source,
+        "note": forecast["narrative"]
+    }
+
+async def warm_user_results(user_id: str, context: dict) -> tuple:
+    """
+    Run the stored-user forecast pipeline for the caches only, in the currency and language the
+    user last asked for; returns the (data version, currency, language) warmed.
+    """
+    activity = await asyncio.to_thread(get_activity, user_id) or {}
+    currency = context.get("currency") or activity.get("currency") or "INR"
+    language = context.get("language") or activity.get("language") or "en"
+    await run_forecast_pipeline([], currency, language, user_id, record_activity=False)
+    return activity.get("version", 0), currency, language
+
+precompute_scheduler = PrecomputeScheduler(warm_user_results)
 
+@app.post("/forecast_expenses/")
+@limiter.limit("5/minute")
+@cost_limit("forecast")
+async def predict_expense_forecast(request: Request, data: ExpenseForecastInput = None, file: UploadFile = File(None), language: str = "en",
+                                   user_id: Optional[str] = None, enrich: bool = LLM_ENRICH_DEFAULT):
+    logger.debug("Received /forecast_expenses/ request: %s, file: %s", summarize(data and data.transactions), file and file.filename)
+    try:
+        transactions, data = await read_transactions(request, data, file, allow_empty=bool(user_id))
+        currency = data.forecast_currency if data else "INR"
+        response = await run_forecast_pipeline(transactions, currency, language, user_id, enrich=enrich)
         logger.debug("Returning /forecast_expenses/ response")
-        ai_commentary = await get_forecast_commentary(forecast, data.forecast_currency if data else "INR")
-
-        return {
-    "forecast_summary": {
-        "1_month": forecast["1_month"],
-        "3_months": forecast["3_months"],
-        "6_months": forecast["6_months"],
-        "9_months": forecast["9_months"],
-        "1_year": forecast["1_year"]
-    },
-    "confidence_intervals": forecast["confidence_intervals"],
-    "forecast_chart": f"data:image/png;base64,{forecast_chart}" if forecast_chart else "",
-    "currency": data.forecast_currency if data else "INR",
-    "risk_profile": risk_profile,
-    "ai_commentary": ai_commentary,
-    "note": forecast["narrative"]
-}
+        return negotiate(request, response)
 
     except HTTPException as e:
         raise e
@@ -371,11 +586,108 @@ async def predict_expense_forecast(request: Request, data: ExpenseForecastInput
         logger.error("Error in /forecast_expenses/: %s", str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=f"Forecast failed: {str(e)}")
 
+@app.post("/forecast_jobs/", status_code=202)
+@limiter.limit("20/minute")
+@cost_limit("forecast_job")
+async def submit_forecast_job(request: Request, data: ExpenseForecastInput = None, file: UploadFile = File(None), language: str = "en",
+                              user_id: Optional[str] = None, enrich: bool = LLM_ENRICH_DEFAULT):
+    """
+    Queue the /forecast_expenses/ pipeline and return a job id to poll at /jobs/{job_id}.
+    Uploaded files are parsed inside the job rather than in the request.
+    """
+    try:
+        content, file_type, transactions = None, None, []
+        if file and file.filename:
+            file_type = file.filename.split(".")[-1].lower()
+            if file_type not in ["xlsx", "csv", "pdf"] and file_type not in COLUMNAR_FORMATS:
+                raise HTTPException(status_code=400, detail="File must be Excel (.xlsx), CSV (.csv), PDF (.pdf), Arrow (.arrow), Parquet (.parquet) or msgpack (.msgpack)")
+            content = await file.read()
+            if not content:
+                raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        else:
+            transactions, data = await read_transactions(request, data, None, allow_empty=bool(user_id))
+        currency = data.forecast_currency if data else "INR"
+
+        async def runner(job):
+            parsed = transactions
+            if content is not None:
+                async with job.stage("parse"):
+                    try:
+                        if file_type in COLUMNAR_FORMATS:
+                            parsed = await asyncio.to_thread(parse_transaction_frame, content, file_type)
+                        else:
+                            parsed = await asyncio.to_thread(parse_transactions, content, is_file=True, file_type=file_type)
+                    except ValueError as ve:
+                        raise HTTPException(status_code=400, detail=f"Invalid {file_type} file: {str(ve)}")
+            return await run_forecast_pipeline(parsed, currency, language, user_id, progress=job.stage, enrich=enrich)
+
+        stages = (["parse"] if content is not None else []) + \
+                 (["ingest"] if user_id and (content is not None or len(transactions)) else []) + \
+                 ["forecast", "risk", "chart", "commentary"]
+        job_id = job_queue.submit("forecast", stages, runner)
+        return {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error("Error in /forecast_jobs/: %s", str(e), exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Job submission failed: {str(e)}")
+
+@app.get("/jobs/{job_id}")
+async def get_job(request: Request, job_id: str):
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return negotiate(request, job)
+
+async def ingest_summary(user_id: str, stored: int) -> dict:
+    """
+    Ingest result with the user's stored monthly rollups as columns (one list per field).
+    """
+    rollups = await asyncio.to_thread(load_monthly_rollups, user_id, FORECAST_HISTORY_MONTHS)
+    return {
+        "user_id": user_id,
+        "stored": stored,
+        "monthly": {
+            "month": rollups["ds"].dt.strftime("%Y-%m").tolist(),
+            "total": rollups["total"].round(2).tolist(),
+            "count": rollups["count"].astype(int).tolist()
+        }
+    }
+
+@app.post("/transactions/{user_id}")
+@limiter.limit("30/minute")
+@cost_limit("ingest")
+async def ingest_user_transactions(request: Request, user_id: str, data: ExpenseForecastInput = None, file: UploadFile = File(None)):
+    try:
+        if file and file.filename and file.filename.lower().endswith(".pdf"):
+            content = await file.read()
+            stored = await asyncio.to_thread(ingest_frames, user_id, stream_pdf_transactions(content))
+            precompute_scheduler.enqueue(user_id)
+            return negotiate(request, await ingest_summary(user_id, stored))
+        transactions, _ = await read_transactions(request, data, file)
+        if len(transactions) == 0:
+            raise HTTPException(status_code=400, detail="No transactions provided")
+        stored = await asyncio.to_thread(ingest_transactions, user_id, transactions)
+        precompute_scheduler.enqueue(user_id)
+        return negotiate(request, await ingest_summary(user_id, stored))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=f"Invalid transactions: {str(ve)}")
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error("Error in /transactions/: %s", str(e), exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Transaction ingest failed: {str(e)}")
+
 @app.post("/invest/")
 @limiter.limit("5/minute")
-async def suggest_investments(request: Request, data: FinancialData):
+@cost_limit("invest")
+async def suggest_investments(request: Request, data: FinancialData, language: str = "en",
+                              enrich: bool = LLM_ENRICH_DEFAULT):
     try:
-        risk = await asyncio.to_thread(assess_risk, data.transactions if data.transactions else [])
+        if data.user_id and not data.transactions:
+            risk = await asyncio.to_thread(assess_user_risk, data.user_id, FORECAST_HISTORY_MONTHS)
+        else:
+            risk = await asyncio.to_thread(assess_risk, data.transactions if data.transactions else [])
         variability = risk.get("spending_variability", "moderate")
         tickers = {
             "low": ["VTI", "BND"],
@@ -383,26 +695,38 @@ async def suggest_investments(request: Request, data: FinancialData):
             "high": ["AAPL", "TSLA"]
         }.get(variability, ["SPY", "QQQ"])
         
-        suggestions = {}
-        for ticker in tickers:
+        async def fetch_suggestion(ticker: str) -> dict:
             try:
-                stock = yf.Ticker(ticker)
-                suggestions[ticker] = {
-                    "name": stock.info.get("longName", ticker),
-                    "price": stock.info.get("regularMarketPrice", 0),
-                    "sector": stock.info.get("sector", "Unknown")
+                async with timed("yfinance"):
+                    info = await asyncio.to_thread(lambda: yf.Ticker(ticker, session=yfinance_session()).info)
+                return {
+                    "name": info.get("longName", ticker),
+                    "price": info.get("regularMarketPrice", 0),
+                    "sector": info.get("sector", "Unknown")
                 }
             except Exception as e:
                 logger.warning("Failed to fetch stock info for %s: %s", ticker, e)
-                suggestions[ticker] = {"name": ticker, "price": 0, "sector": "Unknown"}
+                return {"name": ticker, "price": 0, "sector": "Unknown"}
 
-        ai_commentary = await get_investment_ai_commentary(risk, suggestions)
+        suggestions = dict(zip(tickers, await asyncio.gather(*(fetch_suggestion(t) for t in tickers))))
+        # Backtest and projection of investing the monthly savings in the mix, from the local price store
+        savings = analyze_savings(data.income, data.expenses, data.spending_categories)["monthly_savings"]
+        portfolio = await asyncio.to_thread(analyze_portfolio, tickers, savings, data.duration_months)
+
+        ai_commentary, commentary_source = investment_commentary(risk, suggestions, data.currency or "INR", language), "template"
+        if enrich:
+            ai_commentary, commentary_source = await enrich_commentary(ai_commentary, language)
+        note = INVEST_NOTE
+        if language != "en":
+            *risk["recommendations"], note = await translate_many(risk["recommendations"] + [note], language)
 
         return {
             "risk_profile": risk,
             "investment_suggestions": suggestions,
+            "portfolio": portfolio,
             "ai_commentary": ai_commentary,
-            "note": "Prices are indicative and subject to market changes."
+            "commentary_source": commentary_source,
+            "note": note
         }
     except Exception as e:
         logger.error("Investment suggestions failed: %s", str(e), exc_info=True)
@@ -410,42 +734,52 @@ async def suggest_investments(request: Request, data: FinancialData):
 
 @app.post("/chat/")
 @limiter.limit("5/minute")
+@cost_limit("chat")
 async def chat_with_bot(request: Request, query: dict):
+    """
+    Chat turn within a session. The first turn with `user_data` computes the savings analysis (and,
+    when asked about, the forecast) into the session context; later turns send only `session_id` and
+    `question`, reuse that context and recompute just the parts whose inputs changed. Each turn
+    costs a single LLM call.
+    """
     try:
         question = query.get("question", "")
+        if not question.strip():
+            raise HTTPException(status_code=400, detail="Question is required")
         user_data = FinancialData(**query.get("user_data", {})) if query.get("user_data") else None
-        context = ""
-        if user_data:
-            response = await advanced_financial_advisor(request, user_data)
-            context = (
-                f"User's financial summary: {response['advisor_summary']}. "
-                f"Savings plan: {response['step_by_step_plan']}. "
-                f"Goal feasibility: {response['goal_feasibility']}."
+        async with chat_sessions.session_lock(query.get("session_id")):
+            session = await asyncio.to_thread(chat_sessions.store.load, query.get("session_id"))
+            recomputed = await chat_sessions.refresh(session, user_data, "forecast" in question.lower())
+            context = session.context()
+            summary = session.summaries.get("analysis", "")
+            prompt = prompt_template.format(question=question, context=context)
+            result = await llm_router.generate(
+                f"{prompt}\nGive a smart, concise financial assistant reply.", max_tokens=300,
+                fallback=lambda: summary or "I need your income, expenses and goals to answer that."
             )
-            if "forecast" in question.lower():
-                forecast = await forecast_expenses(user_data.transactions or [], user_data.currency or "INR", "en")
-                context += f" Forecast: {forecast['1_month']} for 1 month, {forecast['1_year']} for 1 year."
-
-        # ✅ Build and invoke prompt
-        prompt = prompt_template.format(question=question, context=context)
-        answer = chatbot(prompt, max_new_tokens=100)[0]['generated_text']
-
-        # ✅ Gemini AI commentary
-        chat_gemini_summary = await get_gemini_advice(
-            f"User question: {question}\nContext: {context}\nGive a smart financial assistant reply.",
-            max_length=300
-        )
+            answer = result.text.strip()
+            session.remember(question, answer)
+            await asyncio.to_thread(chat_sessions.store.save, session)
 
         return {
-            "huggingface_answer": answer.strip(),
-            "gemini_commentary": chat_gemini_summary.strip(),
-            "used_context": context
+            "session_id": session.session_id,
+            "answer": answer,
+            "answer_source": result.provider,
+            "analysis_summary": summary,
+            "used_context": context,
+            "recomputed": sorted(recomputed)
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Chat failed: %s", str(e), exc_info=True)
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/test/")
 async def test_endpoint():
     logger.debug("Received /test/ request")
@@ -464,11 +798,36 @@ async def debug_request(request: Request):
         elif "application/json" in content_type:
             body = await request.json()
         logger.debug("Debug request - Headers: %s, Body: %s", headers, body)
-        return {
+        response = {
             "headers": headers,
             "body": body,
             "message": "Request data logged"
         }
+        if profiling.is_authorized(headers.get("x-profile") or request.query_params.get("profile")):
+            response["profiles"] = profiling.list_profiles()[:10]
+        return response
     except Exception as e:
         logger.error("Error in /debug_request/: %s", str(e), exc_info=True)
         raise HTTPException(status_code=400, detail=f"Debug failed: {str(e)}")
+
+def require_profile_token(request: Request):
+    if not profiling.is_authorized(request.headers.get("x-profile") or request.query_params.get("profile")):
+        raise HTTPException(status_code=404, detail="Not found")
+
+@app.get("/debug/profiles/")
+async def list_profiles(request: Request):
+    require_profile_token(request)
+    return {"profiles": profiling.list_profiles()}
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(request: Request, profile_id: str, format: str = "json"):
+    """
+    A stored request profile; `format=collapsed` returns only the CPU stacks for flamegraph tools.
+    """
+    require_profile_token(request)
+    report = profiling.load_profile(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(report["cpu_collapsed"])
+    return report
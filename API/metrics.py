@@ -0,0 +1,200 @@
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_histograms: Dict[Tuple[str, Tuple], "Histogram"] = {}
+_counters: Dict[Tuple[str, Tuple], float] = {}
+_gauges: Dict[str, Tuple[str, Callable[[], Dict[Tuple, float]]]] = {}
+_help: Dict[str, str] = {
+    "zenith_request_seconds": "HTTP request latency by route, method and status.",
+    "zenith_stage_seconds": "Latency of pipeline stages (parse, prophet_fit, holt_fit, gemini, ...).",
+    "zenith_cache_requests_total": "Cache lookups by cache name and result.",
+    "zenith_cache_hit_ratio": "Share of cache lookups that were hits since start-up.",
+    "zenith_http_client_seconds": "Outbound HTTP request latency per host, including failed attempts.",
+    "zenith_http_client_requests_total": "Outbound HTTP attempts per host and outcome (status code, timeout, error).",
+    "zenith_admission_wait_seconds": "Time spent queued for a CPU or LLM admission slot.",
+    "zenith_llm_requests_total": "LLM provider calls by outcome (success, failure, timeout, short_circuit, hedged, shed).",
+    "zenith_admission_shed_total": "Work rejected with 503 by admission control, by resource and reason.",
+    "zenith_forecast_engine_total": "Forecasts produced per engine picked by the selection policy.",
+    "zenith_precompute_total": "Background cache-warming runs per user by outcome (success, failure, dropped).",
+    "zenith_chat_context_recomputed_total": "Chat session context parts recomputed because their inputs changed.",
+    "zenith_cancelled_requests_total": "Requests cancelled by route and reason (disconnect, deadline).",
+    "zenith_cancelled_cpu_seconds_total": "Estimated seconds of work avoided by cancelling requests, by route.",
+    "zenith_categorized_total": "Distinct transaction descriptions labelled, by source (cache, merchant, model, default).",
+}
+
+# Per-request list of (stage, seconds); set by the HTTP middleware and shared with worker threads
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _key(name: str, labels: Dict[str, str]) -> Tuple[str, Tuple]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name: str, value: float, **labels):
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+def inc(name: str, amount: float = 1.0, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + amount
+
+
+def register_gauge(name: str, collect: Callable[[], Dict[Tuple, float]], help_text: str = ""):
+    """
+    Register a gauge evaluated at scrape time. `collect` returns {label tuple: value}, where the label
+    tuple is a sequence of (name, value) pairs, e.g. {(("executor", "pdf"),): 3}.
+    """
+    _gauges[name] = (help_text, collect)
+
+
+def record_cache(cache: str, hit: bool):
+    inc("zenith_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def stage_mean(stage: str) -> Optional[float]:
+    """
+    Mean observed latency of a stage since start-up, or None if it has not run yet.
+    """
+    with _lock:
+        histogram = _histograms.get(_key("zenith_stage_seconds", {"stage": stage}))
+        return histogram.sum / histogram.count if histogram and histogram.count else None
+
+
+class timed:
+    """
+    Time a pipeline stage as a sync or async context manager:
+
+        with timed("prophet_fit"):
+            model.fit(df)
+
+    The duration goes into zenith_stage_seconds and the current request's Server-Timing breakdown.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        observe("zenith_stage_seconds", elapsed, stage=self.stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((self.stage, elapsed))
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    merged: Dict[str, float] = {}
+    for stage, seconds in timings:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in merged.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple, extra: Tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render() -> str:
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+
+    seen = set()
+    for (name, labels), histogram in histograms:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {_help.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+    cache_totals: Dict[str, Dict[str, float]] = {}
+    for (name, labels), value in counters:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {_help.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+        if name == "zenith_cache_requests_total":
+            label_map = dict(labels)
+            cache_totals.setdefault(label_map["cache"], {})[label_map["result"]] = value
+
+    if cache_totals:
+        lines.append(f"# HELP zenith_cache_hit_ratio {_help['zenith_cache_hit_ratio']}")
+        lines.append("# TYPE zenith_cache_hit_ratio gauge")
+        for cache, results in sorted(cache_totals.items()):
+            total = results.get("hit", 0.0) + results.get("miss", 0.0)
+            lines.append(f"zenith_cache_hit_ratio{_format_labels((('cache', cache),))} {results.get('hit', 0.0) / total}")
+
+    for name, (help_text, collect) in sorted(_gauges.items()):
+        try:
+            values = collect()
+        except Exception as e:
+            logger.warning("Gauge %s failed: %s", name, str(e))
+            continue
+        lines.append(f"# HELP {name} {help_text or name}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in values.items():
+            lines.append(f"{name}{_format_labels(tuple(labels))} {value}")
+    return "\n".join(lines) + "\n"
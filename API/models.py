@@ -10,7 +10,10 @@ class Goal(BaseModel):
 class Transaction(BaseModel):
     date: str
     amount: float
-    category: str
+    # Derived from the description when missing or "Other"
+    category: Optional[str] = None
+    currency: Optional[str] = None
+    description: Optional[str] = None
 
 class FinancialData(BaseModel):
     income: float
@@ -20,6 +23,7 @@ class FinancialData(BaseModel):
     currency: str
     spending_categories: Dict[str, float]
     transactions: Optional[List[Transaction]] = None
+    user_id: Optional[str] = None
 
 class ExpenseForecastInput(BaseModel):
     transactions: Optional[List[Transaction]] = None
@@ -0,0 +1,160 @@
+import os
+import time
+import heapq
+import asyncio
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from cachetools import LRUCache
+import metrics
+from admission import cpu_admission
+from analyze.transaction_store import active_users
+import logging
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_ENABLED = os.getenv("ZENITH_PRECOMPUTE", "1") == "1"
+# How often recent activity is re-scanned, and how far back a user still counts as active
+PRECOMPUTE_SCAN_INTERVAL = float(os.getenv("ZENITH_PRECOMPUTE_INTERVAL", "300"))
+PRECOMPUTE_ACTIVE_DAYS = float(os.getenv("ZENITH_PRECOMPUTE_ACTIVE_DAYS", "7"))
+# Local hours ("1-6", may wrap as "22-5") for refreshing all active users; empty means any time.
+# Users who just ingested a statement are warmed straight away regardless of the window.
+PRECOMPUTE_WINDOW = os.getenv("ZENITH_PRECOMPUTE_WINDOW", "")
+# Share of wall-clock time the scheduler may spend computing (a duty cycle, not a core count)
+PRECOMPUTE_CPU_BUDGET = float(os.getenv("ZENITH_PRECOMPUTE_CPU_BUDGET", "0.25"))
+PRECOMPUTE_MAX_QUEUE = int(os.getenv("ZENITH_PRECOMPUTE_MAX_QUEUE", "1000"))
+# Re-warm unchanged users after this long, so their entries are renewed before the 1h cache TTL
+PRECOMPUTE_REFRESH = float(os.getenv("ZENITH_PRECOMPUTE_REFRESH", "1800"))
+
+PRIORITY_INGEST = 0
+PRIORITY_ACTIVE = 1
+
+
+def in_window(window: str = PRECOMPUTE_WINDOW, now: Optional[datetime] = None) -> bool:
+    if not window:
+        return True
+    start, end = (int(hour) for hour in window.split("-"))
+    hour = (now or datetime.now()).hour
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+
+class PrecomputeScheduler:
+    """
+    Warms per-user caches in the background so dashboard requests after a statement sync are hits.
+
+    Users are kept in a priority queue: a fresh ingest goes first, then recently active users by
+    recency. Work only starts while no interactive request holds or waits for a CPU slot, and after
+    each user the scheduler sleeps long enough to stay within PRECOMPUTE_CPU_BUDGET of wall time.
+    Caches are per process, so every worker warms its own; set ZENITH_PRECOMPUTE=0 to opt out.
+    """
+
+    def __init__(self, warm: Callable[[str, Dict], Awaitable[tuple]], budget: float = PRECOMPUTE_CPU_BUDGET,
+                 scan_interval: float = PRECOMPUTE_SCAN_INTERVAL, maxsize: int = PRECOMPUTE_MAX_QUEUE):
+        self.warm = warm
+        self.budget = min(1.0, max(0.01, budget))
+        self.scan_interval = scan_interval
+        self.maxsize = maxsize
+        self._heap: List[Tuple[int, float, str]] = []
+        self._queued: Dict[str, Tuple[int, Dict]] = {}
+        self._done: LRUCache = LRUCache(maxsize=10 * maxsize)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def queue_depth(self) -> int:
+        return len(self._queued)
+
+    def enqueue(self, user_id: str, priority: int = PRIORITY_INGEST, warmed: Optional[tuple] = None,
+                recency: Optional[float] = None, **context):
+        """
+        Queue a user for warming; within a priority, the most recently active users go first.
+        Re-queuing raises the priority of an entry that is already waiting. `warmed` is what the
+        warm function would return for this user (data version, currency, language); users warmed
+        with the same value within PRECOMPUTE_REFRESH are skipped.
+        """
+        done = self._done.get(user_id)
+        if warmed is not None and done is not None and done[0] == warmed and time.time() - done[1] < PRECOMPUTE_REFRESH:
+            return
+        queued = self._queued.get(user_id)
+        if queued is not None and queued[0] <= priority:
+            queued[1].update(context)
+            return
+        if queued is None and len(self._queued) >= self.maxsize:
+            metrics.inc("zenith_precompute_total", outcome="dropped")
+            return
+        self._queued[user_id] = (priority, context)
+        heapq.heappush(self._heap, (priority, -(recency or time.time()), user_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pop(self) -> Optional[Tuple[str, Dict]]:
+        while self._heap:
+            priority, _, user_id = heapq.heappop(self._heap)
+            queued = self._queued.get(user_id)
+            # Skip heap entries superseded by a higher-priority re-queue
+            if queued is not None and queued[0] == priority:
+                del self._queued[user_id]
+                return user_id, queued[1]
+        return None
+
+    async def start(self):
+        if not PRECOMPUTE_ENABLED or self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._scan_loop()), asyncio.create_task(self._run_loop())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def scan(self) -> int:
+        """
+        Queue recently active users. Only the store query runs in a thread: the queue and the wakeup
+        event belong to the event loop and are touched from it alone.
+        """
+        since = time.time() - PRECOMPUTE_ACTIVE_DAYS * 86400
+        users = await asyncio.to_thread(active_users, since, limit=self.maxsize)
+        for user in users:
+            currency, language = user["currency"] or "INR", user["language"] or "en"
+            self.enqueue(user["user_id"], PRIORITY_ACTIVE, warmed=(user["version"], currency, language),
+                         recency=max(user["ingested_at"] or 0, user["seen_at"] or 0),
+                         currency=currency, language=language)
+        return len(users)
+
+    async def _scan_loop(self):
+        while True:
+            if in_window():
+                try:
+                    found = await self.scan()
+                    logger.debug("Precompute scan queued %d active users", found)
+                except Exception as e:
+                    logger.error("Precompute scan failed: %s", str(e))
+            await asyncio.sleep(self.scan_interval)
+
+    async def _wait_for_idle(self):
+        while cpu_admission.in_flight or cpu_admission.waiting():
+            await asyncio.sleep(0.5)
+
+    async def _run_loop(self):
+        while True:
+            item = self._pop()
+            if item is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            user_id, context = item
+            await self._wait_for_idle()
+            started = time.perf_counter()
+            try:
+                async with metrics.timed("precompute"):
+                    warmed = await self.warm(user_id, context)
+                self._done[user_id] = (warmed, time.time())
+                metrics.inc("zenith_precompute_total", outcome="success")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.inc("zenith_precompute_total", outcome="failure")
+                logger.warning("Precomputing results for user %s failed: %s", user_id, str(e))
+            elapsed = time.perf_counter() - started
+            # Keep busy time / (busy + idle) at or below the budget
+            await asyncio.sleep(elapsed * (1 - self.budget) / self.budget)
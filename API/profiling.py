@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Profiling is disabled unless a token is configured; callers opt in per request with
+# `X-Profile: <token>` or `?profile=<token>`.
+PROFILE_TOKEN = os.getenv("ZENITH_PROFILE_TOKEN")
+PROFILE_DIR = os.getenv("ZENITH_PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.getenv("ZENITH_PROFILE_INTERVAL", "0.005"))
+PROFILE_KEEP = int(os.getenv("ZENITH_PROFILE_KEEP", "50"))
+TOP_ALLOCATIONS = 30
+
+# Leaf frames of threads that are parked (idle executor workers, the event loop waiting on I/O)
+_IDLE_FRAMES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get"), ("handlers.py", "dequeue"),
+                ("thread.py", "_worker")}
+
+# Only one request is profiled at a time, so samples from other threads stay attributable
+_active = threading.Lock()
+
+
+def enabled() -> bool:
+    return bool(PROFILE_TOKEN)
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    return enabled() and token == PROFILE_TOKEN
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class RequestProfiler:
+    """
+    Statistical CPU profile plus a tracemalloc diff for one request. A background thread samples
+    every thread's stack each PROFILE_INTERVAL seconds (the endpoint itself, executor workers running
+    Prophet or PDF pages); stacks are kept in collapsed form, ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, method: str, path: str, interval: float = PROFILE_INTERVAL):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="zenith-profiler", daemon=True)
+        self._owns_tracemalloc = False
+        self._baseline = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> "RequestProfiler":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+            self._owns_tracemalloc = True
+        self._baseline = tracemalloc.take_snapshot()
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self._thread.start()
+        return self
+
+    def stop(self, status: int, timings=None) -> dict:
+        self.duration = time.perf_counter() - self.started
+        self._stop.set()
+        self._thread.join()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+                   tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+        diff = snapshot.filter_traces(filters).compare_to(self._baseline.filter_traces(filters), "lineno")
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "started_at": self.started_at,
+            "duration_seconds": round(self.duration, 6),
+            "interval_seconds": self.interval,
+            "samples": self.samples,
+            "stages": [{"stage": stage, "seconds": round(seconds, 6)} for stage, seconds in (timings or [])],
+            "memory": {
+                "traced_peak_bytes": peak,
+                "net_allocated_bytes": sum(stat.size_diff for stat in diff),
+                "top_allocations": [
+                    {"location": str(stat.traceback[0]), "size_diff_bytes": stat.size_diff,
+                     "count_diff": stat.count_diff, "size_bytes": stat.size}
+                    for stat in diff[:TOP_ALLOCATIONS]
+                ],
+            },
+            "cpu_collapsed": "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()),
+        }
+
+
+def start(method: str, path: str) -> Optional[RequestProfiler]:
+    """
+    Begin profiling a request, or return None when another request is already being profiled.
+    """
+    if not _active.acquire(blocking=False):
+        return None
+    try:
+        return RequestProfiler(method, path).start()
+    except Exception:
+        _active.release()
+        raise
+
+
+def finish(profiler: RequestProfiler, status: int, timings=None) -> Optional[str]:
+    """
+    Stop the profiler, write its report to PROFILE_DIR and return the profile id (None if it
+    could not be stored).
+    """
+    try:
+        report = profiler.stop(status, timings)
+    finally:
+        _active.release()
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, f"{report['id']}.json"), "w") as handle:
+            json.dump(report, handle)
+        _prune()
+    except OSError as e:
+        logger.error("Failed to store profile %s: %s", report["id"], str(e))
+        return None
+    logger.info("Profiled %s %s in %.3fs (%d samples) -> %s", profiler.method, profiler.path,
+                report["duration_seconds"], report["samples"], report["id"])
+    return report["id"]
+
+
+def _profile_files() -> List[str]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    files = [os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR) if name.endswith(".json")]
+    return sorted(files, key=os.path.getmtime, reverse=True)
+
+
+def _prune():
+    for path in _profile_files()[PROFILE_KEEP:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def list_profiles() -> List[Dict]:
+    profiles = []
+    for path in _profile_files():
+        try:
+            with open(path) as handle:
+                report = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        profiles.append({key: report[key] for key in ("id", "method", "path", "status", "started_at",
+                                                      "duration_seconds", "samples")})
+    return profiles
+
+
+def load_profile(profile_id: str) -> Optional[Dict]:
+    if not profile_id.isalnum():
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle)
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Run from the API directory: python -m pytest -q
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import FakeLatency, install_fakes  # noqa: E402
+
+# Network and model backends (Gemini, yfinance, googletrans, transformers) are the fakes of the benchmarks
+install_fakes(FakeLatency(0, 0, 0, 0, 0))
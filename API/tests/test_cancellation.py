@@ -0,0 +1,62 @@
+import asyncio
+
+from cancellation import CancellationMiddleware, current_token
+
+
+def scope(headers=()):
+    return {"type": "http", "method": "POST", "path": "/slow", "headers": list(headers)}
+
+
+def run(app, headers=(), messages=(), timeout=1.0):
+    """
+    Serve one request through the middleware. `messages` are what the server receives from the
+    client, in order; after them the client stays connected. Returns what was sent.
+    """
+    sent = []
+    incoming = list(messages)
+
+    async def receive():
+        if incoming:
+            message = incoming.pop(0)
+            if message["type"] == "http.disconnect":
+                await asyncio.sleep(0.05)
+            return message
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(CancellationMiddleware(app, timeout=timeout)(scope(headers), receive, send))
+    return sent
+
+
+def slow_app(tokens):
+    async def app(scope, receive, send):
+        tokens.append(current_token())
+        await asyncio.sleep(3600)
+    return app
+
+
+def test_request_past_its_deadline_gets_504_and_a_cancelled_token():
+    tokens = []
+    sent = run(slow_app(tokens), timeout=0.05)
+    assert sent[0]["type"] == "http.response.start" and sent[0]["status"] == 504
+    assert tokens[0].cancelled and tokens[0].reason == "deadline"
+
+
+def test_client_disconnect_cancels_the_token_and_sends_nothing():
+    tokens = []
+    sent = run(slow_app(tokens), messages=[{"type": "http.disconnect"}])
+    assert sent == []
+    assert tokens[0].cancelled and tokens[0].reason == "disconnect"
+
+
+def test_malformed_content_length_is_left_to_the_app():
+    async def echo(scope, receive, send):
+        message = await receive()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": message["body"]})
+
+    sent = run(echo, headers=[(b"content-length", b"abc")],
+               messages=[{"type": "http.request", "body": b"payload", "more_body": False}])
+    assert sent[0]["status"] == 200 and sent[1]["body"] == b"payload"
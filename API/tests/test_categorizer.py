@@ -0,0 +1,48 @@
+import pytest
+from analyze import categorizer
+from analyze.categorizer import KeywordCategorizer, DEFAULT_MERCHANT_CATEGORIES
+
+
+@pytest.fixture(params=["automaton", "regex"])
+def keywords(request, monkeypatch):
+    if request.param == "automaton":
+        pytest.importorskip("ahocorasick")
+    else:
+        monkeypatch.setattr(categorizer, "ahocorasick", None)
+    return KeywordCategorizer(DEFAULT_MERCHANT_CATEGORIES)
+
+
+@pytest.mark.parametrize("text, category", [
+    ("emirates airline", "Travel"), ("emirates flight dxb", None), ("atmosphere cafe", "Food"),
+    ("gastro pub dinner", None), ("olam exports", None),
+])
+def test_keywords_do_not_match_inside_longer_words(keywords, text, category):
+    assert keywords.match(text) == category
+
+
+@pytest.mark.parametrize("text, category", [
+    ("hdfc emi", "Loan"), ("atm withdrawal", "Cash"), ("indane gas refill", "Utilities"), ("ola ride", "Transport"),
+    ("upi swiggy order", "Food"),
+])
+def test_keywords_match_whole_words(keywords, text, category):
+    assert keywords.match(text) == category
+
+
+@pytest.mark.parametrize("text, category", [
+    # The longest keyword wins wherever it is
+    ("amazon prime video", "Entertainment"), ("paid water bill at mall", "Utilities"),
+    # Among equally long keywords the leftmost wins
+    ("uber to cafe", "Transport"), ("cafe then uber", "Food"),
+])
+def test_longest_then_leftmost_keyword_wins(keywords, text, category):
+    assert keywords.match(text) == category
+
+
+def test_backends_agree(monkeypatch):
+    pytest.importorskip("ahocorasick")
+    texts = ["amazon prime video", "school fees via emi", "petrol at metro mall", "cash withdrawal atm",
+             "zerodha sip mutual fund", "gas station cafe"]
+    automaton = KeywordCategorizer(DEFAULT_MERCHANT_CATEGORIES)
+    monkeypatch.setattr(categorizer, "ahocorasick", None)
+    regex = KeywordCategorizer(DEFAULT_MERCHANT_CATEGORIES)
+    assert [automaton.match(text) for text in texts] == [regex.match(text) for text in texts]
@@ -0,0 +1,27 @@
+from analyze.chat_sessions import ChatSession, SessionStore
+
+
+def test_session_saved_by_one_worker_is_loaded_by_another(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SessionStore(path), SessionStore(path)
+    session = first.load(None)
+    session.analysis = {"analysis": {"monthly_savings": 2000.0}}
+    session.summaries["analysis"] = "Income 5,000.00 INR"
+    session.remember("How am I doing?", "Saving 40%.")
+    first.save(session)
+
+    loaded = second.load(session.session_id)
+    assert loaded.session_id == session.session_id
+    assert loaded.analysis == session.analysis
+    assert loaded.history == [("How am I doing?", "Saving 40%.")]
+    assert loaded.context() == session.context()
+    assert second.count() == 1
+
+
+def test_expired_session_starts_over(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"), ttl=60)
+    session = ChatSession("old")
+    session.updated_at -= 120
+    store.save(session)
+    assert store.load("old").session_id != "old"
+    assert store.count() == 0
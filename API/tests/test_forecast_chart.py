@@ -0,0 +1,19 @@
+import main
+from analyze.investment_forecast import HORIZONS
+
+FORECAST = {label: 1000.0 * months for label, months in HORIZONS.items()}
+
+
+def test_forecast_chart_renders_and_is_cached(monkeypatch):
+    main.chart_cache.clear()
+    chart = main.generate_forecast_chart(FORECAST, "INR")
+    assert chart
+    monkeypatch.setattr(main, "render_forecast_chart", lambda forecasts, currency: "re-rendered")
+    assert main.generate_forecast_chart(FORECAST, "INR") == chart
+
+
+def test_failed_chart_is_not_cached(monkeypatch):
+    main.chart_cache.clear()
+    monkeypatch.setattr(main, "render_forecast_chart", lambda forecasts, currency: "")
+    assert main.generate_forecast_chart(FORECAST, "USD") == ""
+    assert len(main.chart_cache) == 0
@@ -0,0 +1,22 @@
+import json
+
+from analyze import forecast_engines
+from analyze.forecast_engines import FORECAST_HORIZON, load_policy, select_engine
+
+RULES = [{"min_months": 0, "max_months": None, "engine": "naive"}]
+
+
+def write_policy(path, horizon):
+    path.write_text(json.dumps({"metric": "total_ape", "target": 0.15, "horizon": horizon, "rules": RULES}))
+    return str(path)
+
+
+def test_policy_for_the_api_horizon_is_used(tmp_path):
+    policy = load_policy(write_policy(tmp_path / "policy.json", FORECAST_HORIZON))
+    assert policy["rules"] == RULES
+    assert select_engine(24, policy) == "naive"
+
+
+def test_policy_for_another_horizon_is_ignored(tmp_path):
+    assert load_policy(write_policy(tmp_path / "policy.json", 3)) is None
+    assert select_engine(24, {}) == forecast_engines.DEFAULT_ENGINE
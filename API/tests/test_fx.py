@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from analyze import fx
+
+
+def test_shipped_rates_change_over_time():
+    table = fx.RateTable.load()
+    early, late = table.rates("USD", np.array(["2019-03-15", "2025-03-15"], dtype="datetime64[D]"))
+    assert early != late
+
+
+def test_rows_are_converted_at_their_own_dates():
+    inr = fx.convert_column([100.0, 100.0], ["USD", "USD"], ["2019-03-15", "2025-03-15"])
+    assert inr[0] != inr[1]
+    assert inr[0] == pytest.approx(100.0 / fx.pair_rate("INR", "USD", "2019-03-15"))
+    assert inr[1] == pytest.approx(100.0 / fx.pair_rate("INR", "USD", "2025-03-15"))
+
+
+def test_missing_dates_are_rejected_not_priced_at_the_latest_rate():
+    with pytest.raises(HTTPException) as error:
+        fx.convert_column([100.0, 100.0], ["USD", "USD"], ["2019-03-15", "not a date"])
+    assert error.value.status_code == 400 and "1 USD amounts" in error.value.detail
+    # Base-currency rows need no rate, so their dates are not looked at here
+    assert fx.convert_column([100.0], ["INR"], [None]).tolist() == [100.0]
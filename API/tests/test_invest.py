@@ -0,0 +1,20 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from analyze import transaction_store
+from benchmarks.fixtures import financial_data
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(transaction_store, "STORE_PATH", str(tmp_path / "transactions.db"))
+    monkeypatch.setattr(transaction_store, "_local", type(transaction_store._local)())
+    import main
+    # No lifespan: the job queue and precompute scheduler are not needed here
+    return TestClient(main.app)
+
+
+def test_invest_for_unknown_user_is_a_client_error(client):
+    response = client.post("/invest/", json=dict(financial_data(), user_id="nobody"))
+    assert response.status_code == 400
+    assert "Insufficient stored history" in response.json()["detail"]
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from jobs import JobQueue, JOB_LEASE, JOB_RETENTION
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_starting_a_worker_keeps_other_workers_jobs(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        first, second = JobQueue(path, workers=1), JobQueue(path, workers=1)
+        await first.start()
+        release = asyncio.Event()
+
+        async def runner(ctx):
+            await release.wait()
+            return {"ok": True}
+
+        job_id = first.submit("forecast", ["fit"], runner)
+        await asyncio.sleep(0.05)
+        await second.start()
+        status_after_restart = second.get(job_id)["status"]
+        release.set()
+        await asyncio.sleep(0.05)
+        final = second.get(job_id)
+        await first.stop()
+        await second.stop()
+        return status_after_restart, final
+
+    status, final = run(scenario())
+    assert status == "running"
+    assert final["status"] == "done" and final["result"] == {"ok": True}
+
+
+def test_jobs_with_expired_lease_are_failed_and_stay_failed(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        gone, survivor = JobQueue(path, workers=1), JobQueue(path, workers=1)
+        await gone.start()
+        job_id = gone.submit("forecast", ["fit"], lambda ctx: asyncio.sleep(3600))
+        await asyncio.sleep(0.05)
+        result = survivor.maintain(now=time.time() + JOB_LEASE + 1)
+        # A late update from the presumed-dead owner must not resurrect the job
+        gone._update(job_id, status="done", result={"late": True})
+        job = survivor.get(job_id)
+        await gone.stop()
+        return result, job
+
+    result, job = run(scenario())
+    assert result["orphaned"] == 1
+    assert job["status"] == "failed" and job["result"] is None
+
+
+def test_finished_jobs_expire(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        queue = JobQueue(path, workers=1)
+        await queue.start()
+        job_id = queue.submit("forecast", ["fit"], lambda ctx: asyncio.sleep(0, result={"ok": True}))
+        await asyncio.sleep(0.05)
+        assert queue.get(job_id)["status"] == "done"
+        result = queue.maintain(now=time.time() + JOB_RETENTION + 1)
+        await queue.stop()
+        return result, queue.get(job_id)
+
+    result, job = run(scenario())
+    assert result["expired"] == 1 and job is None
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from fastapi import HTTPException
+from analyze.llm_router import LLMRouter, Provider
+
+
+def half_open_provider(name, generate):
+    provider = Provider(name, generate, min_timeout=1.0, max_timeout=5.0)
+    provider.breaker.state = "open"
+    provider.breaker.opened_at = time.monotonic() - provider.breaker.reset_seconds - 1
+    return provider
+
+
+def fixed(text, delay=0.0):
+    async def generate(prompt, max_tokens, timeout):
+        await asyncio.sleep(delay)
+        return text
+    return generate
+
+
+def test_cancelled_probe_is_released():
+    calls = []
+
+    async def slow(prompt, max_tokens, timeout):
+        calls.append(prompt)
+        await asyncio.sleep(10)
+        return "remote"
+
+    remote = half_open_provider("remote", slow)
+    remote.latency, remote.deviation = 0.01, 0.0
+    router = LLMRouter([remote, Provider("local", fixed("local"), 0.01, 5.0)], hedge=True)
+
+    async def scenario():
+        # The probe loses the hedge race to the local model and is cancelled
+        first = await router.generate("one")
+        await asyncio.sleep(0.01)
+        # A request cancelled while its probe is running
+        task = asyncio.create_task(router.generate("two"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # Cancelled calls finish unwinding on the next loop iterations
+        await asyncio.sleep(0.01)
+        third = await router.generate("three")
+        return first, third
+
+    first, third = asyncio.run(scenario())
+    assert first.provider == "local" and third.provider == "local"
+    # Every request probed the remote provider again instead of short-circuiting for good
+    assert calls == ["one", "two", "three"]
+    assert remote.breaker.state == "half_open" and remote.breaker.available()
+
+
+def test_shed_probe_is_released():
+    async def shed(prompt, max_tokens, timeout):
+        raise HTTPException(status_code=503, detail="busy")
+
+    remote = half_open_provider("remote", shed)
+    router = LLMRouter([remote], hedge=False)
+    result = asyncio.run(router.generate("one"))
+    assert result.provider == "template"
+    assert remote.breaker.state == "half_open" and remote.breaker.allow()
+
+
+def test_probe_outcome_closes_or_reopens():
+    healthy = half_open_provider("healthy", fixed("ok"))
+    assert asyncio.run(LLMRouter([healthy]).generate("x")).provider == "healthy"
+    assert healthy.breaker.state == "closed"
+
+    broken = half_open_provider("broken", fixed(""))
+    assert asyncio.run(LLMRouter([broken]).generate("x")).provider == "template"
+    assert broken.breaker.state == "open" and not broken.breaker.available()
+
+
+def test_unlaunched_half_open_provider_keeps_its_probe():
+    backup = half_open_provider("backup", fixed("backup"))
+    router = LLMRouter([Provider("primary", fixed("primary"), 0.01, 5.0), backup], hedge=False)
+    assert asyncio.run(router.generate("x")).provider == "primary"
+    assert backup.breaker.available()
@@ -0,0 +1,15 @@
+from analyze import fx
+from analyze.narrative import risk_commentary, forecast_commentary
+
+PROFILE = {"risk_score": "Low", "volatility": 0.1, "high_risk_categories": [], "average_monthly_expense": 50000.0}
+
+
+def test_emergency_fund_in_base_currency():
+    assert "300,000.00 INR" in " ".join(risk_commentary(PROFILE, "INR"))
+
+
+def test_emergency_fund_is_converted_to_the_requested_currency():
+    expected = 50000.0 * 6 * fx.pair_rate("INR", "USD")
+    text = forecast_commentary({"narrative": ""}, PROFILE, "USD")
+    assert f"{expected:,.2f} USD" in text
+    assert "300,000.00" not in text
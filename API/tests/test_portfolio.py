@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyze.portfolio import PriceStore, analyze_portfolio, backtest, write_store
+
+DAYS = pd.bdate_range("2020-01-01", "2022-12-30")
+
+
+@pytest.fixture
+def store(tmp_path):
+    t = np.arange(len(DAYS))
+    prices = pd.DataFrame({
+        # Cash-like: never moves
+        "FLAT": np.full(len(DAYS), 100.0),
+        # Steady growth of 0.04% per trading day
+        "GROW": 100.0 * 1.0004 ** t,
+        # Halves over the first year, then recovers
+        "DIP": 100.0 * np.where(t < 250, 1 - 0.5 * t / 250, 0.5 + 0.5 * (t - 250) / (len(DAYS) - 250)),
+    }, index=DAYS)
+    path = str(tmp_path / "prices")
+    assert write_store(prices, path) == 3
+    return PriceStore(path)
+
+
+def test_flat_mix_returns_what_was_contributed(store):
+    result = backtest(store, {"FLAT": 1.0}, 100.0)
+    assert result["annual_return"] == 0 and result["annual_volatility"] == 0 and result["max_drawdown"] == 0
+    assert result["final_value"] == result["contributed"] == 100.0 * len(result["monthly_returns"])
+
+
+def test_growth_and_drawdown(store):
+    grow = backtest(store, {"GROW": 1.0}, 100.0)
+    assert grow["annual_return"] == pytest.approx(1.0004 ** 252 - 1, abs=0.01)
+    assert grow["max_drawdown"] == 0 and grow["final_value"] > grow["contributed"]
+    dip = backtest(store, {"DIP": 1.0}, 100.0)
+    assert dip["max_drawdown"] == pytest.approx(-0.5, abs=0.01)
+    assert dip["max_drawdown_period"][0] == "2020-01-01"
+
+
+def test_analyze_portfolio_projects_the_mix(store):
+    result = analyze_portfolio(["FLAT", "GROW", "MISSING"], 500.0, 24, store=store)
+    assert result["backtest"]["tickers"] == ["FLAT", "GROW"]
+    assert result["backtest"]["weights"] == {"FLAT": 0.5, "GROW": 0.5}
+    projection = result["projection"]
+    assert projection["contributed"] == 500.0 * 24
+    assert projection["final_value"]["p10"] <= projection["final_value"]["p50"] <= projection["final_value"]["p90"]
+    assert projection["probability_of_loss"] == 0
+
+
+def test_unknown_tickers_have_no_analysis(store):
+    assert analyze_portfolio(["MISSING"], 500.0, 24, store=store) is None
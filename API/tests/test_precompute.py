@@ -0,0 +1,36 @@
+import asyncio
+import threading
+import time
+
+import precompute
+from precompute import PrecomputeScheduler
+
+
+def test_scan_queries_in_a_thread_and_queues_on_the_loop(monkeypatch):
+    threads = {}
+
+    def active_users(since, limit):
+        threads["query"] = threading.get_ident()
+        return [{"user_id": "u1", "currency": "USD", "language": None, "version": 3,
+                 "ingested_at": time.time(), "seen_at": None}]
+
+    monkeypatch.setattr(precompute, "active_users", active_users)
+
+    async def scenario():
+        scheduler = PrecomputeScheduler(warm=None)
+        scheduler._wakeup = asyncio.Event()
+        enqueue = scheduler.enqueue
+
+        def recording_enqueue(*args, **kwargs):
+            threads["enqueue"] = threading.get_ident()
+            enqueue(*args, **kwargs)
+
+        scheduler.enqueue = recording_enqueue
+        found = await scheduler.scan()
+        return found, scheduler, threads.pop("enqueue"), threading.get_ident()
+
+    found, scheduler, enqueue_thread, loop_thread = asyncio.run(scenario())
+    assert found == 1 and scheduler.queue_depth() == 1
+    assert scheduler._wakeup.is_set()
+    assert enqueue_thread == loop_thread != threads["query"]
+    assert scheduler._pop() == ("u1", {"currency": "USD", "language": "en"})
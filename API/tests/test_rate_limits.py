@@ -0,0 +1,50 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
+import ratelimit_storage  # noqa: F401
+
+
+def worker_app(storage_uri: str) -> FastAPI:
+    """
+    One worker's app, with its own Limiter instance on the given storage.
+    """
+    app = FastAPI()
+    limiter = Limiter(key_func=get_remote_address, storage_uri=storage_uri)
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    @app.get("/limited")
+    @limiter.limit("4/minute")
+    @limiter.shared_limit("10/minute", scope="cost", cost=lambda request: 3)
+    async def limited(request: Request):
+        return {"ok": True}
+
+    return app
+
+
+def statuses(storage_uri: str, requests: int):
+    first, second = TestClient(worker_app(storage_uri)), TestClient(worker_app(storage_uri))
+    return [(first if i % 2 == 0 else second).get("/limited").status_code for i in range(requests)]
+
+
+def test_limits_hold_across_workers_sharing_sqlite(tmp_path):
+    # Two apps alternate; the shared cost budget (10 units, 3 per call) allows three calls in total
+    assert statuses(f"sqlite:///{tmp_path / 'ratelimit.db'}", 6) == [200, 200, 200, 429, 429, 429]
+
+
+def test_memory_storage_multiplies_limits_by_workers():
+    assert statuses("memory://", 6) == [200] * 6
+
+
+def test_sqlite_counters_expire(tmp_path):
+    storage = ratelimit_storage.SQLiteStorage(f"sqlite:///{tmp_path / 'ratelimit.db'}")
+    assert storage.incr("client", 60) == 1
+    assert storage.incr("client", 60, amount=2) == 3
+    assert storage.get("client") == 3
+    assert storage.incr("expired", -1) == 1
+    assert storage.get("expired") == 0
+    assert storage.incr("expired", 60) == 1
+    storage.clear("client")
+    assert storage.get("client") == 0 and storage.check()
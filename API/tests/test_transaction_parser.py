@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyze import transaction_parser
+
+
+def test_pdf_rows_without_a_category_are_stored_as_other(monkeypatch):
+    frame = pd.DataFrame({"date": ["2024-01-05", "2024-01-06"], "amount": ["120.50", "80"],
+                          "category": ["Food", np.nan]})
+    monkeypatch.setattr(transaction_parser, "_pdf_frames", lambda content: iter([frame]))
+    [validated] = list(transaction_parser.stream_pdf_transactions(b""))
+    assert validated["category"].tolist() == ["Food", "Other"]
+    assert validated["amount"].tolist() == [120.5, 80.0]
+
+
+def test_pdf_rows_with_invalid_amounts_are_rejected(monkeypatch):
+    frame = pd.DataFrame({"date": ["2024-01-05"], "amount": ["n/a"], "category": ["Food"]})
+    monkeypatch.setattr(transaction_parser, "_pdf_frames", lambda content: iter([frame]))
+    with pytest.raises(ValueError, match="amounts"):
+        list(transaction_parser.stream_pdf_transactions(b""))
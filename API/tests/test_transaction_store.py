@@ -0,0 +1,34 @@
+import sqlite3
+
+from analyze import transaction_store
+from analyze.transaction_store import SCHEMA, SCHEMA_VERSION, _migrate
+
+
+def old_store(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO transactions (user_id, date, month, amount, category) VALUES (?, ?, ?, ?, ?)",
+                     [("u1", "2024-01-05", "2024-01", 100.0, "Food"), ("u1", "2024-01-20", "2024-01", 50.0, "Food")])
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+
+def test_only_the_first_connection_migrates_an_old_store(tmp_path, monkeypatch):
+    path = str(tmp_path / "transactions.db")
+    monkeypatch.setattr(transaction_store, "STORE_PATH", path)
+    old_store(path)
+    first, second = sqlite3.connect(path), sqlite3.connect(path)
+    # Both saw the old version before either took the write lock
+    assert first.execute("PRAGMA user_version").fetchone()[0] == 1
+    assert second.execute("PRAGMA user_version").fetchone()[0] == 1
+
+    _migrate(first)
+    assert first.execute("SELECT total, count FROM monthly_rollups").fetchall() == [(150.0, 2)]
+    first.execute("INSERT INTO monthly_rollups VALUES ('u2', '2024-02', 10.0, 1, 100.0)")
+    first.commit()
+
+    _migrate(second)
+    assert second.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    # The second migration found the store current and did not rebuild over the new row
+    assert second.execute("SELECT COUNT(*) FROM monthly_rollups").fetchone()[0] == 2
@@ -0,0 +1,31 @@
+import pytest
+from cachetools import LRUCache
+
+from analyze import translation
+from analyze.translation import DictionaryBackend, translate_batch
+
+
+class UpperBackend:
+    name = "upper"
+
+    def translate_batch(self, texts, language):
+        return [text.upper() for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(translation, "TRANSLATION_CACHE_PATH", str(tmp_path / "translations.db"))
+    monkeypatch.setattr(translation, "_local", type(translation._local)())
+    monkeypatch.setattr(translation, "_memory", LRUCache(maxsize=16))
+    monkeypatch.setattr(translation, "_backend", None)
+
+
+def test_untranslated_strings_are_not_cached(tmp_path):
+    path = tmp_path / "dictionary.json"
+    path.write_text('{"es": {"Savings": "Ahorros"}}', encoding="utf-8")
+    translation.set_backend(DictionaryBackend(str(path)))
+    assert translate_batch(["Savings", "Emergency fund"], "es") == ["Ahorros", "Emergency fund"]
+
+    # After switching backends the string the dictionary lacked is translated, the cached one reused
+    translation.set_backend(UpperBackend())
+    assert translate_batch(["Savings", "Emergency fund"], "es") == ["Ahorros", "EMERGENCY FUND"]
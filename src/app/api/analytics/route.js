@@ -5,6 +5,8 @@ export async function POST(request) {
     const response = await fetch('http://127.0.0.1:8000/forecast_expenses/', {
       method: 'POST',
       body: formData,
+      // Closing the page aborts the backend request, which then stops its forecast
+      signal: request.signal,
     });
 
     const data = await response.json();
@@ -120,6 +120,8 @@ export async function POST(req) {
           "Accept": "application/json",
         },
         body: JSON.stringify(apiPayload),
+        // Closing the page aborts the backend request, which then stops its analysis
+        signal: req.signal,
       });
 
       if (!response.ok) {
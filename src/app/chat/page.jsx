@@ -89,7 +89,7 @@ const theme = createTheme({
   },
 });
 
-function formatHuggingFaceAdvice(text) {
+function formatAnswer(text) {
   const blocks = text
     .split(/\n{2,}/)
     .map(b => b.trim())
@@ -192,7 +192,7 @@ function highlightKeywords(text) {
   });
 }
 
-function formatGeminiAdvice(text) {
+function formatSummary(text) {
   const lines = text
     .split(/[\n•\-]+/)
     .map((line) => line.trim())
@@ -226,6 +226,7 @@ export default function FinancialChatbot() {
   const [income, setIncome] = useState(defaultData.income.toString());
   const [expenses, setExpenses] = useState(defaultData.expenses.toString());
   const [response, setResponse] = useState(null);
+  const [sessionId, setSessionId] = useState(null);
   const [error, setError] = useState(null);
   const [loading, setLoading] = useState(false);
   const [drawerOpen, setDrawerOpen] = useState(false);
@@ -250,11 +251,12 @@ export default function FinancialChatbot() {
       const res = await fetch('/api/chat', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ question, user_data })
+        body: JSON.stringify({ question, user_data, session_id: sessionId })
       });
 
       const data = await res.json();
       if (!res.ok) throw new Error(data.detail || data.error || 'Something went wrong');
+      setSessionId(data.session_id);
       setResponse(data);
     } catch (err) {
       setError(err.message);
@@ -408,7 +410,7 @@ export default function FinancialChatbot() {
                   </CardContent>
                 </Card>
 
-                {/* HuggingFace Answer */}
+                {/* Assistant answer */}
                 <Card variant="outlined" sx={{ mb: 3, borderRadius: 3 }}>
                   <CardContent>
                     <Stack direction="row" spacing={2} mb={2}>
@@ -417,16 +419,17 @@ export default function FinancialChatbot() {
                       </Avatar>
                       <Box>
                         <Typography variant="subtitle2" color="text.secondary" fontWeight={600}>
-                          AI Financial Insight
+                          Assistant Answer{response.answer_source ? ` (${response.answer_source})` : ''}
                         </Typography>
                       </Box>
                     </Stack>
                     <Divider sx={{ mb: 2 }} />
-                    {formatHuggingFaceAdvice(response.huggingface_answer)}
+                    {formatAnswer(response.answer)}
                   </CardContent>
                 </Card>
 
-                {/* Gemini Commentary */}
+                {/* Deterministic analysis summary the answer was grounded on */}
+                {response.analysis_summary && (
                 <Card variant="outlined" sx={{ borderRadius: 3 }}>
                   <CardContent>
                     <Stack direction="row" spacing={2} mb={2}>
@@ -435,14 +438,15 @@ export default function FinancialChatbot() {
                       </Avatar>
                       <Box>
                         <Typography variant="subtitle2" color="text.secondary" fontWeight={600}>
-                          Expert Commentary
+                          Analysis Summary
                         </Typography>
                       </Box>
                     </Stack>
                     <Divider sx={{ mb: 2 }} />
-                    {formatGeminiAdvice(response.gemini_commentary)}
+                    {formatSummary(response.analysis_summary)}
                   </CardContent>
                 </Card>
+                )}
               </Box>
             </Fade>
           )}
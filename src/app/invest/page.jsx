@@ -316,6 +316,33 @@ export default function InvestPage() {
                     </List>
                   </CardContent>
                 </Card>
+
+                {response.portfolio && (
+                  <Card variant="outlined" sx={{ borderRadius: 3 }}>
+                    <CardContent>
+                      <Typography variant="h5" component="h2" fontWeight="bold" mb={2}>
+                        Historical Backtest
+                      </Typography>
+                      <Typography variant="body2" color="text.secondary" mb={2}>
+                        {response.portfolio.backtest.tickers.join(", ")} from {response.portfolio.backtest.start} to {response.portfolio.backtest.end}
+                      </Typography>
+                      <Box display="flex" gap={2} flexWrap="wrap">
+                        <Chip label={`Annual return ${(response.portfolio.backtest.annual_return * 100).toFixed(1)}%`} color="primary" />
+                        <Chip label={`Volatility ${(response.portfolio.backtest.annual_volatility * 100).toFixed(1)}%`} />
+                        <Chip label={`Max drawdown ${(response.portfolio.backtest.max_drawdown * 100).toFixed(1)}%`} color="error" />
+                      </Box>
+                      {response.portfolio.projection && (
+                        <Typography variant="body1" mt={2}>
+                          Investing your savings for {response.portfolio.projection.months} months: median{" "}
+                          {response.portfolio.projection.final_value.p50.toLocaleString()} (10th–90th percentile{" "}
+                          {response.portfolio.projection.final_value.p10.toLocaleString()}–
+                          {response.portfolio.projection.final_value.p90.toLocaleString()}) on{" "}
+                          {response.portfolio.projection.contributed.toLocaleString()} contributed.
+                        </Typography>
+                      )}
+                    </CardContent>
+                  </Card>
+                )}
               </Box>
             </Fade>
           )}